@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+from django.db.models import Count, F
+
+#Khoảng ngày dài nhất của một trang lịch họp
+MAX_RANGE_DAYS = 31
+
+#Thứ tự trong một ngày của lịch họp: cuộc họp cả ngày (không có giờ) trước, sau đó theo giờ
+DAY_ORDERING = (F('time').asc(nulls_first=True), F('id').asc())
+
+
+class DayStream:
+    """
+    Các cuộc họp của cả khoảng ngày, đọc bằng một truy vấn duy nhất (theo ngày rồi theo thứ tự trong ngày)
+    và chia dần cho từng ngày theo thứ tự template duyệt.
+    """
+
+    def __init__(self, queryset):
+        self._queryset = queryset
+        self._rows = None
+        self._pending = None
+        self._date = None
+
+    def take(self, date):
+        # Ngày đã đi qua (duyệt lại hoặc sai thứ tự) thì truy vấn riêng ngày đó
+        if self._date is not None and date <= self._date:
+            return self._queryset.filter(date=date).order_by(*DAY_ORDERING).iterator()
+        self._date = date
+        if self._rows is None:
+            self._rows = self._queryset.order_by('date', *DAY_ORDERING).iterator()
+        return self._take(date)
+
+    def _take(self, date):
+        while True:
+            meeting = self._pending or next(self._rows, None)
+            self._pending = None
+            if meeting is None or meeting.date > date:
+                # Cuộc họp của ngày sau để lại cho ngày đó
+                self._pending = meeting
+                return
+            # Bỏ qua phần còn lại của các ngày trước mà template không duyệt hết
+            if meeting.date == date:
+                yield meeting
+
+
+class DaySection:
+    """
+    Một ngày trong lịch họp: tiêu đề ngày, số cuộc họp và danh sách cuộc họp được lấy lười.
+    """
+
+    def __init__(self, date, count, stream):
+        self.date = date
+        self.count = count
+        self._stream = stream
+
+    @property
+    def meetings(self):
+        # Chỉ truy vấn khi template thực sự duyệt tới ngày đầu tiên; các ngày sau dùng tiếp cùng truy vấn
+        return self._stream.take(self.date)
+
+
+def group_by_day(queryset):
+    """
+    Nhóm các cuộc họp theo ngày. Tiêu đề và số lượng mỗi ngày được tính bằng một truy vấn GROUP BY,
+    danh sách cuộc họp của mọi ngày được đọc bằng một truy vấn khác.
+    """
+    days = (
+        queryset.order_by()
+        .values('date')
+        .annotate(count=Count('id'))
+        .order_by('date')
+    )
+    stream = DayStream(queryset)
+    return [DaySection(row['date'], row['count'], stream) for row in days]
+
+
+def week_bounds(day):
+    start = day - timedelta(days=day.weekday())
+    return start, start + timedelta(days=6)
+
+
+def month_bounds(day):
+    start = day.replace(day=1)
+    next_month = (start + timedelta(days=32)).replace(day=1)
+    return start, next_month - timedelta(days=1)
+
+
+def agenda_range(date_from, date_to, today, by_month=False):
+    """
+    Khoảng ngày của trang lịch họp: thiếu cả hai đầu thì là tuần (hoặc tháng) hiện tại, thiếu một đầu thì lấy
+    tuần/tháng chứa đầu còn lại. Khoảng dài hơn MAX_RANGE_DAYS ngày bị cắt bớt phía sau.
+    """
+    bounds = month_bounds if by_month else week_bounds
+    if not date_from and not date_to:
+        date_from, date_to = bounds(today)
+    elif not date_to:
+        date_to = bounds(date_from)[1]
+    elif not date_from:
+        date_from = bounds(date_to)[0]
+    return date_from, min(date_to, date_from + timedelta(days=MAX_RANGE_DAYS - 1))
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MeetingManagerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'meeting_manager'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
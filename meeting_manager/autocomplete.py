@@ -0,0 +1,56 @@
+from django.db.models import Q
+
+from .models import Department, Organization, UserProfile
+from .search import normalize_text
+
+#Số gợi ý tối đa trả về cho mỗi lần gõ
+LIMIT = 20
+
+
+def user_label(user):
+    return user.get_full_name() or user.username
+
+
+def prefix_filter(field, text):
+    """
+    Điều kiện "bắt đầu bằng `text`" viết dưới dạng khoảng [text, text + U+FFFF)
+    để dùng được chỉ mục trên cột tên đã chuẩn hoá.
+    """
+    return Q(**{f'{field}__gte': text, f'{field}__lt': text + '\uffff'})
+
+
+def _query(text):
+    return ' '.join(normalize_text(text).split())
+
+
+def users(text, limit=LIMIT):
+    """
+    Người dùng đang hoạt động có họ tên hoặc tên bắt đầu bằng `text` (không phân biệt dấu).
+    """
+    profiles = UserProfile.objects.filter(user__is_active=True).select_related('user')
+    text = _query(text)
+    if text:
+        profiles = profiles.filter(prefix_filter('search_name', text) | prefix_filter('search_given_name', text))
+    return [
+        {'id': profile.user_id, 'text': user_label(profile.user)}
+        for profile in profiles.order_by('search_name', 'pk')[:limit]
+    ]
+
+
+def _groups(model, text, limit):
+    groups = model.objects.all()
+    text = _query(text)
+    if text:
+        groups = groups.filter(prefix_filter('search_name', text))
+    return [
+        {'id': pk, 'text': name}
+        for pk, name in groups.order_by('search_name', 'pk').values_list('pk', 'name')[:limit]
+    ]
+
+
+def departments(text, limit=LIMIT):
+    return _groups(Department, text, limit)
+
+
+def organizations(text, limit=LIMIT):
+    return _groups(Organization, text, limit)
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import statistics
+import time
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from . import fragments, ical, search, views
+from .models import Department, Meeting
+from .pagination import encode_cursor, ORDERING
+
+#Kết quả chuẩn được lưu cùng mã nguồn, ghi lại bằng `run_benchmarks --update-baseline`
+BASELINE_PATH = Path(__file__).resolve().parent / 'benchmark_baseline.json'
+
+#Khoá trong tệp chuẩn chứa thời gian của phép đo hiệu chỉnh (tốc độ máy đã ghi chuẩn)
+CALIBRATION = '_calibration'
+
+BENCHMARKS = {}
+#Hàm chạy trước mỗi lần đo (không tính thời gian), ví dụ làm nguội cache
+SETUPS = {}
+
+
+def benchmark(name, setup=None):
+    def register(func):
+        BENCHMARKS[name] = func
+        if setup:
+            SETUPS[name] = setup
+        return func
+    return register
+
+
+class Context:
+    """
+    Dữ liệu dùng chung cho các phép đo, lấy từ CSDL hiện tại một lần trước khi đo.
+    """
+
+    def __init__(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.order_by('pk').first()
+        self.department = Department.objects.order_by('pk').first()
+        self.invitees = list(User.objects.order_by('pk').values_list('pk', flat=True)[:300])
+        self.meeting = Meeting.objects.order_by('-pk').first()
+        total = Meeting.objects.count()
+        # Con trỏ ở giữa danh sách: trang sâu phải tốn như trang đầu
+        middle = Meeting.objects.order_by(*ORDERING)[total // 2] if total else None
+        self.deep_cursor = encode_cursor(middle) if middle else None
+
+    def get(self, path, data=None, user=None, **extra):
+        request = self.factory.get(path, data or {}, **extra)
+        request.user = user or AnonymousUser()
+        return request
+
+
+def _rolled_back(func):
+    # Các phép đo có ghi dữ liệu được chạy trong giao dịch và huỷ sau khi đo
+    def wrapper(ctx):
+        with transaction.atomic():
+            func(ctx)
+            transaction.set_rollback(True)
+    return wrapper
+
+
+def _cold_fragments(ctx):
+    # Đổi phiên bản đoạn HTML để đo truy vấn phân trang/tìm kiếm thay vì lần đọc cache
+    cache.delete(fragments.VERSION_KEY)
+
+
+@benchmark('meeting_list.first_page', setup=_cold_fragments)
+def bench_meeting_list(ctx):
+    async_to_sync(views.meeting_list)(ctx.get('/meeting_manager/'))
+
+
+@benchmark('meeting_list.deep_page', setup=_cold_fragments)
+def bench_meeting_list_deep(ctx):
+    async_to_sync(views.meeting_list)(ctx.get('/meeting_manager/', {'after': ctx.deep_cursor} if ctx.deep_cursor else {}))
+
+
+@benchmark('meeting_list.search', setup=_cold_fragments)
+def bench_meeting_list_search(ctx):
+    async_to_sync(views.meeting_list)(ctx.get('/meeting_manager/', {'search': 'giao ban'}))
+
+
+@benchmark('meeting_agenda.month')
+def bench_meeting_agenda(ctx):
+    views.meeting_agenda(ctx.get('/meeting_manager/agenda/', {'range': 'month'}))
+
+
+@benchmark('search.ranked')
+def bench_search_ranked(ctx):
+    search.search_meetings('hoi chan', limit=50)
+
+
+@benchmark('meeting.save_numbering')
+@_rolled_back
+def bench_meeting_save(ctx):
+    Meeting.objects.create(title='Đo hiệu năng', date=ctx.meeting.date, host=ctx.user, created_by=ctx.user)
+
+
+@benchmark('meeting.add_participants_300')
+@_rolled_back
+def bench_add_participants(ctx):
+    ctx.meeting.add_participants(users=ctx.invitees, departments=[ctx.department] if ctx.department else ())
+
+
+@benchmark('ical.user_feed_not_modified')
+def bench_ical_not_modified(ctx):
+    token = ical.feed_token(ical.USER, ctx.user.pk)
+    etag, _ = ical.feed_state(ical.USER, ctx.user.pk)
+    views.ical_user_feed(ctx.get('/', HTTP_IF_NONE_MATCH=etag), token)
+
+
+def calibrate(repeat=5):
+    """
+    Thời gian (ms) của một phép tính cố định, dùng để quy đổi thời gian chuẩn sang tốc độ của máy đang đo.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hashlib.sha256(b'meetly' * 1_000_000).hexdigest()
+        sorted(str(n) for n in range(200_000))
+        timings.append(time.perf_counter() - start)
+    return round(statistics.median(timings) * 1000, 2)
+
+
+def run(names=None, repeat=5):
+    """
+    Chạy các phép đo; trả về {tên: {'median_ms', 'queries'}}.
+    """
+    ctx = Context()
+    if ctx.user is None or ctx.meeting is None:
+        raise RuntimeError('CSDL chưa có dữ liệu, hãy chạy generate_synthetic_data trước.')
+    results = {}
+    for name, func in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        setup = SETUPS.get(name)
+        func(ctx)  # làm nóng cache
+        timings = []
+        queries = 0
+        for _ in range(repeat):
+            if setup:
+                setup(ctx)
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                func(ctx)
+                timings.append(time.perf_counter() - start)
+            queries = max(queries, len(captured))
+        results[name] = {
+            'median_ms': round(statistics.median(timings) * 1000, 2),
+            'queries': queries,
+        }
+    return results
+
+
+def load_baseline(path=BASELINE_PATH):
+    try:
+        return json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    Path(path).write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+
+
+def scale(baseline, calibration_ms):
+    """
+    Tỉ lệ tốc độ giữa máy đang đo và máy đã ghi chuẩn (1 khi tệp chuẩn chưa có phép đo hiệu chỉnh).
+    """
+    recorded = baseline.get(CALIBRATION, {}).get('median_ms')
+    return calibration_ms / recorded if recorded else 1.0
+
+
+def regressions(results, baseline, tolerance=0.5, factor=1.0):
+    """
+    Các phép đo có số truy vấn khác chuẩn, hoặc chậm hơn thời gian chuẩn (đã nhân `factor`, tỉ lệ tốc độ máy)
+    quá `tolerance`.
+    """
+    problems = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        # Số truy vấn không phụ thuộc vào máy: so khớp chính xác, ít hơn chuẩn thì cần ghi lại chuẩn
+        if result['queries'] != expected['queries']:
+            problems.append(f"{name}: {result['queries']} truy vấn (chuẩn {expected['queries']})")
+        limit = expected['median_ms'] * factor * (1 + tolerance)
+        if result['median_ms'] > limit:
+            problems.append(f"{name}: {result['median_ms']} ms (chuẩn quy đổi {expected['median_ms'] * factor:.2f} ms)")
+    return problems
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+#Các backend cache dùng chung giữa các tiến trình với add/incr nguyên tử
+SHARED_CACHE_BACKENDS = (
+    'django.core.cache.backends.redis.RedisCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Cảnh báo khi cache mặc định không dùng chung được giữa các tiến trình.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend in SHARED_CACHE_BACKENDS:
+        return []
+    return [Warning(
+        f"Cache mặc định ({backend}) không dùng chung giữa các tiến trình hoặc add/incr không nguyên tử.",
+        hint=(
+            'Phiên bản đoạn HTML, tập thành viên, lịch .ics và bộ đếm thông báo sẽ sai khi chạy nhiều tiến trình. '
+            'Đặt MEETLY_REDIS_URL để dùng Redis.'
+        ),
+        id='meeting_manager.W001',
+    )]
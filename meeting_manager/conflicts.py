@@ -0,0 +1,131 @@
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.db.models import Exists, OuterRef, Q
+
+from .membership import effective_attendee_ids, effective_attendee_map, user_group_map
+from .models import Meeting, MeetingParticipant
+
+CANCELLED = Meeting.CANCELLED
+
+#Các trường quyết định lịch của cuộc họp; đổi một trong số này thì phải kiểm tra lại trùng lịch
+SCHEDULE_FIELDS = ('date', 'time', 'duration', 'host_id', 'preparation_id', 'status')
+
+#Số lỗi trùng lịch tối đa được báo
+MAX_CONFLICT_MESSAGES = 10
+
+#Một người (user_id) bị trùng lịch với cuộc họp `meeting`
+Conflict = namedtuple('Conflict', ['user_id', 'meeting'])
+
+
+def _interval(meeting):
+    if meeting.time is None or meeting.date is None:
+        return None
+    start = datetime.combine(meeting.date, meeting.time)
+    return start, start + timedelta(minutes=meeting.duration or 0)
+
+
+def _overlaps(a, b):
+    return a[0] < b[1] and b[0] < a[1]
+
+
+def _busy_people(meeting, attendee_ids):
+    return set(attendee_ids) | {pk for pk in (meeting.host_id, meeting.preparation_id) if pk}
+
+
+def involving(meetings, people):
+    """
+    Thu hẹp `meetings` về các cuộc họp có ít nhất một người trong `people`: chủ trì, người chuẩn bị,
+    được mời trực tiếp hoặc qua Khoa/Phòng, Tổ chức của họ.
+    """
+    departments, organizations = set(), set()
+    for user_departments, user_organizations in user_group_map(people).values():
+        departments |= user_departments
+        organizations |= user_organizations
+    participants = MeetingParticipant.objects.filter(meeting=OuterRef('pk')).filter(
+        Q(user_id__in=people) | Q(department_id__in=departments) | Q(organization_id__in=organizations)
+    )
+    return meetings.filter(Q(host_id__in=people) | Q(preparation_id__in=people) | Exists(participants))
+
+
+def find_conflicts(meeting, attendee_ids=None):
+    """
+    Các người (chủ trì, người chuẩn bị, người tham dự thực tế) của `meeting` đã có cuộc họp khác
+    trùng thời gian trong cùng ngày. Chỉ đọc các cuộc họp của ngày đó có liên quan tới những người này,
+    bắt đầu trước giờ kết thúc.
+    """
+    interval = _interval(meeting)
+    if interval is None:
+        return []
+    if attendee_ids is None:
+        attendee_ids = effective_attendee_ids(meeting) if meeting.pk else set()
+    people = _busy_people(meeting, attendee_ids)
+    if not people:
+        return []
+
+    others = Meeting.objects.filter(date=meeting.date, time__isnull=False).exclude(status=CANCELLED)
+    if interval[1].date() == meeting.date:
+        others = others.filter(time__lt=interval[1].time())
+    if meeting.pk:
+        others = others.exclude(pk=meeting.pk)
+    overlapping = [
+        other for other in involving(others, people).only(
+            'pk', 'meeting_number', 'title', 'date', 'time', 'duration', 'host_id', 'preparation_id',
+        )
+        if _overlaps(interval, _interval(other))
+    ]
+    if not overlapping:
+        return []
+
+    attendees = effective_attendee_map([other.pk for other in overlapping])
+    conflicts = []
+    for other in overlapping:
+        for user_id in sorted(people & _busy_people(other, attendees[other.pk])):
+            conflicts.append(Conflict(user_id, other))
+    return conflicts
+
+
+def conflict_messages(conflicts, limit=MAX_CONFLICT_MESSAGES):
+    """
+    Thông báo lỗi cho các Conflict, tối đa `limit` dòng cộng một dòng tổng số còn lại.
+    """
+    shown = conflicts[:limit]
+    names = {
+        user.pk: user.get_full_name() or user.username
+        for user in User.objects.filter(pk__in={conflict.user_id for conflict in shown})
+    }
+    messages = [
+        f"Trùng lịch: {names.get(conflict.user_id)} đã có cuộc họp "
+        f"{conflict.meeting.meeting_number} - {conflict.meeting.title} lúc {conflict.meeting.time:%H:%M}."
+        for conflict in shown
+    ]
+    if len(conflicts) > limit:
+        messages.append(f"... và {len(conflicts) - limit} trường hợp trùng lịch khác.")
+    return messages
+
+
+def find_schedule_conflicts(entries):
+    """
+    Kiểm tra trùng lịch trong bộ nhớ cho một danh sách (meeting, attendee_ids), ví dụ lịch nhập hàng loạt.
+    Trả về các bộ (user_id, meeting_a, meeting_b) cho mọi cặp cuộc họp trùng giờ của cùng một người,
+    meeting_a bắt đầu trước (hoặc đứng trước trong `entries` nếu cùng giờ bắt đầu).
+    """
+    timeline = defaultdict(list)
+    for index, (meeting, attendee_ids) in enumerate(entries):
+        interval = _interval(meeting)
+        if interval is None or meeting.status == CANCELLED:
+            continue
+        for user_id in _busy_people(meeting, attendee_ids):
+            timeline[user_id].append((interval[0], index, interval[1], meeting))
+
+    conflicts = []
+    for user_id, intervals in timeline.items():
+        intervals.sort(key=lambda item: item[:2])
+        # Quét theo thời gian bắt đầu, giữ mọi cuộc họp chưa kết thúc tại thời điểm đang xét
+        active = []
+        for start, _, end, meeting in intervals:
+            active = [item for item in active if item[0] > start]
+            conflicts.extend((user_id, other, meeting) for _, other in active)
+            active.append((end, meeting))
+    return conflicts
@@ -0,0 +1,209 @@
+import json
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Case, Q, Value, When
+from django.utils import timezone
+
+from .models import NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+
+class SendError(Exception):
+    """
+    Lỗi khi gửi tin. `retryable=False` khi thử lại cũng không thành công (sai người nhận...).
+    """
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class ZaloClient:
+    """
+    Gửi tin nhắn qua Zalo OA API. Địa chỉ API có thể trỏ tới một máy chủ HTTP giả lập khi kiểm thử.
+    """
+
+    def __init__(self, api_url=None, access_token=None, timeout=10):
+        self.api_url = api_url or settings.ZALO_API_URL
+        self.access_token = access_token if access_token is not None else settings.ZALO_ACCESS_TOKEN
+        self.timeout = timeout
+
+    def send(self, entry):
+        body = json.dumps({
+            'recipient': {'user_id': entry.recipient},
+            'message': {'text': entry.message},
+        }).encode()
+        request = urllib.request.Request(
+            self.api_url,
+            data=body,
+            method='POST',
+            headers={
+                'Content-Type': 'application/json',
+                'access_token': self.access_token,
+                # Cho phía nhận loại bỏ tin trùng nếu một lần gửi bị lặp lại
+                'X-Idempotency-Key': entry.idempotency_key,
+            },
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.loads(response.read() or b'{}')
+        except urllib.error.HTTPError as e:
+            raise SendError(f"HTTP {e.code}", retryable=e.code == 429 or e.code >= 500)
+        except (urllib.error.URLError, TimeoutError, OSError) as e:
+            raise SendError(str(e))
+        except ValueError:
+            raise SendError('Phản hồi không hợp lệ')
+        # Zalo trả về HTTP 200 kèm mã lỗi trong nội dung
+        if payload.get('error', 0) != 0:
+            raise SendError(f"Zalo {payload.get('error')}: {payload.get('message', '')}", retryable=False)
+
+
+class RateLimiter:
+    """
+    Token bucket giới hạn số tin gửi mỗi giây cho một kênh, an toàn khi dùng từ nhiều luồng.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def backoff_delay(attempts, base=30, maximum=3600):
+    """
+    Thời gian chờ trước lần thử tiếp theo (lũy thừa 2, có giới hạn trên).
+    """
+    return timedelta(seconds=min(maximum, base * 2 ** max(0, attempts - 1)))
+
+
+def _due():
+    now = timezone.now()
+    return (
+        Q(status='pending', next_attempt_at__lte=now)
+        # Lô đã nhận nhưng worker chết giữa chừng
+        | Q(status='sending', locked_until__lt=now)
+    )
+
+
+def claim_batch(batch_size, lease=timedelta(minutes=5)):
+    """
+    Nhận một lô tin cần gửi. Mỗi tin chỉ được một worker nhận nhờ claim_token.
+    """
+    ids = list(
+        NotificationOutbox.objects.filter(_due())
+        .order_by('next_attempt_at')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    NotificationOutbox.objects.filter(_due(), pk__in=ids).update(
+        status='sending',
+        claim_token=token,
+        locked_until=timezone.now() + lease,
+    )
+    return list(NotificationOutbox.objects.filter(claim_token=token, status='sending'))
+
+
+def _per_entry(entries, name):
+    field = NotificationOutbox._meta.get_field(name)
+    return Case(
+        *(When(pk=entry.pk, then=Value(getattr(entry, name), output_field=field)) for entry in entries),
+        output_field=field,
+    )
+
+
+class Dispatcher:
+    """
+    Gửi các tin trong outbox bằng một pool luồng, giới hạn tốc độ theo kênh và thử lại có backoff.
+    """
+
+    def __init__(self, clients=None, rate_limits=None, workers=8, batch_size=100, max_attempts=None):
+        self.clients = clients or {'zalo': ZaloClient()}
+        rate_limits = rate_limits or settings.NOTIFICATION_RATE_LIMITS
+        self.limiters = {provider: RateLimiter(rate) for provider, rate in rate_limits.items()}
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='outbox')
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts or settings.NOTIFICATION_MAX_ATTEMPTS
+
+    def _send(self, entry):
+        limiter = self.limiters.get(entry.provider)
+        if limiter:
+            limiter.acquire()
+        try:
+            self.clients[entry.provider].send(entry)
+        except SendError as e:
+            return e
+        except Exception as e:
+            logger.exception('Lỗi không mong đợi khi gửi tin %s', entry.idempotency_key)
+            return SendError(str(e))
+        return None
+
+    def dispatch_once(self):
+        """
+        Gửi một lô; trả về số tin đã xử lý.
+        """
+        entries = claim_batch(self.batch_size)
+        if not entries:
+            return 0
+        token = entries[0].claim_token
+        errors = list(self.pool.map(self._send, entries))
+
+        now = timezone.now()
+        sent_ids = []
+        failed = []
+        for entry, error in zip(entries, errors):
+            if error is None:
+                sent_ids.append(entry.pk)
+                continue
+            entry.attempts += 1
+            entry.last_error = str(error)[:1000]
+            entry.claim_token = ''
+            entry.locked_until = None
+            if not error.retryable or entry.attempts >= self.max_attempts:
+                entry.status = 'failed'
+            else:
+                entry.status = 'pending'
+                entry.next_attempt_at = now + backoff_delay(entry.attempts)
+            failed.append(entry)
+
+        # Chỉ cập nhật các tin vẫn thuộc lô của worker này: khi hết hạn giữ, worker khác có thể đã nhận lại
+        mine = NotificationOutbox.objects.filter(claim_token=token, status='sending')
+        if sent_ids:
+            mine.filter(pk__in=sent_ids).update(
+                status='sent', sent_at=now, claim_token='', locked_until=None, last_error='',
+            )
+        if failed:
+            # Như bulk_update nhưng trong một lệnh UPDATE có điều kiện claim_token
+            mine.filter(pk__in=[entry.pk for entry in failed]).update(**{
+                name: _per_entry(failed, name)
+                for name in ('status', 'attempts', 'next_attempt_at', 'last_error', 'claim_token', 'locked_until')
+            })
+        logger.info('Outbox: %d đã gửi, %d lỗi', len(sent_ids), len(failed))
+        return len(entries)
+
+    def close(self):
+        self.pool.shutdown(wait=True)
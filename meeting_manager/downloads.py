@@ -0,0 +1,163 @@
+import mimetypes
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+#Chỉ các kiểu này được mở trực tiếp trên trình duyệt; tên tệp do người tải lên đặt nên các kiểu có thể chạy
+#script (HTML, SVG, XML...) luôn được tải về
+INLINE_TYPES = {
+    'application/pdf',
+    'image/png',
+    'image/jpeg',
+    'image/gif',
+    'image/webp',
+    'image/bmp',
+}
+INLINE_TYPE_PREFIXES = ('video/', 'audio/')
+
+
+def inline_type(name):
+    """
+    Content-Type an toàn để mở trực tiếp tệp `name`, None nếu tệp phải được tải về.
+    """
+    content_type, encoding = mimetypes.guess_type(name)
+    if not content_type or encoding:
+        return None
+    if content_type in INLINE_TYPES or content_type.startswith(INLINE_TYPE_PREFIXES):
+        return content_type
+    return None
+
+
+class _RangeFile:
+    """
+    Đọc tối đa `length` byte của tệp kể từ `start`, dùng làm nội dung cho FileResponse.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    (start, end) của một khoảng byte trong header Range, None nếu không có hoặc không hỗ trợ
+    (nhiều khoảng, đơn vị khác), False nếu khoảng nằm ngoài tệp.
+    """
+    match = _RANGE_RE.match(header.replace(' ', '')) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # bytes=-N: N byte cuối
+        length = int(last)
+        if length == 0 or size == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def file_state(meeting_file):
+    """
+    (ETag, Last-Modified, kích thước) của tệp đính kèm, không cần mở tệp.
+    """
+    if meeting_file.blob_id:
+        blob = meeting_file.blob
+        return f'"{blob.sha256}"', meeting_file.uploaded_at, blob.size
+    storage, name = meeting_file.file.storage, meeting_file.file.name
+    size = storage.size(name)
+    try:
+        modified = storage.get_modified_time(name)
+    except NotImplementedError:
+        modified = meeting_file.uploaded_at
+    return f'"{meeting_file.pk}-{size}-{int(modified.timestamp())}"', modified, size
+
+
+def _offload_response(meeting_file):
+    response = HttpResponse()
+    name = meeting_file.file.name
+    if settings.MEETING_FILE_OFFLOAD == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.MEETING_FILE_ACCEL_PREFIX.rstrip('/') + '/' + quote(name)
+    else:
+        response['X-Sendfile'] = meeting_file.file.path
+    # Để web server tự xác định Content-Type và xử lý Range
+    del response['Content-Type']
+    return response
+
+
+def file_response(request, meeting_file, as_attachment=True):
+    """
+    Gửi tệp đính kèm: 304 khi ETag/Last-Modified khớp, 206 cho yêu cầu Range, ngược lại toàn bộ tệp.
+    Nội dung được đọc theo từng khối (hoặc do web server gửi), không nạp cả tệp vào bộ nhớ.
+    """
+    content_type = None if as_attachment else inline_type(meeting_file.name)
+    as_attachment = content_type is None
+    etag, last_modified, size = file_state(meeting_file)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified.timestamp())
+    if response is None:
+        if settings.MEETING_FILE_OFFLOAD:
+            response = _offload_response(meeting_file)
+            response['Content-Disposition'] = content_disposition_header(as_attachment, meeting_file.name)
+        else:
+            response = _stream_response(request, meeting_file, etag, size, as_attachment)
+        if content_type and response.status_code in (200, 206):
+            response['Content-Type'] = content_type
+    # Không để trình duyệt đoán kiểu nội dung hay chạy script của tệp trên origin của ứng dụng
+    response['X-Content-Type-Options'] = 'nosniff'
+    response['Content-Security-Policy'] = 'sandbox'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _stream_response(request, meeting_file, etag, size, as_attachment):
+    byte_range = parse_range(request.headers.get('Range'), size)
+    if_range = request.headers.get('If-Range')
+    if byte_range is not None and if_range and if_range != etag:
+        # Tệp đã đổi so với phần máy khách đang có: gửi lại toàn bộ
+        byte_range = None
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = meeting_file.file.storage.open(meeting_file.file.name, 'rb')
+    if byte_range is None:
+        # FileResponse dùng wsgi.file_wrapper (sendfile của máy chủ WSGI) khi có thể
+        response = FileResponse(file, as_attachment=as_attachment, filename=meeting_file.name)
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            _RangeFile(file, start, end - start + 1),
+            status=206, as_attachment=as_attachment, filename=meeting_file.name,
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import re
+import zipfile
+
+from django.db.models import Prefetch
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import MeetingFile, MeetingMinutes, MeetingParticipant
+
+#Tệp đã nén sẵn được lưu nguyên (ZIP_STORED) để không tốn CPU vô ích
+COMPRESSED_EXTENSIONS = {
+    '.zip', '.rar', '.7z', '.gz', '.jpg', '.jpeg', '.png', '.gif', '.webp', '.mp3', '.mp4', '.m4a', '.mov',
+    '.avi', '.mkv', '.pdf', '.docx', '.xlsx', '.pptx', '.odt', '.ods', '.odp',
+}
+
+_UNSAFE_RE = re.compile(r'[\\/:*?"<>|\x00-\x1f]+')
+
+
+class _Sink:
+    """
+    Đích ghi của ZipFile, không seek được: giữ các byte vừa ghi cho tới khi generator lấy ra.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _info(path, date_time):
+    info = zipfile.ZipInfo(path, date_time=date_time)
+    # Quyền rw-r--r-- khi giải nén
+    info.external_attr = 0o100644 << 16
+    return info
+
+
+def _safe_name(value, limit=80):
+    value = _UNSAFE_RE.sub('_', value or '').strip(' .')
+    return value[:limit] or '_'
+
+
+def _unique(name, used):
+    base, ext = os.path.splitext(name)
+    candidate, n = name, 1
+    while candidate in used:
+        n += 1
+        candidate = f"{base} ({n}){ext}"
+    used.add(candidate)
+    return candidate
+
+
+def export_queryset(meetings):
+    """
+    Nạp sẵn thành phần tham dự, biên bản và tệp đính kèm cho các cuộc họp cần xuất.
+    """
+    return meetings.select_related('host', 'preparation', 'minutes__created_by').prefetch_related(
+        Prefetch(
+            'meeting_participants',
+            queryset=MeetingParticipant.objects.select_related('user', 'department', 'organization').order_by('pk'),
+        ),
+        Prefetch('files', queryset=MeetingFile.objects.select_related('blob').order_by('pk')),
+    ).order_by('date', 'time', 'pk')
+
+
+def _meeting_data(meeting, participants, minutes):
+    return {
+        'id': meeting.pk,
+        'meeting_number': meeting.meeting_number,
+        'title': meeting.title,
+        'date': meeting.date.isoformat(),
+        'time': meeting.time.isoformat() if meeting.time else None,
+        'duration': meeting.duration,
+        'location': meeting.location,
+        'status': meeting.status,
+        'host': meeting.host.get_full_name() or meeting.host.username,
+        'preparation': (meeting.preparation.get_full_name() or meeting.preparation.username) if meeting.preparation else None,
+        'participants': [
+            {
+                'type': participant.participant_type,
+                'user_id': participant.user_id,
+                'department_id': participant.department_id,
+                'organization_id': participant.organization_id,
+                'name': str(participant),
+                'is_required': participant.is_required,
+                'attended': participant.attended,
+            }
+            for participant in participants
+        ],
+        'minutes_version': minutes.version if minutes else None,
+    }
+
+
+def _file_chunks(meeting_file):
+    with meeting_file.file.storage.open(meeting_file.file.name, 'rb') as file:
+        yield from file.chunks()
+
+
+def _file_size(meeting_file):
+    if meeting_file.blob_id:
+        return meeting_file.blob.size
+    return meeting_file.file.storage.size(meeting_file.file.name)
+
+
+def _entries(meeting, folder):
+    """
+    Sinh (đường dẫn trong ZIP, các khối dữ liệu, kích thước dự kiến, có nén hay không) cho một cuộc họp.
+    """
+    participants = list(meeting.meeting_participants.all())
+    try:
+        minutes = meeting.minutes
+    except MeetingMinutes.DoesNotExist:
+        minutes = None
+
+    used = set()
+    files = []
+    for meeting_file in meeting.files.all():
+        name = _unique(_safe_name(meeting_file.name, 150), used)
+        files.append((f"{folder}/tep_dinh_kem/{name}", meeting_file, _file_size(meeting_file)))
+
+    summary = render_to_string('meeting_manager/meeting_export_summary.html', {
+        'meeting': meeting,
+        'participants': participants,
+        'attended': sum(1 for participant in participants if participant.attended),
+        'minutes': minutes,
+        'files': [{'path': path.split('/', 1)[1], 'size': size} for path, _, size in files],
+    }).encode()
+    yield f"{folder}/tom_tat.html", [summary], len(summary), True
+    data = json.dumps(_meeting_data(meeting, participants, minutes), ensure_ascii=False, indent=2).encode()
+    yield f"{folder}/du_lieu.json", [data], len(data), True
+    if minutes:
+        content = minutes.content.encode()
+        yield f"{folder}/bien_ban.txt", [content], len(content), True
+    for path, meeting_file, size in files:
+        ext = os.path.splitext(path)[1].lower()
+        yield path, _file_chunks(meeting_file), size, ext not in COMPRESSED_EXTENSIONS
+
+
+def stream_zip(meetings):
+    """
+    Sinh lần lượt các khối byte của tệp ZIP hồ sơ các cuộc họp. Mỗi tệp đính kèm được đọc và nén
+    theo từng khối nên không cần tệp tạm và bộ nhớ dùng không phụ thuộc kích thước tệp.
+    Cuối ZIP có manifest.json và SHA256SUMS với mã băm của từng tệp.
+    """
+    sink = _Sink()
+    now = timezone.localtime()
+    date_time = now.timetuple()[:6]
+    manifest = {'generated_at': now.isoformat(), 'meetings': [], 'files': []}
+    used_folders = set()
+
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for meeting in meetings:
+            folder = _unique(_safe_name(f"{meeting.meeting_number or meeting.pk} - {meeting.title}"), used_folders)
+            manifest['meetings'].append({'id': meeting.pk, 'meeting_number': meeting.meeting_number, 'folder': folder})
+            for path, chunks, size, compress in _entries(meeting, folder):
+                info = _info(path, date_time)
+                info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+                info.file_size = size
+                hasher = hashlib.sha256()
+                written = 0
+                with archive.open(info, 'w') as entry:
+                    for chunk in chunks:
+                        hasher.update(chunk)
+                        written += len(chunk)
+                        entry.write(chunk)
+                        data = sink.take()
+                        if data:
+                            yield data
+                manifest['files'].append({'path': path, 'size': written, 'sha256': hasher.hexdigest()})
+                yield sink.take()
+
+        archive.writestr(
+            _info('manifest.json', date_time),
+            json.dumps(manifest, ensure_ascii=False, indent=2),
+            compress_type=zipfile.ZIP_DEFLATED,
+        )
+        archive.writestr(
+            _info('SHA256SUMS', date_time),
+            ''.join(f"{item['sha256']}  {item['path']}\n" for item in manifest['files']),
+            compress_type=zipfile.ZIP_DEFLATED,
+        )
+    yield sink.take()
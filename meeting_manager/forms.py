@@ -1,7 +1,37 @@
 from django import forms
-from .models import Department, Organization, Meeting, MeetingParticipant, MeetingFile, UserAffiliation
+from django.db import transaction
+from django.urls import reverse_lazy
+from django.utils import timezone
+from .models import AttendanceRollup, Department, Organization, Meeting, MeetingParticipant, MeetingFile, UserAffiliation
 from django.contrib.auth.models import User
 from datetime import date as dt_date, time as dt_time
+from .conflicts import CANCELLED, conflict_messages, find_conflicts
+from .membership import resolve_user_ids
+from .autocomplete import user_label
+from . import fragments, ical, rollups
+
+def add_conflict_errors(form, cleaned_data, attendee_ids=None):
+    """
+    Báo lỗi khi chủ trì, người chuẩn bị hoặc người tham dự đã có cuộc họp khác trùng giờ.
+    """
+    date = cleaned_data.get('date')
+    time = cleaned_data.get('time')
+    status = cleaned_data.get('status') or form.instance.status
+    if not date or not time or status == CANCELLED:
+        return
+    host = cleaned_data.get('host')
+    preparation = cleaned_data.get('preparation')
+    meeting = Meeting(
+        pk=form.instance.pk,
+        date=date,
+        time=time,
+        duration=cleaned_data.get('duration') or form.instance.duration,
+        host_id=host.pk if host else None,
+        preparation_id=preparation.pk if preparation else None,
+        status=status,
+    )
+    for message in conflict_messages(find_conflicts(meeting, attendee_ids)):
+        form.add_error(None, message)
 
 #Form cho ngày
 class DateInput(forms.DateInput):
@@ -11,6 +41,37 @@ class DateInput(forms.DateInput):
 class TimeInput(forms.TimeInput):
     input_type = 'time'
 
+#Ô chọn gợi ý: chỉ render các lựa chọn đang được chọn, danh sách còn lại tải qua `url` khi gõ
+class AutocompleteSelect(forms.Select):
+    def __init__(self, url, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+
+    class Media:
+        js = ['meeting_manager/js/autocomplete.js']
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = str(self.url)
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        selected = {str(v) for v in value if v not in (None, '')}
+        options = []
+        if field.empty_label is not None:
+            options.append(('', field.empty_label))
+        if selected:
+            # Chỉ truy vấn các id đang được chọn thay vì toàn bộ queryset
+            options += [
+                (str(field.prepare_value(obj)), field.label_from_instance(obj))
+                for obj in field.queryset.filter(pk__in=selected)
+            ]
+        return [
+            (None, [self.create_option(name, option_value, label, option_value in selected, index, attrs=attrs)], index)
+            for index, (option_value, label) in enumerate(options)
+        ]
+
 #Form cho Khoa/Phòng
 class DepartmentForm(forms.ModelForm):
     class Meta:
@@ -50,6 +111,7 @@ class MeetingForm(forms.ModelForm):
             'title',
             'date',
             'time',
+            'duration',
             'preparation',
             'host',
             'location',
@@ -60,22 +122,26 @@ class MeetingForm(forms.ModelForm):
             'title': forms.TextInput(attrs={'class': 'form-control','placeholder': 'Nhập tiêu đề cuộc họp'}),
             'date': DateInput(attrs={'class': 'form-control','placeholder': 'Chọn ngày'}),
             'time': TimeInput(attrs={'class': 'form-control','placeholder': 'Chọn giờ'}),
-            'preparation': forms.Select(attrs={'class': 'form-control', 'placeholder': 'Chọn người chuẩn bị'}),
-            'host': forms.Select(attrs={'class': 'form-control', 'placeholder': 'Chọn người chủ trì'}),
+            'duration': forms.NumberInput(attrs={'class': 'form-control', 'min': 1, 'placeholder': 'Số phút'}),
+            'preparation': AutocompleteSelect(reverse_lazy('autocomplete_users'), attrs={'class': 'form-control', 'placeholder': 'Chọn người chuẩn bị'}),
+            'host': AutocompleteSelect(reverse_lazy('autocomplete_users'), attrs={'class': 'form-control', 'placeholder': 'Chọn người chủ trì'}),
             'location': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Nhập địa điểm'}),
             'status': forms.Select(attrs={'class': 'form-control', 'placeholder': 'Chọn trạng thái'}),
         }
         
     def __init__(self, *args, **kwargs):
         super().__init__(*args,**kwargs)
-        # Lấy danh sách user cho preparation và host
+        # Lấy danh sách user cho preparation và host (chỉ dùng để kiểm tra id được gửi lên)
         self.fields['preparation'].queryset = User.objects.all()
         self.fields['host'].queryset = User.objects.all()
+        self.fields['preparation'].label_from_instance = user_label
+        self.fields['host'].label_from_instance = user_label
         # Thêm các label tiếng việt
         self.fields['meeting_number'].label = 'Số cuộc họp'
         self.fields['title'].label = 'Nội dung'
         self.fields['date'].label = 'Ngày họp'
         self.fields['time'].label = 'Thời gian'
+        self.fields['duration'].label = 'Thời lượng (phút)'
         self.fields['preparation'].label = 'Người chuẩn bị'
         self.fields['host'].label = 'Chủ trì'
         self.fields['location'].label = 'Địa điểm'
@@ -105,8 +171,22 @@ class MeetingForm(forms.ModelForm):
         elif participant_type == 'organization' and not organization:
             self.add_error('organization', 'Vui lòng chọn Ban/Ngành tham dự.')
 
+        if not self.errors:
+            self.check_conflicts(cleaned_data)
+
         return cleaned_data
 
+    def check_conflicts(self, cleaned_data):
+        add_conflict_errors(self, cleaned_data)
+
+    def save(self, commit=True):
+        instance = super().save(commit=False)
+        if commit:
+            # Trùng lịch đã được kiểm tra trong clean()
+            instance.save(check_conflicts=False)
+            self._save_m2m()
+        return instance
+
 #Form cho MeetingParticipant
 class MeetingParticipantForm(forms.ModelForm):
     class Meta:
@@ -122,9 +202,9 @@ class MeetingParticipantForm(forms.ModelForm):
         
         widgets = {
             'participant_type': forms.Select(attrs={'class':'form-control','placeholder':'Chọn loại thành phần tham dự'}),
-            'user': forms.Select(attrs={'class':'form-control','placeholder':'Chọn cá nhân tham dự'}),
-            'department': forms.Select(attrs={'class':'form-control','placeholder':'Chọn Khoa / Phòng tham dự'}),
-            'organization': forms.Select(attrs={'class':'form-control','placeholder':'Chọn Ban/Ngành tham dự'}),
+            'user': AutocompleteSelect(reverse_lazy('autocomplete_users'), attrs={'class':'form-control','placeholder':'Chọn cá nhân tham dự'}),
+            'department': AutocompleteSelect(reverse_lazy('autocomplete_departments'), attrs={'class':'form-control','placeholder':'Chọn Khoa / Phòng tham dự'}),
+            'organization': AutocompleteSelect(reverse_lazy('autocomplete_organizations'), attrs={'class':'form-control','placeholder':'Chọn Ban/Ngành tham dự'}),
             'is_required': forms.CheckboxInput(attrs={'class':'form-check-input'}),
         }
     
@@ -132,6 +212,7 @@ class MeetingParticipantForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         # Lấy danh sách user cho trường user
         self.fields['user'].queryset = User.objects.all()
+        self.fields['user'].label_from_instance = user_label
         # Lấy danh sách department cho trường department
         self.fields['department'].queryset = Department.objects.all()
         # Lấy danh sách organization cho trường organization
@@ -161,29 +242,116 @@ class MeetingWithParticipantsForm(forms.ModelForm):
             'title',
             'date',
             'time',
+            'duration',
             'preparation',
             'host',
             'location',
             'status',
         ]
+        widgets = {
+            'preparation': AutocompleteSelect(reverse_lazy('autocomplete_users')),
+            'host': AutocompleteSelect(reverse_lazy('autocomplete_users')),
+        }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.fields['preparation'].label_from_instance = user_label
+        self.fields['host'].label_from_instance = user_label
         self.participant_formset = MeetingParticipantFormSet(
             instance = self.instance,
             data = self.data if self.is_bound else None,
             files = self.files if self.is_bound else None,
         )
+
+    @property
+    def media(self):
+        return super().media + self.participant_formset.media
     def is_valid(self):
-        return super().is_valid() and self.participant_formset.is_valid()
+        if not (super().is_valid() and self.participant_formset.is_valid()):
+            return False
+        add_conflict_errors(self, self.cleaned_data, self.submitted_attendee_ids())
+        return not self.errors
+
+    def submitted_attendee_ids(self):
+        """
+        Người tham dự thực tế theo dữ liệu formset vừa gửi (chưa lưu).
+        """
+        rows = []
+        for form in self.participant_formset.forms:
+            data = getattr(form, 'cleaned_data', None)
+            if not data or data.get('DELETE'):
+                continue
+            rows.append(tuple(
+                data[field].pk if data.get(field) else None
+                for field in ('user', 'department', 'organization')
+            ))
+        return resolve_user_ids(rows)
     def save(self, commit=True):
         instance = super().save(commit=False)
         if commit:
-            instance.save()
-            self.participant_formset.instance = instance
-            self.participant_formset.save()
+            with transaction.atomic():
+                # Trùng lịch đã được kiểm tra trong is_valid() cùng thành phần tham dự vừa gửi
+                instance.save(check_conflicts=False)
+                self.save_participants(instance)
         return instance
 
+    def save_participants(self, meeting):
+        """
+        Ghi thay đổi thành phần tham dự theo lô: một bulk_create, một bulk_update và một lệnh DELETE.
+        Các dòng không thay đổi không bị ghi lại.
+        """
+        formset = self.participant_formset
+        formset.instance = meeting
+        model_fields = {field.name for field in MeetingParticipant._meta.concrete_fields}
+        now = timezone.now()
+        new, changed, deleted = [], [], []
+        changed_fields = set()
+        for form in formset.initial_forms:
+            if form.instance.pk is None:
+                continue
+            if form.cleaned_data.get('DELETE'):
+                deleted.append(form.instance)
+            elif form.has_changed():
+                # construct_instance đã chép dữ liệu mới vào form.instance khi kiểm tra hợp lệ
+                form.instance.updated_at = now
+                changed.append((form.instance, form.changed_data))
+                changed_fields.update(name for name in form.changed_data if name in model_fields)
+        for form in formset.extra_forms:
+            if not form.has_changed() or form.cleaned_data.get('DELETE'):
+                continue
+            participant = form.instance
+            participant.meeting = meeting
+            if participant.created_by_id is None:
+                participant.created_by_id = meeting.created_by_id
+            new.append(participant)
+
+        with transaction.atomic():
+            if deleted:
+                MeetingParticipant.objects.filter(meeting=meeting, pk__in=[p.pk for p in deleted]).delete()
+            if changed and changed_fields:
+                MeetingParticipant.objects.bulk_update(
+                    [participant for participant, _ in changed], sorted(changed_fields | {'updated_at'}),
+                )
+            if new:
+                MeetingParticipant.objects.bulk_create(new)
+            # bulk_update/bulk_create không phát tín hiệu nên tự cập nhật bảng tổng hợp tham dự và cache trang
+            saved = [participant for participant, _ in changed] + new
+            rollups.record_participants(
+                [participant._rollup_original for participant, _ in changed],
+                [rollups.participant_state(participant) for participant in saved],
+            )
+            for participant in saved:
+                participant._rollup_original = rollups.participant_state(participant)
+            fragments.invalidate()
+            ical.invalidate_participants(
+                [participant._feed_original for participant, _ in changed]
+                + [(p.user_id, p.department_id, p.organization_id) for p in saved + deleted]
+            )
+        # Giữ các thuộc tính như BaseModelFormSet.save() để mã gọi phía sau vẫn dùng được
+        formset.new_objects = new
+        formset.changed_objects = changed
+        formset.deleted_objects = deleted
+
 #Form lọc cuộc họp
 class MeetingFilterForm(forms.Form):
     title = forms.CharField(
@@ -211,7 +379,7 @@ class MeetingFilterForm(forms.Form):
     search = forms.CharField(
         label='Tìm kiếm',
         required=False,
-        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Tìm kiếm theo số, tiêu đề hoặc người chủ trì'})
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Tìm kiếm theo số, tiêu đề, địa điểm, người chủ trì hoặc biên bản'})
     )
 
 #Form cho File đính kèm cuộc họp 
@@ -229,4 +397,41 @@ class MeetingFileForm(forms.ModelForm):
         
 
         
-        
\ No newline at end of file
+        
+#Form chọn đối tượng và khoảng ngày cho báo cáo tỷ lệ tham dự
+class AttendanceReportForm(forms.Form):
+    kind = forms.ChoiceField(
+        label='Theo',
+        choices=AttendanceRollup.KIND_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    date_from = forms.DateField(
+        label='Từ ngày',
+        required=False,
+        widget=DateInput(attrs={'class': 'form-control', 'placeholder': 'Mặc định: đầu năm'})
+    )
+    date_to = forms.DateField(
+        label='Đến ngày',
+        required=False,
+        widget=DateInput(attrs={'class': 'form-control', 'placeholder': 'Mặc định: hôm nay'})
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        today = timezone.localdate()
+        cleaned_data['kind'] = cleaned_data.get('kind') or 'department'
+        cleaned_data['date_from'] = cleaned_data.get('date_from') or today.replace(month=1, day=1)
+        cleaned_data['date_to'] = cleaned_data.get('date_to') or today
+        if cleaned_data['date_from'] > cleaned_data['date_to']:
+            raise forms.ValidationError('Ngày bắt đầu phải trước ngày kết thúc.')
+        return cleaned_data
+
+#Form nhập hàng loạt cuộc họp từ tệp CSV/XLSX
+class MeetingImportForm(forms.Form):
+    file = forms.FileField(
+        label='Tệp CSV/XLSX',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control-file', 'accept': '.csv,.xlsx'})
+    )
+    notify = forms.BooleanField(label='Gửi thông báo cho người được mời', required=False, initial=True)
+    dry_run = forms.BooleanField(label='Chỉ kiểm tra, không ghi dữ liệu', required=False)
@@ -0,0 +1,89 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.safestring import mark_safe
+
+#Thời gian giữ đoạn HTML đã tạo trong cache (khoá đã bao gồm phiên bản nên không bị cũ)
+FRAGMENT_CACHE_TIMEOUT = 3600
+
+VERSION_KEY = 'fragments:version'
+
+
+def version():
+    """
+    Phiên bản dữ liệu cuộc họp, đổi mỗi khi cuộc họp, thành phần tham dự, tệp đính kèm hoặc biên bản thay đổi.
+    """
+    value = cache.get(VERSION_KEY)
+    if value is None:
+        # Phiên bản không bao giờ lặp lại, kể cả khi khoá bị cache loại bỏ
+        value = time.time_ns()
+        if not cache.add(VERSION_KEY, value, None):
+            value = cache.get(VERSION_KEY, value)
+    return value
+
+
+async def aversion():
+    """
+    Bản bất đồng bộ của version().
+    """
+    value = await cache.aget(VERSION_KEY)
+    if value is None:
+        value = time.time_ns()
+        if not await cache.aadd(VERSION_KEY, value, None):
+            value = await cache.aget(VERSION_KEY, value)
+    return value
+
+
+def _bump():
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def invalidate():
+    """
+    Đổi phiên bản sau khi giao dịch hiện tại commit (một lần cho mỗi giao dịch), để request khác
+    không lưu dữ liệu cũ dưới phiên bản mới.
+    """
+    connection = transaction.get_connection()
+    if connection.in_atomic_block and any(func is _bump for _, func, _ in connection.run_on_commit):
+        return
+    transaction.on_commit(_bump)
+
+
+def fragment_state(name, *parts):
+    """
+    (khoá cache, ETag) của đoạn HTML `name` với các tham số đã chuẩn hoá `parts` ở phiên bản hiện tại.
+    """
+    return _state(version(), name, parts)
+
+
+async def afragment_state(name, *parts):
+    return _state(await aversion(), name, parts)
+
+
+def _state(current, name, parts):
+    digest = hashlib.sha1(repr((current, name, parts)).encode()).hexdigest()
+    return f"fragments:{name}:{digest}", f'"{digest}"'
+
+
+def cached_fragment(key, render):
+    """
+    Đoạn HTML từ cache; chỉ gọi `render()` (truy vấn và dựng template) khi cache chưa có.
+    """
+    html = cache.get(key)
+    if html is None:
+        html = render()
+        cache.set(key, str(html), FRAGMENT_CACHE_TIMEOUT)
+    return mark_safe(html)
+
+
+async def acached_fragment(key, render):
+    """
+    Bản bất đồng bộ của cached_fragment; `render` là hàm async.
+    """
+    html = await cache.aget(key)
+    if html is None:
+        html = await render()
+        await cache.aset(key, str(html), FRAGMENT_CACHE_TIMEOUT)
+    return mark_safe(html)
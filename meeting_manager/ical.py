@@ -0,0 +1,231 @@
+import hashlib
+import time
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.urls import reverse
+from django.utils import timezone
+
+from .membership import effective_attendee_map, resolve_user_ids, user_groups
+from .models import Meeting, MeetingParticipant
+
+#Chỉ đưa vào lịch các cuộc họp từ khoảng này trở lại đây
+FEED_HISTORY = timedelta(days=90)
+#Thời gian giữ nội dung lịch đã tạo trong cache (khoá đã bao gồm ETag nên không bị cũ)
+FEED_CACHE_TIMEOUT = 24 * 3600
+
+USER = 'user'
+DEPARTMENT = 'department'
+
+GENERATION_KEY = 'ical:generation'
+
+_signer = signing.Signer(salt='meeting_manager.ical')
+
+
+def feed_token(kind, pk):
+    return _signer.sign(f"{kind}-{pk}")
+
+
+def feed_url(kind, pk):
+    return reverse(f'ical_{kind}_feed', args=[feed_token(kind, pk)])
+
+
+def parse_token(kind, token):
+    """
+    Trả về id trong token nếu chữ ký hợp lệ và đúng loại lịch, ngược lại None.
+    """
+    try:
+        value = _signer.unsign(token)
+    except signing.BadSignature:
+        return None
+    token_kind, _, pk = value.partition('-')
+    if token_kind != kind or not pk.isdigit():
+        return None
+    return int(pk)
+
+
+def feed_meetings(kind, pk):
+    """
+    Các cuộc họp thuộc lịch của một người dùng (chủ trì, chuẩn bị, tham dự trực tiếp
+    hoặc qua Khoa/Phòng, Tổ chức) hoặc của một Khoa/Phòng.
+    """
+    since = timezone.localdate() - FEED_HISTORY
+    participants = MeetingParticipant.objects.filter(meeting=OuterRef('pk'))
+    if kind == USER:
+        departments, organizations = user_groups(pk)
+        participants = participants.filter(
+            Q(user_id=pk) | Q(department_id__in=departments) | Q(organization_id__in=organizations)
+        )
+        condition = Q(host_id=pk) | Q(preparation_id=pk) | Exists(participants)
+    else:
+        condition = Exists(participants.filter(department_id=pk))
+    return Meeting.objects.filter(condition, date__gte=since)
+
+
+def _version_key(kind, pk):
+    return f"ical:version:{kind}:{pk}"
+
+
+def _versions(keys):
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Phiên bản là thời điểm thay đổi (ns) và không bao giờ lặp lại, kể cả khi khoá bị cache loại bỏ
+            version = time.time_ns()
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+            found[key] = version
+    return [found[key] for key in keys]
+
+
+def feed_state(kind, pk):
+    """
+    (ETag, Last-Modified) của lịch, chỉ đọc cache: phiên bản của lịch (đổi khi cuộc họp, thành phần tham dự
+    hoặc Ban/Ngành công tác liên quan thay đổi, kể cả khi bị xoá), phiên bản chung của mọi lịch và ngày hiện tại
+    (lịch chỉ gồm các cuộc họp trong FEED_HISTORY).
+    Last-Modified là None khi lịch vừa đổi trong giây hiện tại: HTTP chỉ so sánh đến giây nên một thay đổi
+    tiếp theo trong cùng giây sẽ bị máy khách chỉ gửi If-Modified-Since bỏ lỡ.
+    """
+    today = timezone.localdate()
+    generation, version = _versions([GENERATION_KEY, _version_key(kind, pk)])
+    fingerprint = f"{generation}|{version}|{today}"
+    changed = datetime.fromtimestamp(max(generation, version) / 1e9, tz=dt_timezone.utc)
+    last_modified = max(changed, timezone.make_aware(datetime.combine(today, dt_time.min)))
+    if last_modified > timezone.now() - timedelta(seconds=1):
+        last_modified = None
+    return f'"{hashlib.sha1(fingerprint.encode()).hexdigest()}"', last_modified
+
+
+def _bump(keys):
+    if keys:
+        transaction.on_commit(lambda: cache.set_many({key: time.time_ns() for key in keys}, None))
+
+
+def invalidate_feeds(users=(), departments=()):
+    """
+    Đổi phiên bản lịch của các người dùng và Khoa/Phòng sau khi giao dịch hiện tại commit.
+    """
+    _bump(
+        [_version_key(USER, pk) for pk in set(users) if pk]
+        + [_version_key(DEPARTMENT, pk) for pk in set(departments) if pk]
+    )
+
+
+def invalidate_participants(rows):
+    """
+    Đổi phiên bản lịch của những người và Khoa/Phòng trong các bộ (user_id, department_id, organization_id)
+    của thành phần tham dự được thêm, sửa hoặc xoá.
+    """
+    rows = list(rows)
+    invalidate_feeds(resolve_user_ids(rows), [department_id for _, department_id, _ in rows])
+
+
+def invalidate_meetings(meeting_ids, users=()):
+    """
+    Đổi phiên bản lịch có chứa các cuộc họp `meeting_ids`: người chủ trì, người chuẩn bị, người tham dự
+    thực tế và các Khoa/Phòng được mời; `users` là những người liên quan trước khi thay đổi.
+    """
+    meeting_ids = list(meeting_ids)
+    users = set(users)
+    for host_id, preparation_id in Meeting.objects.filter(pk__in=meeting_ids).values_list('host_id', 'preparation_id'):
+        users.update((host_id, preparation_id))
+    for attendees in effective_attendee_map(meeting_ids).values():
+        users |= attendees
+    departments = MeetingParticipant.objects.filter(
+        meeting_id__in=meeting_ids, department_id__isnull=False,
+    ).values_list('department_id', flat=True)
+    invalidate_feeds(users, departments)
+
+
+def invalidate_all():
+    """
+    Đổi phiên bản chung của mọi lịch, dùng khi thay đổi quá rộng để tính từng lịch (đổi tên người chủ trì,
+    chuyển trạng thái hàng loạt).
+    """
+    _bump([GENERATION_KEY])
+
+
+def _escape(value):
+    return (
+        (value or '')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    # Dòng iCalendar không quá 75 octet, dòng tiếp theo bắt đầu bằng khoảng trắng
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    while encoded:
+        size = 75 if not parts else 74
+        while size < len(encoded) and (encoded[size] & 0xC0) == 0x80:
+            size -= 1
+        parts.append(encoded[:size].decode())
+        encoded = encoded[size:]
+    return '\r\n '.join(parts)
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _event(meeting):
+    lines = [
+        'BEGIN:VEVENT',
+        f"UID:meeting-{meeting.pk}@meetly",
+        f"DTSTAMP:{_utc(meeting.updated_at)}",
+    ]
+    if meeting.time:
+        lines += [f"DTSTART:{_utc(meeting.starts_at)}", f"DTEND:{_utc(meeting.ends_at)}"]
+    else:
+        lines += [
+            f"DTSTART;VALUE=DATE:{meeting.date:%Y%m%d}",
+            f"DTEND;VALUE=DATE:{meeting.date + timedelta(days=1):%Y%m%d}",
+        ]
+    lines += [
+        f"SUMMARY:{_escape(f'{meeting.meeting_number} - {meeting.title}')}",
+        f"STATUS:{'CANCELLED' if meeting.status == Meeting.CANCELLED else 'CONFIRMED'}",
+    ]
+    if meeting.location:
+        lines.append(f"LOCATION:{_escape(meeting.location)}")
+    host = meeting.host.get_full_name() or meeting.host.username
+    lines.append(f"DESCRIPTION:{_escape(f'Chủ trì: {host}. Trạng thái: {meeting.status}')}")
+    lines.append('END:VEVENT')
+    return lines
+
+
+def render_feed(meetings, name):
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Meetly//Lich hop//VI',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f"X-WR-CALNAME:{_escape(name)}",
+        'X-WR-TIMEZONE:Asia/Ho_Chi_Minh',
+    ]
+    for meeting in meetings.select_related('host').order_by('date', 'time', 'pk').iterator(chunk_size=500):
+        lines.extend(_event(meeting))
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
+
+
+def cached_feed(kind, pk, etag, meetings, name):
+    """
+    Nội dung lịch từ cache theo ETag; khi lịch đổi phiên bản, ETag đổi nên nội dung được tạo lại.
+    """
+    key = f"ical:{kind}:{pk}:{etag.strip(chr(34))}"
+    body = cache.get(key)
+    if body is None:
+        body = render_feed(meetings, name)
+        cache.set(key, body, FEED_CACHE_TIMEOUT)
+    return body
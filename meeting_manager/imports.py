@@ -0,0 +1,492 @@
+import csv
+import io
+import itertools
+import os
+import re
+from contextlib import nullcontext
+from datetime import date, datetime, time
+
+from django import forms
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from . import fragments, ical, reminders, rollups, search
+from .conflicts import CANCELLED, find_schedule_conflicts, involving
+from .forms import MeetingForm
+from .membership import department_members, effective_attendee_map, organization_members
+from .models import Department, Meeting, MeetingParticipant, Organization
+from .notifications import notify_many
+from .search import normalize_text
+
+#Tên cột chấp nhận được (sau khi bỏ dấu, chữ thường, nối bằng dấu _) cho từng trường
+COLUMNS = {
+    'title': ('tieu_de', 'noi_dung', 'title'),
+    'date': ('ngay', 'ngay_hop', 'date'),
+    'time': ('gio', 'thoi_gian', 'time'),
+    'duration': ('thoi_luong', 'thoi_luong_phut', 'duration'),
+    'host': ('chu_tri', 'host'),
+    'preparation': ('nguoi_chuan_bi', 'chuan_bi', 'preparation'),
+    'location': ('dia_diem', 'location'),
+    'status': ('trang_thai', 'status'),
+    'participant_type': ('loai', 'loai_thanh_phan', 'participant_type'),
+    'participant': ('thanh_phan', 'thanh_phan_tham_du', 'participant'),
+    'is_required': ('bat_buoc', 'bat_buoc_tham_du', 'is_required'),
+    'attended': ('da_tham_du', 'co_mat', 'attended'),
+}
+REQUIRED_COLUMNS = ('title', 'date', 'host')
+#Các cột của cuộc họp: dòng có một trong các cột này bắt đầu cuộc họp mới, các dòng sau chỉ thêm thành phần tham dự
+MEETING_COLUMNS = ('title', 'date', 'time', 'duration', 'host', 'preparation', 'location', 'status')
+
+PARTICIPANT_TYPES = {
+    normalize_text(value): code
+    for code, label in MeetingParticipant.PARTICIPANT_TYPE
+    for value in (code, label)
+}
+PARTICIPANT_FIELDS = {'individual': 'user', 'department': 'department', 'group': 'organization'}
+STATUSES = {normalize_text(value): value for value, _ in Meeting.STATUS_CHOICES}
+TRUE_VALUES = {'x', '1', 'co', 'c', 'yes', 'y', 'true'}
+FALSE_VALUES = {'', '0', 'khong', 'k', 'no', 'n', 'false'}
+
+#Số lỗi tối đa giữ lại trong báo cáo
+MAX_ERRORS = 1000
+
+_HEADER_RE = re.compile(r'\W+')
+
+
+class ImportFileError(Exception):
+    """
+    Tệp không đọc được (sai định dạng, thiếu cột bắt buộc, thiếu openpyxl...).
+    """
+
+
+class ImportReport:
+    """
+    Kết quả nhập: số cuộc họp, thành phần tham dự đã ghi và lỗi theo từng dòng của tệp.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.meetings = 0
+        self.participants = 0
+        self.error_count = 0
+        self.errors = []
+
+    def error(self, row, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((row, message))
+
+    def write_csv(self, file):
+        writer = csv.writer(file)
+        writer.writerow(['Dòng', 'Lỗi'])
+        writer.writerows(self.errors)
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (date, time)):
+        return value
+    return str(value).strip()
+
+
+def _csv_rows(file):
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    first = text.readline()
+    try:
+        dialect = csv.Sniffer().sniff(first, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    yield from csv.reader(itertools.chain([first], text), dialect)
+
+
+def _xlsx_rows(file):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError('Cần cài đặt openpyxl để nhập tệp .xlsx.')
+    # read_only: đọc lần lượt từng dòng, không nạp cả bảng tính vào bộ nhớ
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def read_rows(file, name):
+    """
+    Sinh (số dòng, {trường: giá trị}) từ tệp CSV hoặc XLSX, đọc lần lượt từng dòng.
+    Dòng đầu là tiêu đề cột; các dòng trống bị bỏ qua.
+    """
+    ext = os.path.splitext(name)[1].lower()
+    if ext == '.csv':
+        rows = _csv_rows(file)
+    elif ext == '.xlsx':
+        rows = _xlsx_rows(file)
+    else:
+        raise ImportFileError('Chỉ hỗ trợ tệp .csv hoặc .xlsx.')
+
+    header = next(rows, None)
+    aliases = {alias: field for field, names in COLUMNS.items() for alias in names}
+    columns = []
+    for index, title in enumerate(header or ()):
+        field = aliases.get(_HEADER_RE.sub('_', normalize_text(str(title or ''))).strip('_'))
+        if field:
+            columns.append((index, field))
+    missing = set(REQUIRED_COLUMNS) - {field for _, field in columns}
+    if missing:
+        names = ', '.join(COLUMNS[field][0] for field in REQUIRED_COLUMNS if field in missing)
+        raise ImportFileError(f'Tệp thiếu cột bắt buộc: {names}.')
+
+    for number, values in enumerate(rows, start=2):
+        row = {field: _cell(values[index]) if index < len(values) else '' for index, field in columns}
+        if any(value != '' for value in row.values()):
+            yield number, row
+
+
+class _Lookups:
+    """
+    Tra id người dùng (theo tên đăng nhập), Khoa/Phòng, Tổ chức (theo tên không dấu).
+    Mỗi bảng chỉ được đọc một lần cho cả tệp.
+    """
+    AMBIGUOUS = -1
+
+    def __init__(self):
+        self._maps = {}
+
+    def _map(self, kind):
+        if kind not in self._maps:
+            if kind == 'user':
+                rows = User.objects.values_list('username', 'pk')
+            else:
+                model = Department if kind == 'department' else Organization
+                rows = model.objects.values_list('search_name', 'pk')
+            found = {}
+            for key, pk in rows.iterator():
+                key = key.lower()
+                found[key] = self.AMBIGUOUS if key in found else pk
+            self._maps[kind] = found
+        return self._maps[kind]
+
+    def find(self, kind, value):
+        key = value.lower() if kind == 'user' else normalize_text(value)
+        pk = self._map(kind).get(key.strip())
+        if pk is None:
+            raise ValidationError(f'Không tìm thấy "{value}".')
+        if pk == self.AMBIGUOUS:
+            raise ValidationError(f'Có nhiều đối tượng cùng tên "{value}".')
+        return pk
+
+
+class _UserField(forms.Field):
+    def __init__(self, lookups, **kwargs):
+        super().__init__(**kwargs)
+        self.lookups = lookups
+
+    def to_python(self, value):
+        if not value:
+            return None
+        return User(pk=self.lookups.find('user', value), username=value)
+
+
+class _MeetingRowForm(MeetingForm):
+    """
+    MeetingForm cho một dòng của tệp nhập: chủ trì, người chuẩn bị được tra trong bộ nhớ,
+    trùng lịch được kiểm tra theo lô khi ghi.
+    """
+
+    def __init__(self, data, lookups):
+        super().__init__(data)
+        del self.fields['meeting_number']
+        self.fields['host'] = _UserField(lookups, label='Chủ trì')
+        self.fields['preparation'] = _UserField(lookups, label='Người chuẩn bị', required=False)
+
+    def check_conflicts(self, cleaned_data):
+        pass
+
+    def _get_validation_exclusions(self):
+        # Chủ trì, người chuẩn bị đã được tra trong bộ nhớ, không kiểm tra lại khoá ngoại trong CSDL
+        return super()._get_validation_exclusions() | {'host', 'preparation'}
+
+
+def _date_value(value):
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    try:
+        return datetime.strptime(value, '%d/%m/%Y').date().isoformat()
+    except ValueError:
+        return value
+
+
+def _time_value(value):
+    if isinstance(value, datetime):
+        value = value.time()
+    if isinstance(value, time):
+        return value.strftime('%H:%M')
+    return value
+
+
+def _bool(value, default):
+    value = normalize_text(str(value)).strip()
+    if value == '':
+        return default
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValidationError(f'Giá trị "{value}" không hợp lệ, dùng "có" hoặc "không".')
+
+
+def _form_errors(form):
+    messages = []
+    for field, errors in form.errors.items():
+        label = form.fields[field].label if field in form.fields else None
+        messages.extend(f"{label}: {error}" if label else error for error in errors)
+    return messages
+
+
+def _meeting(row, lookups):
+    """
+    Cuộc họp (chưa lưu) từ một dòng, kiểm tra bằng các quy tắc của MeetingForm.
+    """
+    status = row.get('status', '')
+    data = {
+        'title': row.get('title', ''),
+        'date': _date_value(row.get('date', '')),
+        'time': _time_value(row.get('time', '')),
+        'duration': row.get('duration') or Meeting._meta.get_field('duration').default,
+        'host': row.get('host', ''),
+        'preparation': row.get('preparation', ''),
+        'location': row.get('location', ''),
+        'status': STATUSES.get(normalize_text(status), status) if status else 'Đã lên lịch',
+    }
+    form = _MeetingRowForm(data, lookups)
+    if not form.is_valid():
+        raise ValidationError(_form_errors(form))
+    return form.save(commit=False)
+
+
+def _participant(row, lookups):
+    """
+    Thành phần tham dự (chưa lưu) của một dòng, hoặc None nếu dòng không có thành phần tham dự.
+    """
+    name = row.get('participant', '')
+    type_value = row.get('participant_type', '')
+    if not name and not type_value:
+        return None
+    participant_type = PARTICIPANT_TYPES.get(normalize_text(type_value or 'individual'))
+    if participant_type is None:
+        raise ValidationError(f'Loại thành phần tham dự "{type_value}" không hợp lệ.')
+    participant = MeetingParticipant(
+        participant_type=participant_type,
+        is_required=_bool(row.get('is_required', ''), True),
+        attended=_bool(row.get('attended', ''), False),
+    )
+    field = PARTICIPANT_FIELDS[participant_type]
+    if name:
+        model = {'user': User, 'department': Department, 'organization': Organization}[field]
+        setattr(participant, field, model(pk=lookups.find(field, name)))
+    participant.clean()
+    return participant
+
+
+def _blocks(rows):
+    """
+    Nhóm các dòng thành từng cuộc họp: (số dòng của cuộc họp, dòng cuộc họp, các dòng thành phần tham dự).
+    """
+    block = None
+    for number, row in rows:
+        if any(row.get(field) for field in MEETING_COLUMNS):
+            if block:
+                yield block
+            block = (number, row, [(number, row)])
+        elif block is None:
+            yield number, None, [(number, row)]
+        else:
+            block[2].append((number, row))
+    if block:
+        yield block
+
+
+class _Entry:
+    def __init__(self, number, meeting, participants):
+        self.number = number
+        self.meeting = meeting
+        # [(số dòng, MeetingParticipant)]
+        self.participants = participants
+        self.attendee_ids = set()
+
+
+def _resolve_attendees(batch):
+    """
+    Người tham dự thực tế của từng cuộc họp trong lô, đọc thành viên Khoa/Phòng, Tổ chức một lần cho cả lô.
+    """
+    participants = [participant for entry in batch for _, participant in entry.participants]
+    departments = department_members(p.department_id for p in participants if p.department_id)
+    organizations = organization_members(p.organization_id for p in participants if p.organization_id)
+    for entry in batch:
+        for _, participant in entry.participants:
+            if participant.user_id:
+                entry.attendee_ids.add(participant.user_id)
+            if participant.department_id:
+                entry.attendee_ids |= departments[participant.department_id]
+            if participant.organization_id:
+                entry.attendee_ids |= organizations[participant.organization_id]
+
+
+def _validate(block, lookups, report):
+    number, meeting_row, rows = block
+    report.rows += len(rows)
+    if meeting_row is None:
+        report.error(number, 'Dòng thành phần tham dự không thuộc cuộc họp nào (thiếu dòng cuộc họp phía trên).')
+        return None
+    valid = True
+    try:
+        meeting = _meeting(meeting_row, lookups)
+    except ValidationError as e:
+        for message in e.messages:
+            report.error(number, message)
+        valid = False
+
+    participants = []
+    seen = set()
+    for row_number, row in rows:
+        try:
+            participant = _participant(row, lookups)
+        except ValidationError as e:
+            for message in e.messages:
+                report.error(row_number, message)
+            valid = False
+            continue
+        if participant is None:
+            continue
+        key = (participant.user_id, participant.department_id, participant.organization_id)
+        if key in seen:
+            report.error(row_number, 'Thành phần tham dự bị trùng trong cùng cuộc họp.')
+            valid = False
+            continue
+        seen.add(key)
+        participants.append((row_number, participant))
+
+    if not valid:
+        report.error(number, 'Cuộc họp không được nhập do có lỗi.')
+        return None
+    return _Entry(number, meeting, participants)
+
+
+def _reject_conflicts(batch, report):
+    """
+    Kiểm tra trùng lịch của cả lô trong bộ nhớ (với nhau và với các cuộc họp đã có cùng ngày của cùng những người).
+    Trả về các mục không bị trùng.
+    """
+    people = set()
+    for entry in batch:
+        people |= entry.attendee_ids | {pk for pk in (entry.meeting.host_id, entry.meeting.preparation_id) if pk}
+    existing = list(
+        involving(
+            Meeting.objects.filter(date__in={entry.meeting.date for entry in batch}, time__isnull=False)
+            .exclude(status=CANCELLED),
+            people,
+        )
+        .only('pk', 'meeting_number', 'title', 'date', 'time', 'duration', 'host_id', 'preparation_id', 'status')
+    )
+    attendees = effective_attendee_map([meeting.pk for meeting in existing])
+    entries = {id(entry.meeting): entry for entry in batch}
+    conflicts = find_schedule_conflicts(
+        [(meeting, attendees[meeting.pk]) for meeting in existing]
+        + [(entry.meeting, entry.attendee_ids) for entry in batch]
+    )
+    rejected = {}
+    for user_id, first, second in conflicts:
+        # Giữ cuộc họp đã có hoặc đứng trước trong tệp, loại cuộc họp còn lại
+        if id(second) in entries:
+            rejected.setdefault(id(second), []).append((user_id, first))
+        elif id(first) in entries:
+            rejected.setdefault(id(first), []).append((user_id, second))
+    if not rejected:
+        return batch
+
+    names = {
+        user.pk: user.get_full_name() or user.username
+        for user in User.objects.filter(pk__in={user_id for items in rejected.values() for user_id, _ in items})
+    }
+    numbers = {id(entry.meeting): entry.number for entry in batch}
+    for key, items in rejected.items():
+        for user_id, other in items:
+            where = other.meeting_number or f"ở dòng {numbers[id(other)]}"
+            report.error(
+                entries[key].number,
+                f"Trùng lịch: {names.get(user_id)} đã có cuộc họp {where} - {other.title} lúc {other.time:%H:%M}.",
+            )
+    return [entry for entry in batch if id(entry.meeting) not in rejected]
+
+
+def _write(batch, created_by, report, notify):
+    """
+    Ghi một lô cuộc họp trong một giao dịch: cấp số một lần cho cả lô, bulk_create cuộc họp và thành phần tham dự.
+    Thông báo cho người được mời được ghi sau khi giao dịch của lô đã commit.
+    """
+    if not batch:
+        return
+    _resolve_attendees(batch)
+    batch = _reject_conflicts(batch, report)
+    if not batch:
+        return
+    meetings = [entry.meeting for entry in batch]
+    for meeting in meetings:
+        meeting.created_by_id = created_by.pk
+    try:
+        with transaction.atomic():
+            Meeting.assign_numbers(meetings)
+            Meeting.objects.bulk_create(meetings)
+            participants = []
+            for entry in batch:
+                for _, participant in entry.participants:
+                    participant.meeting = entry.meeting
+                    participant.created_by_id = created_by.pk
+                    participants.append(participant)
+            MeetingParticipant.objects.bulk_create(participants)
+            # bulk_create không phát tín hiệu nên tự cập nhật chỉ mục, lịch nhắc, bảng tổng hợp và cache trang
+            search.index_meetings(meeting.pk for meeting in meetings)
+            reminders.schedule_new_reminders(meetings)
+            rollups.record_participants([], [rollups.participant_state(participant) for participant in participants])
+    except IntegrityError as e:
+        for entry in batch:
+            report.error(entry.number, f'Không ghi được cuộc họp: {e}')
+        return
+    report.meetings += len(meetings)
+    report.participants += len(participants)
+    # Sau khi lô đã commit: giao dịch của lô không giữ khoá ghi trong lúc ghi thông báo,
+    # lỗi thông báo không làm hỏng lô đã ghi (khi dry_run mọi thứ vẫn nằm trong giao dịch ngoài)
+    fragments.invalidate()
+    ical.invalidate_meetings(meeting.pk for meeting in meetings)
+    if notify:
+        notify_many([(entry.meeting, entry.attendee_ids, None) for entry in batch], 'meeting_created')
+
+
+def import_meetings(rows, created_by, batch_size=100, notify=True, dry_run=False):
+    """
+    Nhập cuộc họp và thành phần tham dự từ các dòng của read_rows(). Mỗi cuộc họp được nhập trọn vẹn hoặc bỏ qua
+    cùng lỗi theo từng dòng; các cuộc họp hợp lệ được ghi theo lô `batch_size` trong từng giao dịch.
+    Với `dry_run` mọi thay đổi được hoàn tác ở cuối. Trả về ImportReport.
+    """
+    report = ImportReport()
+    lookups = _Lookups()
+    with transaction.atomic() if dry_run else nullcontext():
+        batch = []
+        for block in _blocks(rows):
+            entry = _validate(block, lookups, report)
+            if entry:
+                batch.append(entry)
+            if len(batch) >= batch_size:
+                _write(batch, created_by, report, notify)
+                batch = []
+        _write(batch, created_by, report, notify)
+        if dry_run:
+            transaction.set_rollback(True)
+    return report
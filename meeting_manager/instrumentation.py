@@ -0,0 +1,135 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+#Số request gần nhất được giữ lại cho mỗi view để tính phân vị
+SAMPLES_PER_VIEW = 1000
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)')
+
+
+def fingerprint(sql):
+    """
+    Dạng chuẩn của câu SQL: bỏ các giá trị cụ thể để nhận ra các truy vấn lặp lại.
+    """
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    return _IN_LIST_RE.sub('(...)', sql)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def repeated(self, threshold):
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count >= threshold]
+
+
+class RequestStats:
+    """
+    Lưu các mẫu (thời gian xử lý, số truy vấn, thời gian CSDL) gần nhất theo view, trong tiến trình.
+    """
+
+    def __init__(self, size=SAMPLES_PER_VIEW):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(lambda: deque(maxlen=size))
+        self.n_plus_one = Counter()
+
+    def add(self, view, duration, queries, db_time, suspicious):
+        with self.lock:
+            self.samples[view].append((duration, queries, db_time))
+            if suspicious:
+                self.n_plus_one[view] += 1
+
+    def summary(self):
+        with self.lock:
+            snapshot = {view: list(samples) for view, samples in self.samples.items()}
+            n_plus_one = dict(self.n_plus_one)
+        return {
+            view: {
+                'requests': len(samples),
+                'time_ms': _percentiles([s[0] * 1000 for s in samples]),
+                'queries': _percentiles([s[1] for s in samples]),
+                'db_time_ms': _percentiles([s[2] * 1000 for s in samples]),
+                'n_plus_one_requests': n_plus_one.get(view, 0),
+            }
+            for view, samples in snapshot.items()
+        }
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.n_plus_one.clear()
+
+
+def _percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {}
+
+    def pick(p):
+        return round(values[min(len(values) - 1, int(p * len(values)))], 2)
+
+    return {'p50': pick(0.5), 'p90': pick(0.9), 'p99': pick(0.99), 'max': round(values[-1], 2)}
+
+
+stats = RequestStats()
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Ghi lại số truy vấn, tổng thời gian CSDL, các câu SQL lặp lại và thời gian xử lý của mỗi request.
+    Chỉ hoạt động khi REQUEST_INSTRUMENTATION = True; khi tắt, middleware bị gỡ khỏi chuỗi xử lý.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'REQUEST_INSTRUMENTATION_N_PLUS_ONE_THRESHOLD', 5)
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else request.path
+        repeated = recorder.repeated(self.threshold)
+        if repeated:
+            logger.warning(
+                'Nghi vấn N+1 tại %s: %s',
+                view,
+                '; '.join(f'{count}x {sql[:200]}' for sql, count in repeated[:3]),
+            )
+        stats.add(view, duration, recorder.count, recorder.duration, bool(repeated))
+
+        response['X-DB-Queries'] = str(recorder.count)
+        response['Server-Timing'] = f'db;dur={recorder.duration * 1000:.1f}, total;dur={duration * 1000:.1f}'
+        return response
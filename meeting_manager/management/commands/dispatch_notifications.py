@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from meeting_manager.dispatcher import Dispatcher
+
+
+class Command(BaseCommand):
+    help = 'Gửi các thông báo đang chờ trong outbox (Zalo) bằng một pool luồng.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Số luồng gửi đồng thời')
+        parser.add_argument('--batch-size', type=int, default=100, help='Số tin nhận mỗi lô')
+        parser.add_argument('--interval', type=float, default=2.0, help='Số giây chờ khi outbox trống')
+        parser.add_argument('--once', action='store_true', help='Gửi hết các tin đến hạn rồi thoát')
+
+    def handle(self, *args, **options):
+        dispatcher = Dispatcher(workers=options['workers'], batch_size=options['batch_size'])
+        total = 0
+        try:
+            while True:
+                processed = dispatcher.dispatch_once()
+                total += processed
+                if processed:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            dispatcher.close()
+        self.stdout.write(self.style.SUCCESS(f'Đã xử lý {total} tin.'))
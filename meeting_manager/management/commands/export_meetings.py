@@ -0,0 +1,41 @@
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from meeting_manager.exports import export_queryset, stream_zip
+from meeting_manager.models import Meeting
+
+
+class Command(BaseCommand):
+    help = 'Xuất hồ sơ cuộc họp (thông tin, thành phần tham dự, biên bản, tệp đính kèm) ra tệp ZIP.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Đường dẫn tệp ZIP, hoặc "-" để ghi ra stdout')
+        parser.add_argument('--meeting', type=int, action='append', default=[], help='Id cuộc họp (có thể lặp lại)')
+        parser.add_argument('--date-from', type=date.fromisoformat, help='Từ ngày (YYYY-MM-DD)')
+        parser.add_argument('--date-to', type=date.fromisoformat, help='Đến ngày (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        meetings = Meeting.objects.all()
+        if options['meeting']:
+            meetings = meetings.filter(pk__in=options['meeting'])
+        if options['date_from']:
+            meetings = meetings.filter(date__gte=options['date_from'])
+        if options['date_to']:
+            meetings = meetings.filter(date__lte=options['date_to'])
+        if not (options['meeting'] or options['date_from'] or options['date_to']):
+            raise CommandError('Cần chọn cuộc họp (--meeting) hoặc khoảng ngày (--date-from, --date-to).')
+
+        chunks = stream_zip(export_queryset(meetings).iterator(chunk_size=50))
+        if options['output'] == '-':
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+        size = 0
+        with open(options['output'], 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
+                size += len(chunk)
+        self.stdout.write(self.style.SUCCESS(f'Đã ghi {size} byte vào {options["output"]}.'))
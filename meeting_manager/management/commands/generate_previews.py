@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from meeting_manager.models import FilePreview, MeetingFile
+from meeting_manager.previews import PreviewWorker
+
+
+class Command(BaseCommand):
+    help = 'Tạo ảnh thu nhỏ và bản xem trước cho tệp đính kèm bằng một pool tiến trình.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Số tiến trình chuyển đổi đồng thời')
+        parser.add_argument('--batch-size', type=int, default=20, help='Số tệp nhận mỗi lô')
+        parser.add_argument('--interval', type=float, default=5.0, help='Số giây chờ khi không có tệp mới')
+        parser.add_argument('--once', action='store_true', help='Xử lý hết các tệp đang chờ rồi thoát')
+        parser.add_argument('--enqueue-missing', action='store_true', help='Xếp hàng các tệp đính kèm chưa có bản xem trước')
+
+    def handle(self, *args, **options):
+        if options['enqueue_missing']:
+            missing = MeetingFile.objects.filter(preview__isnull=True).values_list('pk', flat=True)
+            created = FilePreview.objects.bulk_create(
+                [FilePreview(meeting_file_id=pk) for pk in missing.iterator()], batch_size=1000,
+            )
+            self.stdout.write(f'Đã xếp hàng {len(created)} tệp.')
+
+        worker = PreviewWorker(workers=options['workers'], batch_size=options['batch_size'])
+        total = 0
+        try:
+            while True:
+                processed = worker.process_once()
+                total += processed
+                if processed:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            worker.close()
+        self.stdout.write(self.style.SUCCESS(f'Đã xử lý {total} tệp.'))
@@ -0,0 +1,192 @@
+import random
+import re
+from datetime import timedelta, time as dt_time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from meeting_manager import ical, rollups, search
+from meeting_manager.models import (
+    Department, Organization, UserAffiliation, UserProfile, Meeting, MeetingParticipant,
+)
+
+LAST_NAMES = ['Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Huỳnh', 'Phan', 'Vũ', 'Võ', 'Đặng', 'Bùi', 'Đỗ', 'Hồ', 'Ngô', 'Dương', 'Lý']
+MIDDLE_NAMES = ['Văn', 'Thị', 'Hữu', 'Đức', 'Minh', 'Thanh', 'Ngọc', 'Quốc', 'Xuân', 'Thu', 'Hoài', 'Gia']
+FIRST_NAMES = ['An', 'Bình', 'Châu', 'Dũng', 'Giang', 'Hà', 'Hải', 'Hạnh', 'Hiếu', 'Hoa', 'Hùng', 'Khánh', 'Lan', 'Linh',
+               'Long', 'Mai', 'Nam', 'Nga', 'Phúc', 'Phương', 'Quân', 'Sơn', 'Tâm', 'Thảo', 'Trang', 'Tuấn', 'Vy', 'Yến']
+DEPARTMENT_NAMES = ['Khoa Nội', 'Khoa Ngoại', 'Khoa Nhi', 'Khoa Sản', 'Khoa Hồi sức', 'Khoa Dược', 'Khoa Xét nghiệm',
+                    'Khoa Chẩn đoán hình ảnh', 'Phòng Kế hoạch', 'Phòng Tổ chức', 'Phòng Tài chính', 'Phòng Điều dưỡng']
+ORGANIZATION_NAMES = ['Công đoàn', 'Đoàn Thanh niên', 'Chi bộ', 'Hội Cựu chiến binh', 'Hội đồng Thuốc', 'Hội đồng Khoa học']
+TITLE_PREFIXES = ['Giao ban', 'Hội chẩn', 'Họp chuyên môn', 'Sinh hoạt khoa học', 'Họp triển khai', 'Tập huấn',
+                  'Họp xét duyệt', 'Họp tổng kết', 'Kiểm điểm tử vong', 'Họp an toàn người bệnh']
+TOPICS = ['kế hoạch tháng', 'quy trình mới', 'chỉ tiêu quý', 'phòng chống nhiễm khuẩn', 'đấu thầu thuốc',
+          'chuyển đổi số', 'cải tiến chất lượng', 'đào tạo liên tục', 'kiểm tra bệnh viện', 'tiêm chủng']
+LOCATIONS = ['Hội trường A', 'Hội trường B', 'Phòng họp giao ban', 'Phòng họp số 1', 'Phòng họp số 2', 'Trực tuyến']
+DURATIONS = [30, 45, 60, 60, 90, 120]
+
+
+class Command(BaseCommand):
+    help = 'Sinh dữ liệu giả lập (Khoa/Phòng, người dùng, cuộc họp, thành phần tham dự) để đo hiệu năng.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departments', type=int, default=200)
+        parser.add_argument('--organizations', type=int, default=30)
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--meetings', type=int, default=200000)
+        parser.add_argument('--participants', type=int, default=5000000, help='Tổng số thành phần tham dự')
+        parser.add_argument('--days-back', type=int, default=365, help='Cuộc họp trải từ chừng này ngày trước...')
+        parser.add_argument('--days-ahead', type=int, default=90, help='...tới chừng này ngày sau hôm nay')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='synth', help='Tiền tố tên đăng nhập và tên nhóm')
+        parser.add_argument('--skip-index', action='store_true', help='Không dựng lại chỉ mục tìm kiếm')
+
+    def handle(self, *args, **options):
+        self.rnd = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        prefix = options['prefix']
+        # Tên Khoa/Phòng, Tổ chức và tên đăng nhập là duy nhất: chạy lại cùng tiền tố sẽ trùng
+        if (
+            User.objects.filter(username__regex=rf"^{re.escape(prefix)}[0-9]{{6}}$").exists()
+            or Department.objects.filter(name__contains=f" {prefix}-").exists()
+            or Organization.objects.filter(name__contains=f" {prefix}-").exists()
+        ):
+            raise CommandError(f'Đã có dữ liệu giả lập với tiền tố "{prefix}", hãy dùng --prefix khác.')
+
+        department_ids = self._departments(prefix, options['departments'])
+        organization_ids = self._organizations(prefix, options['organizations'])
+        user_ids = self._users(prefix, options['users'], department_ids, organization_ids)
+        meeting_ids = self._meetings(options['meetings'], user_ids, options['days_back'], options['days_ahead'])
+        self._participants(options['participants'], meeting_ids, user_ids, department_ids, organization_ids)
+
+        if not options['skip_index'] and search.is_available():
+            self.stdout.write('Đang dựng lại chỉ mục tìm kiếm...')
+            search.rebuild_index(Meeting.objects.all())
+        # bulk_create không phát tín hiệu nên tính lại bảng tổng hợp tham dự
+        self.stdout.write('Đang tính lại bảng tổng hợp tham dự...')
+        rollups.rebuild()
+        # Lịch .ics đã tạo trước đó không còn đúng
+        ical.invalidate_all()
+        self.stdout.write(self.style.SUCCESS('Đã sinh xong dữ liệu giả lập.'))
+
+    def _bulk(self, model, objects):
+        # bulk_create không gọi save() nên tự tính tên tìm kiếm gợi ý
+        if hasattr(model, 'refresh_search_name'):
+            for obj in objects:
+                obj.refresh_search_name()
+        with transaction.atomic():
+            return model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    def _departments(self, prefix, count):
+        created = self._bulk(Department, [
+            Department(name=f"{DEPARTMENT_NAMES[i % len(DEPARTMENT_NAMES)]} {prefix}-{i + 1}")
+            for i in range(count)
+        ])
+        self.stdout.write(f'{len(created)} Khoa/Phòng')
+        return [d.pk for d in created]
+
+    def _organizations(self, prefix, count):
+        created = self._bulk(Organization, [
+            Organization(name=f"{ORGANIZATION_NAMES[i % len(ORGANIZATION_NAMES)]} {prefix}-{i + 1}")
+            for i in range(count)
+        ])
+        self.stdout.write(f'{len(created)} Tổ chức')
+        return [o.pk for o in created]
+
+    def _users(self, prefix, count, department_ids, organization_ids):
+        rnd = self.rnd
+        password = make_password(None)
+        user_ids = []
+        for start in range(0, count, self.batch_size):
+            users = self._bulk(User, [
+                User(
+                    username=f"{prefix}{n:06d}",
+                    first_name=f"{rnd.choice(LAST_NAMES)} {rnd.choice(MIDDLE_NAMES)}",
+                    last_name=rnd.choice(FIRST_NAMES),
+                    password=password,
+                )
+                for n in range(start, min(count, start + self.batch_size))
+            ])
+            # bulk_create không phát tín hiệu nên tự tạo hồ sơ và Ban/Ngành công tác
+            self._bulk(UserProfile, [
+                UserProfile(user=user, zalo_id=f"zalo{user.pk}" if rnd.random() < 0.6 else None)
+                for user in users
+            ])
+            affiliations = []
+            for user in users:
+                if department_ids:
+                    affiliations.append(UserAffiliation(user=user, department_id=rnd.choice(department_ids), role='Nhân viên'))
+                if organization_ids and rnd.random() < 0.3:
+                    affiliations.append(UserAffiliation(user=user, organization_id=rnd.choice(organization_ids), role='Thành viên'))
+            self._bulk(UserAffiliation, affiliations)
+            user_ids.extend(user.pk for user in users)
+        self.stdout.write(f'{len(user_ids)} người dùng')
+        return user_ids
+
+    def _meetings(self, count, user_ids, days_back, days_ahead):
+        rnd = self.rnd
+        today = timezone.localdate()
+        meeting_ids = []
+        for start in range(0, count, self.batch_size):
+            meetings = []
+            for _ in range(start, min(count, start + self.batch_size)):
+                date = today + timedelta(days=rnd.randint(-days_back, days_ahead))
+                host_id = rnd.choice(user_ids)
+                if date < today:
+                    status = Meeting.CANCELLED if rnd.random() < 0.03 else Meeting.FINISHED
+                else:
+                    status = Meeting.CANCELLED if rnd.random() < 0.03 else Meeting.SCHEDULED
+                meetings.append(Meeting(
+                    title=f"{rnd.choice(TITLE_PREFIXES)} {rnd.choice(TOPICS)}",
+                    date=date,
+                    time=None if rnd.random() < 0.05 else dt_time(rnd.randint(7, 16), rnd.choice([0, 15, 30, 45])),
+                    duration=rnd.choice(DURATIONS),
+                    host_id=host_id,
+                    preparation_id=rnd.choice(user_ids) if rnd.random() < 0.5 else None,
+                    created_by_id=host_id,
+                    location=rnd.choice(LOCATIONS),
+                    status=status,
+                ))
+            Meeting.assign_numbers(meetings)
+            meeting_ids.extend(m.pk for m in self._bulk(Meeting, meetings))
+        self.stdout.write(f'{len(meeting_ids)} cuộc họp')
+        return meeting_ids
+
+    def _participants(self, count, meeting_ids, user_ids, department_ids, organization_ids):
+        if not meeting_ids or count <= 0:
+            return
+        rnd = self.rnd
+        per_meeting = max(1, count // len(meeting_ids))
+        remainder = count - per_meeting * len(meeting_ids)
+        batch = []
+        total = 0
+        for index, meeting_id in enumerate(meeting_ids):
+            size = per_meeting + (1 if index < remainder else 0)
+            # Khoảng 10% thành phần tham dự là Khoa/Phòng hoặc Tổ chức, còn lại là cá nhân
+            groups = min(size // 10, len(department_ids))
+            people = min(size - groups, len(user_ids))
+            created_by = rnd.choice(user_ids)
+            for user_id in rnd.sample(user_ids, people):
+                batch.append(MeetingParticipant(
+                    meeting_id=meeting_id, user_id=user_id, participant_type='individual',
+                    is_required=rnd.random() < 0.8, attended=rnd.random() < 0.7, created_by_id=created_by,
+                ))
+            organizations = min(groups // 3, len(organization_ids))
+            for department_id in rnd.sample(department_ids, groups - organizations):
+                batch.append(MeetingParticipant(
+                    meeting_id=meeting_id, department_id=department_id, participant_type='department',
+                    is_required=True, attended=rnd.random() < 0.7, created_by_id=created_by,
+                ))
+            for organization_id in rnd.sample(organization_ids, organizations):
+                batch.append(MeetingParticipant(
+                    meeting_id=meeting_id, organization_id=organization_id, participant_type='group',
+                    is_required=False, attended=rnd.random() < 0.7, created_by_id=created_by,
+                ))
+            if len(batch) >= self.batch_size:
+                total += len(self._bulk(MeetingParticipant, batch))
+                batch = []
+        total += len(self._bulk(MeetingParticipant, batch))
+        self.stdout.write(f'{total} thành phần tham dự')
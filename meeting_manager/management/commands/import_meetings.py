@@ -0,0 +1,54 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from meeting_manager import imports
+
+
+class Command(BaseCommand):
+    help = (
+        'Nhập hàng loạt cuộc họp và thành phần tham dự từ tệp CSV/XLSX. Mỗi dòng có tiêu đề bắt đầu một cuộc họp, '
+        'các dòng tiếp theo chỉ có cột thành phần tham dự được thêm vào cuộc họp đó.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Đường dẫn tệp .csv hoặc .xlsx')
+        parser.add_argument('--created-by', required=True, help='Tên đăng nhập của người tạo các cuộc họp')
+        parser.add_argument('--batch-size', type=int, default=100, help='Số cuộc họp ghi trong mỗi giao dịch')
+        parser.add_argument('--no-notify', action='store_true', help='Không gửi thông báo cho người được mời')
+        parser.add_argument('--dry-run', action='store_true', help='Chỉ kiểm tra, không ghi dữ liệu')
+        parser.add_argument('--report', help='Ghi danh sách lỗi ra tệp CSV ("-" để ghi ra stdout)')
+
+    def handle(self, *args, **options):
+        try:
+            created_by = User.objects.get(username=options['created_by'])
+        except User.DoesNotExist:
+            raise CommandError(f"Không tìm thấy người dùng {options['created_by']}.")
+        try:
+            with open(options['file'], 'rb') as file:
+                report = imports.import_meetings(
+                    imports.read_rows(file, options['file']),
+                    created_by,
+                    batch_size=options['batch_size'],
+                    notify=not options['no_notify'],
+                    dry_run=options['dry_run'],
+                )
+        except (OSError, imports.ImportFileError) as e:
+            raise CommandError(str(e))
+
+        if options['report'] == '-':
+            report.write_csv(sys.stdout)
+        elif options['report']:
+            with open(options['report'], 'w', encoding='utf-8-sig', newline='') as output:
+                report.write_csv(output)
+        else:
+            for row, message in report.errors:
+                self.stderr.write(f'Dòng {row}: {message}')
+
+        prefix = 'Kiểm tra xong' if options['dry_run'] else 'Đã nhập'
+        summary = f'{prefix} {report.meetings} cuộc họp, {report.participants} thành phần tham dự từ {report.rows} dòng'
+        if report.error_count:
+            self.stdout.write(self.style.WARNING(f'{summary}; {report.error_count} lỗi.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{summary}.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from meeting_manager.uploads import purge_sessions
+
+
+class Command(BaseCommand):
+    help = 'Xoá các phiên tải lên đã lâu không hoạt động cùng dữ liệu tải dở.'
+
+    def handle(self, *args, **options):
+        count = purge_sessions()
+        self.stdout.write(self.style.SUCCESS(f'Đã xoá {count} phiên tải lên.'))
@@ -0,0 +1,24 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from meeting_manager import rollups
+from meeting_manager.agenda import month_bounds
+
+
+class Command(BaseCommand):
+    help = 'Tính lại bảng tổng hợp tham dự từ thành phần tham dự để sửa sai lệch (toàn bộ hoặc theo khoảng ngày).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', type=date.fromisoformat, help='Từ ngày (YYYY-MM-DD), tính từ đầu tháng')
+        parser.add_argument('--date-to', type=date.fromisoformat, help='Đến ngày (YYYY-MM-DD), tính tới cuối tháng')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        date_from, date_to = options['date_from'], options['date_to']
+        if bool(date_from) != bool(date_to):
+            raise CommandError('Cần chọn cả --date-from và --date-to, hoặc bỏ cả hai để tính lại toàn bộ.')
+        if date_to:
+            date_to = month_bounds(date_to)[1]
+        total = rollups.rebuild(date_from, date_to, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Đã tính lại {total} dòng tổng hợp tham dự.'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from meeting_manager import search
+from meeting_manager.models import Meeting
+
+
+class Command(BaseCommand):
+    help = 'Dựng lại chỉ mục tìm kiếm toàn văn (FTS5) cho các cuộc họp.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('Chỉ mục FTS5 chỉ được hỗ trợ trên SQLite.')
+        total = search.rebuild_index(Meeting.objects.all(), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Đã đánh chỉ mục {total} cuộc họp.'))
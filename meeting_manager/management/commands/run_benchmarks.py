@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from meeting_manager import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Đo thời gian và số truy vấn của các view và thao tác chính, so sánh với kết quả chuẩn.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Chỉ chạy các phép đo này')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--tolerance', type=float, default=0.5, help='Tỉ lệ chậm hơn chuẩn cho phép (0.5 = 50%%)')
+        parser.add_argument('--baseline', default=str(benchmarks.BASELINE_PATH))
+        parser.add_argument('--update-baseline', action='store_true', help='Ghi kết quả lần này làm chuẩn')
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - set(benchmarks.BENCHMARKS)
+        if unknown:
+            raise CommandError(f"Không có phép đo: {', '.join(sorted(unknown))}")
+        try:
+            results = benchmarks.run(options['names'], repeat=options['repeat'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        baseline = benchmarks.load_baseline(options['baseline'])
+        # Thời gian chuẩn được quy đổi theo tốc độ máy đang đo so với máy đã ghi chuẩn
+        calibration_ms = benchmarks.calibrate(options['repeat'])
+        factor = benchmarks.scale(baseline, calibration_ms)
+        self.stdout.write(f"Hiệu chỉnh: {calibration_ms} ms (tỉ lệ so với máy ghi chuẩn: {factor:.2f})")
+        for name, result in results.items():
+            expected = baseline.get(name, {})
+            self.stdout.write(
+                f"{name:<36} {result['median_ms']:>10.2f} ms {result['queries']:>5} truy vấn"
+                + (
+                    f"   (chuẩn quy đổi {expected['median_ms'] * factor:.2f} ms, {expected['queries']} truy vấn)"
+                    if expected else ''
+                )
+            )
+
+        if options['update_baseline']:
+            if benchmarks.CALIBRATION not in baseline:
+                baseline[benchmarks.CALIBRATION] = {'median_ms': calibration_ms}
+            # Ghi theo đơn vị của máy đã ghi chuẩn để các phép đo cũ và mới so sánh được với nhau
+            for name, result in results.items():
+                baseline[name] = {**result, 'median_ms': round(result['median_ms'] / factor, 2)}
+            benchmarks.save_baseline(baseline, options['baseline'])
+            self.stdout.write(self.style.SUCCESS(f"Đã ghi kết quả chuẩn vào {options['baseline']}"))
+            return
+
+        problems = benchmarks.regressions(results, baseline, options['tolerance'], factor)
+        if problems:
+            raise CommandError('Hiệu năng giảm so với chuẩn:\n' + '\n'.join(problems))
+        self.stdout.write(self.style.SUCCESS('Không có phép đo nào chậm hơn chuẩn.'))
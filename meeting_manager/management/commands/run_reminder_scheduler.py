@@ -0,0 +1,30 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from meeting_manager.reminders import ReminderScheduler
+
+
+class Command(BaseCommand):
+    help = 'Chạy bộ lập lịch gửi nhắc nhở cuộc họp.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horizon-hours', type=float, default=6, help='Khoảng thời gian nạp trước vào hàng đợi')
+        parser.add_argument('--sync-seconds', type=float, default=30, help='Chu kỳ nạp các lịch nhắc vừa thay đổi')
+        parser.add_argument('--max-sleep', type=float, default=60)
+
+    def handle(self, *args, **options):
+        scheduler = ReminderScheduler(
+            horizon=timedelta(hours=options['horizon_hours']),
+            sync_interval=timedelta(seconds=options['sync_seconds']),
+        )
+        self.stdout.write('Bộ lập lịch nhắc nhở đang chạy...')
+        try:
+            while True:
+                sent = scheduler.tick()
+                if sent:
+                    self.stdout.write(f'Đã nhắc {sent} cuộc họp.')
+                time.sleep(min(options['max_sleep'], scheduler.next_wakeup()))
+        except KeyboardInterrupt:
+            pass
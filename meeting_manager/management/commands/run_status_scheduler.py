@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from meeting_manager.statuses import advance_statuses
+
+
+class Command(BaseCommand):
+    help = 'Tự động chuyển trạng thái cuộc họp (đang diễn ra, đã kết thúc) theo ngày, giờ và thời lượng.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=60, help='Chu kỳ kiểm tra (giây)')
+        parser.add_argument('--once', action='store_true', help='Chạy một lần rồi thoát')
+        parser.add_argument('--no-notify', action='store_true', help='Không gửi thông báo cập nhật cuộc họp')
+
+    def handle(self, *args, **options):
+        notify = not options['no_notify']
+        if options['once']:
+            changed = advance_statuses(notify=notify)
+            self.stdout.write(self.style.SUCCESS(f'Đã chuyển trạng thái {changed} cuộc họp.'))
+            return
+        self.stdout.write('Bộ chuyển trạng thái cuộc họp đang chạy...')
+        try:
+            while True:
+                changed = advance_statuses(notify=notify)
+                if changed:
+                    self.stdout.write(f'Đã chuyển trạng thái {changed} cuộc họp.')
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,185 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import MeetingParticipant, UserAffiliation
+
+#Thời gian giữ tập thành viên trong cache của Django (giây)
+CACHE_TIMEOUT = 24 * 3600
+
+DEPARTMENT = 'department'
+ORGANIZATION = 'organization'
+USER = 'user'
+
+# Cache trong tiến trình: (loại, id) -> (phiên bản, tập giá trị)
+_local = {}
+
+
+def _version_key(kind, pk):
+    return f"membership:version:{kind}:{pk}"
+
+
+def _members_key(kind, pk, version):
+    return f"membership:{kind}:{pk}:{version}"
+
+
+def _new_version():
+    return time.time_ns()
+
+
+def invalidate(kind, pks):
+    """
+    Đánh dấu tập thành viên của các nhóm `pks` đã thay đổi. Các tiến trình khác nhận biết qua phiên bản mới.
+    Phiên bản được đổi sau khi giao dịch hiện tại commit, để request khác không lưu tập cũ dưới phiên bản mới.
+    """
+    pks = {pk for pk in pks if pk is not None}
+    if not pks:
+        return
+
+    def bump():
+        cache.set_many({_version_key(kind, pk): _new_version() for pk in pks}, None)
+        for pk in pks:
+            _local.pop((kind, pk), None)
+
+    for pk in pks:
+        _local.pop((kind, pk), None)
+    transaction.on_commit(bump)
+
+
+def _versions(kind, pks):
+    keys = {_version_key(kind, pk): pk for pk in pks}
+    found = cache.get_many(keys)
+    versions = {keys[key]: version for key, version in found.items()}
+    missing = [pk for pk in pks if pk not in versions]
+    for pk in missing:
+        # Phiên bản không bao giờ lặp lại, kể cả khi khoá bị cache loại bỏ
+        version = _new_version()
+        if not cache.add(_version_key(kind, pk), version, None):
+            version = cache.get(_version_key(kind, pk), version)
+        versions[pk] = version
+    return versions
+
+
+def _load(kind, pks):
+    """
+    Đọc tập giá trị từ CSDL cho các nhóm chưa có trong cache (một truy vấn).
+    """
+    affiliations = UserAffiliation.objects.filter(is_active=True)
+    if kind == USER:
+        rows = affiliations.filter(user_id__in=pks).values_list('user_id', 'department_id', 'organization_id')
+        result = {pk: (set(), set()) for pk in pks}
+        for user_id, department_id, organization_id in rows.iterator():
+            if department_id:
+                result[user_id][0].add(department_id)
+            if organization_id:
+                result[user_id][1].add(organization_id)
+        return {pk: (frozenset(departments), frozenset(organizations)) for pk, (departments, organizations) in result.items()}
+    field = 'department_id' if kind == DEPARTMENT else 'organization_id'
+    result = {pk: set() for pk in pks}
+    rows = affiliations.filter(**{f'{field}__in': pks}).values_list(field, 'user_id')
+    for group_id, user_id in rows.iterator():
+        result[group_id].add(user_id)
+    return {pk: frozenset(users) for pk, users in result.items()}
+
+
+def _lookup(kind, pks):
+    pks = list({pk for pk in pks if pk is not None})
+    if not pks:
+        return {}
+    versions = _versions(kind, pks)
+    result = {}
+    misses = []
+    for pk in pks:
+        entry = _local.get((kind, pk))
+        if entry and entry[0] == versions[pk]:
+            result[pk] = entry[1]
+        else:
+            misses.append(pk)
+    if misses:
+        keys = {_members_key(kind, pk, versions[pk]): pk for pk in misses}
+        for key, value in cache.get_many(keys).items():
+            result[keys[key]] = value
+        missing = [pk for pk in misses if pk not in result]
+        if missing:
+            loaded = _load(kind, missing)
+            cache.set_many({_members_key(kind, pk, versions[pk]): value for pk, value in loaded.items()}, CACHE_TIMEOUT)
+            result.update(loaded)
+        for pk in misses:
+            _local[(kind, pk)] = (versions[pk], result[pk])
+    return result
+
+
+def department_members(department_ids):
+    """
+    {id Khoa/Phòng: frozenset id người dùng đang hoạt động}
+    """
+    return _lookup(DEPARTMENT, department_ids)
+
+
+def organization_members(organization_ids):
+    """
+    {id Tổ chức: frozenset id người dùng đang hoạt động}
+    """
+    return _lookup(ORGANIZATION, organization_ids)
+
+
+def user_groups(user_id):
+    """
+    (frozenset id Khoa/Phòng, frozenset id Tổ chức) mà người dùng đang công tác.
+    """
+    return _lookup(USER, [user_id]).get(user_id, (frozenset(), frozenset()))
+
+
+def user_group_map(user_ids):
+    """
+    {id người dùng: (frozenset id Khoa/Phòng, frozenset id Tổ chức)} cho nhiều người cùng lúc.
+    """
+    return _lookup(USER, user_ids)
+
+
+def resolve_user_ids(rows):
+    """
+    Tập id người dùng từ các bộ (user_id, department_id, organization_id) của thành phần tham dự.
+    Mỗi người chỉ xuất hiện một lần dù thuộc nhiều nhóm.
+    """
+    rows = list(rows)
+    users = {user_id for user_id, _, _ in rows if user_id}
+    for members in department_members(d for _, d, _ in rows if d).values():
+        users |= members
+    for members in organization_members(o for _, _, o in rows if o).values():
+        users |= members
+    return users
+
+
+def effective_attendee_map(meeting_ids):
+    """
+    {id cuộc họp: tập id người tham dự thực tế} cho nhiều cuộc họp bằng một truy vấn.
+    """
+    rows = {pk: [] for pk in meeting_ids}
+    for meeting_id, *row in MeetingParticipant.objects.filter(meeting_id__in=rows).values_list(
+        'meeting_id', 'user_id', 'department_id', 'organization_id'
+    ).iterator():
+        rows[meeting_id].append(row)
+    departments = department_members(d for group in rows.values() for _, d, _ in group if d)
+    organizations = organization_members(o for group in rows.values() for _, _, o in group if o)
+    result = {}
+    for meeting_id, group in rows.items():
+        users = set()
+        for user_id, department_id, organization_id in group:
+            if user_id:
+                users.add(user_id)
+            if department_id:
+                users |= departments[department_id]
+            if organization_id:
+                users |= organizations[organization_id]
+        result[meeting_id] = users
+    return result
+
+
+def effective_attendee_ids(meeting):
+    """
+    Tập id người tham dự thực tế của cuộc họp (cá nhân và thành viên các Khoa/Phòng, Tổ chức được mời).
+    """
+    pk = getattr(meeting, 'pk', meeting)
+    return effective_attendee_map([pk])[pk]
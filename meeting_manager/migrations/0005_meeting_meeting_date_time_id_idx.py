@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting_manager', '0004_meetingfile_name_alter_meetingfile_file'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(fields=['-date', '-time', '-id'], name='meeting_date_time_id_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+import unicodedata
+
+from django.db import migrations
+
+#Bản sao cố định của meeting_manager.search lúc tạo migration, để sửa module sau này không làm đổi migration cũ
+SEARCH_TABLE = 'meeting_manager_meetingsearch'
+CREATE_TABLE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "meeting_number, title, location, host, minutes, tokenize='unicode61 remove_diacritics 2')"
+)
+DROP_TABLE_SQL = f"DROP TABLE IF EXISTS {SEARCH_TABLE}"
+
+
+def normalize_text(value):
+    # Bản sao cố định của search.normalize_text lúc tạo migration
+    if not value:
+        return ''
+    value = value.replace('đ', 'd').replace('Đ', 'D')
+    value = unicodedata.normalize('NFD', value)
+    value = ''.join(c for c in value if unicodedata.category(c) != 'Mn')
+    return value.lower()
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Meeting = apps.get_model('meeting_manager', 'Meeting')
+    rows = Meeting.objects.values_list(
+        'pk', 'meeting_number', 'title', 'location',
+        'host__first_name', 'host__last_name', 'host__username',
+        'minutes__content',
+    )
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(CREATE_TABLE_SQL)
+        for pk, number, title, location, first_name, last_name, username, minutes in rows.iterator():
+            host = f"{first_name or ''} {last_name or ''} {username or ''}"
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, meeting_number, title, location, host, minutes) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                (pk, normalize_text(number), normalize_text(title), normalize_text(location),
+                 normalize_text(host), normalize_text(minutes)),
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(DROP_TABLE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting_manager', '0005_meeting_meeting_date_time_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting_manager', '0006_meetingsearch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeetingNumberSequence',
+            fields=[
+                ('year', models.PositiveIntegerField(primary_key=True, serialize=False, verbose_name='Năm')),
+                ('last_value', models.PositiveIntegerField(default=0, verbose_name='Số đã cấp gần nhất')),
+            ],
+            options={
+                'verbose_name': 'Bộ đếm số cuộc họp',
+                'verbose_name_plural': 'Bộ đếm số cuộc họp',
+            },
+        ),
+    ]
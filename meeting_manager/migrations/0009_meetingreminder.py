@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting_manager', '0008_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeetingReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offset_minutes', models.PositiveIntegerField(verbose_name='Nhắc trước (phút)')),
+                ('remind_at', models.DateTimeField(verbose_name='Thời điểm nhắc')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Đã nhắc lúc')),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('meeting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='meeting_manager.meeting', verbose_name='Cuộc họp')),
+            ],
+            options={
+                'verbose_name': 'Lịch nhắc cuộc họp',
+                'verbose_name_plural': 'Lịch nhắc cuộc họp',
+                'indexes': [models.Index(condition=models.Q(('sent_at__isnull', True)), fields=['remind_at'], name='reminder_pending_idx')],
+                'constraints': [models.UniqueConstraint(fields=('meeting', 'offset_minutes'), name='unique_meeting_reminder_offset')],
+            },
+        ),
+    ]
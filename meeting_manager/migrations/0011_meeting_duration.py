@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting_manager', '0010_notification_notification_unread_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meeting',
+            name='duration',
+            field=models.PositiveIntegerField(default=60, verbose_name='Thời lượng (phút)'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:31
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def normalize_text(value):
+    # Bản sao cố định của search.normalize_text lúc tạo migration
+    if not value:
+        return ''
+    value = value.replace('đ', 'd').replace('Đ', 'D')
+    value = unicodedata.normalize('NFD', value)
+    value = ''.join(c for c in value if unicodedata.category(c) != 'Mn')
+    return value.lower()
+
+
+def fill_search_names(apps, schema_editor):
+    for name in ('Department', 'Organization'):
+        model = apps.get_model('meeting_manager', name)
+        groups = list(model.objects.only('pk', 'name'))
+        for group in groups:
+            group.search_name = normalize_text(group.name)
+        model.objects.bulk_update(groups, ['search_name'], batch_size=1000)
+
+    UserProfile = apps.get_model('meeting_manager', 'UserProfile')
+    profiles = list(UserProfile.objects.select_related('user'))
+    for profile in profiles:
+        user = profile.user
+        full_name = f"{user.first_name} {user.last_name}".strip()
+        profile.search_name = normalize_text(full_name or user.username)
+        profile.search_given_name = normalize_text(user.last_name)
+    UserProfile.objects.bulk_update(profiles, ['search_name', 'search_given_name'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting_manager', '0011_meeting_duration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='search_name',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='search_name',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='search_given_name',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='search_name',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=300),
+        ),
+        migrations.RunPython(fill_search_names, migrations.RunPython.noop),
+    ]
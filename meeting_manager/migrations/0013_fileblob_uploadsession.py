@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:34
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting_manager', '0012_autocomplete_search_names'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='SHA-256')),
+                ('file', models.FileField(max_length=255, upload_to='blobs/', verbose_name='Tập tin')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Kích thước (byte)')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='Số tệp đính kèm sử dụng')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Nội dung tệp',
+                'verbose_name_plural': 'Nội dung tệp',
+            },
+        ),
+        migrations.AlterField(
+            model_name='meetingfile',
+            name='file',
+            field=models.FileField(max_length=255, upload_to='meeting_files/', verbose_name='Tập tin'),
+        ),
+        migrations.AddField(
+            model_name='meetingfile',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='meeting_files', to='meeting_manager.fileblob', verbose_name='Nội dung tệp'),
+        ),
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255, verbose_name='Tên file')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Kích thước (byte)')),
+                ('received', models.PositiveBigIntegerField(default=0, verbose_name='Đã nhận (byte)')),
+                ('expected_sha256', models.CharField(blank=True, max_length=64, verbose_name='SHA-256 do máy khách gửi')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('meeting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='meeting_manager.meeting', verbose_name='Cuộc họp')),
+                ('meeting_file', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='meeting_manager.meetingfile', verbose_name='Tệp đính kèm đã tạo')),
+                ('uploaded_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL, verbose_name='Người tải lên')),
+            ],
+            options={
+                'verbose_name': 'Phiên tải lên',
+                'verbose_name_plural': 'Phiên tải lên',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting_manager', '0013_fileblob_uploadsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FilePreview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(blank=True, max_length=64, verbose_name='SHA-256')),
+                ('status', models.CharField(choices=[('pending', 'Chờ tạo'), ('processing', 'Đang tạo'), ('ready', 'Đã tạo'), ('unsupported', 'Không hỗ trợ'), ('failed', 'Lỗi')], default='pending', max_length=20, verbose_name='Trạng thái')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Số lần thử')),
+                ('claim_token', models.CharField(blank=True, max_length=32)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, verbose_name='Lỗi gần nhất')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('meeting_file', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='preview', to='meeting_manager.meetingfile', verbose_name='Tệp đính kèm')),
+            ],
+            options={
+                'verbose_name': 'Bản xem trước tệp',
+                'verbose_name_plural': 'Bản xem trước tệp',
+                'indexes': [models.Index(fields=['status', 'created_at'], name='preview_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:39
+
+import zlib
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def snapshot_existing_minutes(apps, schema_editor):
+    # Nội dung hiện có trở thành phiên bản 1 (bản đầy đủ)
+    MeetingMinutes = apps.get_model('meeting_manager', 'MeetingMinutes')
+    MinutesRevision = apps.get_model('meeting_manager', 'MinutesRevision')
+    revisions = []
+    for minutes in MeetingMinutes.objects.iterator():
+        revisions.append(MinutesRevision(
+            minutes_id=minutes.pk, version=1, is_snapshot=True,
+            data=zlib.compress(minutes.content.encode()), created_by_id=minutes.created_by_id,
+        ))
+    MinutesRevision.objects.bulk_create(revisions, batch_size=500)
+    MeetingMinutes.objects.update(version=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting_manager', '0014_filepreview'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meetingminutes',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='meetingminutes',
+            name='version',
+            field=models.PositiveIntegerField(default=0, verbose_name='Phiên bản'),
+        ),
+        migrations.CreateModel(
+            name='MinutesRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(verbose_name='Phiên bản')),
+                ('is_snapshot', models.BooleanField(default=False, verbose_name='Bản đầy đủ')),
+                ('data', models.BinaryField(verbose_name='Dữ liệu')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='minutes_revisions', to=settings.AUTH_USER_MODEL, verbose_name='Người sửa')),
+                ('minutes', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='meeting_manager.meetingminutes', verbose_name='Biên bản')),
+            ],
+            options={
+                'verbose_name': 'Phiên bản biên bản',
+                'verbose_name_plural': 'Phiên bản biên bản',
+                'constraints': [models.UniqueConstraint(fields=('minutes', 'version'), name='unique_minutes_revision')],
+            },
+        ),
+        migrations.RunPython(snapshot_existing_minutes, migrations.RunPython.noop),
+    ]
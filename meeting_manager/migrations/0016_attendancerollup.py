@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:47
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncMonth
+
+
+def fill_rollups(apps, schema_editor):
+    # Tổng hợp số liệu hiện có bằng các truy vấn GROUP BY (cá nhân, nhóm được mời, nhóm của cá nhân)
+    MeetingParticipant = apps.get_model('meeting_manager', 'MeetingParticipant')
+    AttendanceRollup = apps.get_model('meeting_manager', 'AttendanceRollup')
+    participants = MeetingParticipant.objects.exclude(meeting__status='Bị hủy').order_by()
+    counters = {
+        'invited': Count('id'),
+        'attended': Count('id', filter=Q(attended=True)),
+        'required': Count('id', filter=Q(is_required=True)),
+        'required_attended': Count('id', filter=Q(is_required=True, attended=True)),
+    }
+    sources = [
+        ('user', participants.filter(user__isnull=False), 'user_id'),
+        ('department', participants.filter(department__isnull=False), 'department_id'),
+        ('organization', participants.filter(organization__isnull=False), 'organization_id'),
+        ('department', participants.filter(
+            user__affiliations__is_active=True, user__affiliations__department__isnull=False,
+        ), 'user__affiliations__department_id'),
+        ('organization', participants.filter(
+            user__affiliations__is_active=True, user__affiliations__organization__isnull=False,
+        ), 'user__affiliations__organization_id'),
+    ]
+    totals = defaultdict(lambda: defaultdict(int))
+    for period, day in (('day', F('meeting__date')), ('month', TruncMonth('meeting__date'))):
+        for kind, queryset, field in sources:
+            rows = queryset.annotate(rollup_date=day, rollup_object=F(field)).values(
+                'rollup_date', 'rollup_object',
+            ).annotate(**{f"n_{name}": value for name, value in counters.items()})
+            for row in rows.iterator():
+                key = (kind, period, row['rollup_object'], row['rollup_date'])
+                for name in counters:
+                    totals[key][name] += row[f"n_{name}"]
+    AttendanceRollup.objects.bulk_create([
+        AttendanceRollup(kind=kind, period=period, object_id=pk, date=day, **values)
+        for (kind, period, pk, day), values in totals.items()
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting_manager', '0015_minutesrevision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('user', 'Cá nhân'), ('department', 'Khoa/Phòng'), ('organization', 'Tổ chức')], max_length=12, verbose_name='Đối tượng')),
+                ('period', models.CharField(choices=[('day', 'Ngày'), ('month', 'Tháng')], max_length=5, verbose_name='Chu kỳ')),
+                ('object_id', models.PositiveIntegerField(verbose_name='Mã đối tượng')),
+                ('date', models.DateField(verbose_name='Ngày')),
+                ('invited', models.IntegerField(default=0, verbose_name='Số lượt mời')),
+                ('attended', models.IntegerField(default=0, verbose_name='Số lượt có mặt')),
+                ('required', models.IntegerField(default=0, verbose_name='Số lượt bắt buộc')),
+                ('required_attended', models.IntegerField(default=0, verbose_name='Số lượt bắt buộc có mặt')),
+            ],
+            options={
+                'verbose_name': 'Tổng hợp tham dự',
+                'verbose_name_plural': 'Tổng hợp tham dự',
+                'indexes': [models.Index(fields=['kind', 'period', 'date'], name='attendance_rollup_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'period', 'object_id', 'date'), name='unique_attendance_rollup')],
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
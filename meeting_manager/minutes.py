@@ -0,0 +1,174 @@
+import difflib
+import json
+import zlib
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import fragments, search
+from .models import MeetingMinutes, MinutesRevision
+
+
+class PatchError(Exception):
+    """
+    Bản vá không hợp lệ (sai định dạng hoặc vị trí nằm ngoài nội dung).
+    """
+
+
+class VersionConflict(Exception):
+    """
+    Biên bản đã được lưu bởi người khác; `version` là phiên bản hiện tại.
+    """
+
+    def __init__(self, version):
+        super().__init__(f"Biên bản đã được cập nhật lên phiên bản {version}.")
+        self.version = version
+
+
+def _pack(text):
+    return zlib.compress(text.encode())
+
+
+def _unpack(data):
+    return zlib.decompress(bytes(data)).decode()
+
+
+def apply_ops(text, ops):
+    """
+    Áp dụng các thao tác [start, end, chuỗi mới] lên `text`: thay text[start:end] bằng chuỗi mới.
+    Vị trí tính theo ký tự của `text` gốc, các thao tác không chồng lấn và xếp tăng dần.
+    """
+    if not isinstance(ops, list):
+        raise PatchError('Bản vá phải là danh sách thao tác.')
+    parts = []
+    position = 0
+    for op in ops:
+        try:
+            start, end, value = op
+        except (TypeError, ValueError):
+            raise PatchError('Mỗi thao tác gồm [vị trí đầu, vị trí cuối, nội dung].')
+        if (
+            not isinstance(start, int) or not isinstance(end, int) or not isinstance(value, str)
+            or start < position or end < start or end > len(text)
+        ):
+            raise PatchError('Vị trí trong bản vá không hợp lệ.')
+        parts.append(text[position:start])
+        parts.append(value)
+        position = end
+    parts.append(text[position:])
+    return ''.join(parts)
+
+
+def diff_ops(old, new):
+    """
+    Các thao tác biến `old` thành `new`, so sánh theo dòng sau khi bỏ phần đầu và cuối giống nhau.
+    """
+    prefix = 0
+    limit = min(len(old), len(new))
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    old_middle = old[prefix:len(old) - suffix]
+    new_middle = new[prefix:len(new) - suffix]
+
+    old_lines = old_middle.splitlines(keepends=True)
+    new_lines = new_middle.splitlines(keepends=True)
+    old_offsets = [prefix]
+    for line in old_lines:
+        old_offsets.append(old_offsets[-1] + len(line))
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != 'equal':
+            ops.append([old_offsets[i1], old_offsets[i2], ''.join(new_lines[j1:j2])])
+    return ops
+
+
+def record_revision(minutes, previous, user_id=None, ops=None):
+    """
+    Lưu phiên bản `minutes.version`: bản đầy đủ theo chu kỳ MINUTES_SNAPSHOT_INTERVAL (hoặc khi phần thay đổi
+    không nhỏ hơn), còn lại chỉ lưu thao tác so với phiên bản trước.
+    """
+    version = minutes.version
+    snapshot = _pack(minutes.content)
+    data, is_snapshot = snapshot, True
+    if previous is not None and (version - 1) % settings.MINUTES_SNAPSHOT_INTERVAL:
+        delta = _pack(json.dumps(diff_ops(previous, minutes.content) if ops is None else ops, ensure_ascii=False))
+        if len(delta) < len(snapshot):
+            data, is_snapshot = delta, False
+    return MinutesRevision.objects.create(
+        minutes=minutes, version=version, is_snapshot=is_snapshot, data=data, created_by_id=user_id,
+    )
+
+
+def apply_patch(meeting, base_version, ops, user):
+    """
+    Lưu tự động: áp dụng bản vá lên phiên bản `base_version`. Nếu biên bản đã sang phiên bản khác
+    thì báo VersionConflict để máy khách tải lại và áp dụng lại thay đổi. Trả về biên bản sau khi lưu.
+    """
+    with transaction.atomic():
+        minutes = MeetingMinutes.objects.filter(meeting=meeting).first()
+        if minutes is None:
+            if base_version != 0:
+                raise VersionConflict(0)
+            minutes = MeetingMinutes(meeting=meeting, content=apply_ops('', ops), created_by=user)
+            try:
+                with transaction.atomic():
+                    minutes.save(edited_by=user)
+            except IntegrityError:
+                # Người khác vừa tạo biên bản
+                raise VersionConflict(MeetingMinutes.objects.get(meeting=meeting).version)
+            return minutes
+
+        if minutes.version != base_version:
+            raise VersionConflict(minutes.version)
+        content = apply_ops(minutes.content, ops)
+        if content == minutes.content:
+            return minutes
+        now = timezone.now()
+        # Chỉ ghi khi phiên bản chưa đổi kể từ lúc đọc
+        updated = MeetingMinutes.objects.filter(pk=minutes.pk, version=base_version).update(
+            content=content, version=base_version + 1, updated_at=now,
+        )
+        if not updated:
+            raise VersionConflict(MeetingMinutes.objects.values_list('version', flat=True).get(pk=minutes.pk))
+        previous = minutes.content
+        minutes.content, minutes.version, minutes.updated_at = content, base_version + 1, now
+        record_revision(minutes, previous, user.pk, ops)
+        # update() không phát tín hiệu post_save
+        search.index_meetings([meeting.pk])
+        fragments.invalidate()
+    return minutes
+
+
+def text_at(minutes, version):
+    """
+    Nội dung biên bản ở phiên bản `version`: bản đầy đủ gần nhất rồi áp dụng tối đa
+    MINUTES_SNAPSHOT_INTERVAL phần thay đổi (hai truy vấn).
+    """
+    if version == minutes.version:
+        return minutes.content
+    base = (
+        minutes.revisions.filter(version__lte=version, is_snapshot=True)
+        .order_by('-version').values_list('version', 'data').first()
+    )
+    if base is None:
+        raise MinutesRevision.DoesNotExist
+    base_version, data = base
+    text = _unpack(data)
+    expected = base_version + 1
+    deltas = (
+        minutes.revisions.filter(version__gt=base_version, version__lte=version)
+        .order_by('version').values_list('version', 'data')
+    )
+    for revision_version, data in deltas:
+        if revision_version != expected:
+            raise MinutesRevision.DoesNotExist
+        text = apply_ops(text, json.loads(_unpack(data)))
+        expected += 1
+    if expected != version + 1:
+        raise MinutesRevision.DoesNotExist
+    return text
@@ -1,14 +1,20 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Q
 from django.contrib.auth.models import User
-from django.forms import ValidationError
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from datetime import datetime, time as dt_time, timedelta
+import uuid
+from .search import normalize_text
 
 #Khoa/phòng
 class Department(models.Model):
     name = models.CharField(max_length=100, unique=True, verbose_name='Tên Khoa / Phòng')
     description = models.TextField(blank=True, null=True, verbose_name='Mô tả')
+    #Tên không dấu, chữ thường dùng cho tìm kiếm gợi ý theo tiền tố
+    search_name = models.CharField(max_length=100, db_index=True, editable=False, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -20,6 +26,13 @@ class Department(models.Model):
     def __str__(self):
         return self.name
     
+    def refresh_search_name(self):
+        self.search_name = normalize_text(self.name)
+
+    def save(self, *args, **kwargs):
+        self.refresh_search_name()
+        super().save(*args, **kwargs)
+
     def delete(self, *args, **kwargs):
         if self.meetings.exists():
             raise ValueError("Không thể xoá Khoa/Phòng này vì đã có cuộc họp được tổ chức.")
@@ -28,10 +41,18 @@ class Department(models.Model):
 class Organization(models.Model):
     name = models.CharField(max_length=100, unique=True, verbose_name='Tên Tổ chức')
     description = models.TextField("Mô tả", blank=True, null=True)
+    search_name = models.CharField(max_length=100, db_index=True, editable=False, default='')
     
     def __str__(self):
         return self.name
 
+    def refresh_search_name(self):
+        self.search_name = normalize_text(self.name)
+
+    def save(self, *args, **kwargs):
+        self.refresh_search_name()
+        super().save(*args, **kwargs)
+
 #Người dùng có thể có nhiều Ban/ngành khác    
 class UserAffiliation(models.Model):
     user = models.ForeignKey(
@@ -74,9 +95,20 @@ class UserProfile(models.Model):
     zalo_id = models.CharField("Zalo ID", max_length=100, blank=True, null=True)
     phone_number = models.CharField("Số điện thoại", max_length=15, blank=True, null=True)
     zalo_notification = models.BooleanField("Nhận thông báo qua Zalo", default=True)
+    #Họ tên và tên (không dấu, chữ thường) của người dùng, dùng cho tìm kiếm gợi ý theo tiền tố
+    search_name = models.CharField(max_length=300, db_index=True, editable=False, default='')
+    search_given_name = models.CharField(max_length=150, db_index=True, editable=False, default='')
 
     def __str__(self):
         return f"Hồ sơ của {self.user.get_full_name()}"
+
+    def refresh_search_name(self):
+        self.search_name = normalize_text(self.user.get_full_name() or self.user.username)
+        self.search_given_name = normalize_text(self.user.last_name)
+
+    def save(self, *args, **kwargs):
+        self.refresh_search_name()
+        super().save(*args, **kwargs)
  # Tạo user profile khi tạo mới user
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -156,20 +188,72 @@ class MeetingParticipant(models.Model):
         if self.participant_type == 'group' and not self.organization:
             raise ValidationError('Ban/Đoàn thể tham dự phải được khai báo')
 
-    def send_notification(self):
-        if self.user.profile.zalo_notification and self.user.profile.zalo_id:
-            self.send_notification_via_zalo()
-    
-    def send_notification_via_zalo(self):
-        pass
+    def send_notification(self, exclude=()):
+        # Thông báo Zalo được ghi vào outbox và gửi bởi lệnh dispatch_notifications; `exclude` là những người
+        # đã tham dự từ trước (đã được thông báo)
+        from .membership import resolve_user_ids
+        from .notifications import notify_users
+        notify_users(
+            self.meeting,
+            resolve_user_ids([(self.user_id, self.department_id, self.organization_id)]) - set(exclude),
+        )
     
+#Bộ đếm số cuộc họp theo năm
+class MeetingNumberSequence(models.Model):
+    year = models.PositiveIntegerField("Năm", primary_key=True)
+    last_value = models.PositiveIntegerField("Số đã cấp gần nhất", default=0)
+
+    class Meta:
+        verbose_name = 'Bộ đếm số cuộc họp'
+        verbose_name_plural = 'Bộ đếm số cuộc họp'
+
+    def __str__(self):
+        return f"{self.year}: {self.last_value}"
+
+    @classmethod
+    def reserve(cls, year, count=1):
+        """
+        Cấp phát nguyên tử `count` số liên tiếp cho năm `year`, trả về range các số đã cấp.
+        Chi phí không phụ thuộc vào số cuộc họp đã có trong năm.
+        """
+        if count < 1:
+            return range(0)
+        with transaction.atomic():
+            updated = cls.objects.filter(year=year).update(last_value=F('last_value') + count)
+            if not updated:
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(year=year, last_value=cls._legacy_last_value(year) + count)
+                except IntegrityError:
+                    # Một tiến trình khác vừa tạo bộ đếm cho năm này
+                    cls.objects.filter(year=year).update(last_value=F('last_value') + count)
+            last_value = cls.objects.filter(year=year).values_list('last_value', flat=True).get()
+        return range(last_value - count + 1, last_value + 1)
+
+    @staticmethod
+    def _legacy_last_value(year):
+        # Chỉ chạy một lần mỗi năm: tiếp nối các số đã cấp trước khi có bộ đếm
+        numbers = Meeting.objects.filter(
+            meeting_number__startswith=f"HOP-{year}-"
+        ).values_list('meeting_number', flat=True)
+        last_value = 0
+        for number in numbers.iterator():
+            suffix = number.rsplit('-', 1)[-1]
+            if suffix.isdigit():
+                last_value = max(last_value, int(suffix))
+        return last_value
+
 #Cuộc họp
 class Meeting(models.Model):
+    SCHEDULED = 'Đã lên lịch'
+    ONGOING = 'Đang diễn ra'
+    FINISHED = 'Đã kết thúc'
+    CANCELLED = 'Bị hủy'
     STATUS_CHOICES = [
-        ('Đã lên lịch', 'Đã lên lịch'),
-        ('Đang diễn ra', 'Đang diễn ra'),
-        ('Đã kết thúc', 'Đã kết thúc'),
-        ('Bị hủy', 'Bị hủy'),
+        (SCHEDULED, 'Đã lên lịch'),
+        (ONGOING, 'Đang diễn ra'),
+        (FINISHED, 'Đã kết thúc'),
+        (CANCELLED, 'Bị hủy'),
     ]
     
     meeting_number = models.CharField(max_length=50, unique=True, null=True, verbose_name='Số cuộc họp')
@@ -177,6 +261,7 @@ class Meeting(models.Model):
     title = models.CharField("Nội dung", max_length=255)
     date = models.DateField("Ngày họp")
     time = models.TimeField("Thời gian", blank=True, null=True)
+    duration = models.PositiveIntegerField("Thời lượng (phút)", default=60)
     preparation = models.ForeignKey(User, on_delete=models.CASCADE, related_name='preparation_meetings', verbose_name='Người chuẩn bị', blank=True, null=True)
     host = models.ForeignKey(User, on_delete=models.CASCADE, related_name='hosted_meetings', verbose_name='Chủ trì')
     
@@ -188,17 +273,82 @@ class Meeting(models.Model):
     )
 
     def add_participant(self, user, participant_type='individual', department=None, organization=None, is_required=True):
+        from .membership import effective_attendee_ids
+        attending = effective_attendee_ids(self)
         participant = MeetingParticipant.objects.create(
             meeting=self,
             user=user,
             participant_type=participant_type,
             organization = organization,
             department=department,
-            is_required=is_required
+            is_required=is_required,
+            created_by_id=self.created_by_id,
         )
-        participant.send_notification()
+        participant.send_notification(exclude=attending)
         return participant
 
+    def add_participants(self, users=(), departments=(), organizations=(), is_required=True, created_by=None, notify=True):
+        """
+        Thêm nhiều thành phần tham dự (cá nhân, Khoa/Phòng, Ban/Đoàn thể) bằng một lệnh bulk_create.
+        Bỏ qua các thành phần đã có; thông báo được ghi theo lô vào outbox trong cùng giao dịch, chỉ cho những người
+        chưa tham dự trước lần gọi này (kể cả qua Khoa/Phòng, Tổ chức đã được mời trước đó).
+        """
+        from .membership import effective_attendee_ids, resolve_user_ids
+        from .notifications import notify_users
+        from .fragments import invalidate
+        from .ical import invalidate_participants
+        from .rollups import participant_state, record_participants
+
+        requested = []
+        for participant_type, field, values in (
+            ('individual', 'user_id', users),
+            ('department', 'department_id', departments),
+            ('group', 'organization_id', organizations),
+        ):
+            for value in values:
+                requested.append((participant_type, field, getattr(value, 'pk', value)))
+        if not requested:
+            return []
+
+        existing = set()
+        for user_id, department_id, organization_id in self.meeting_participants.values_list(
+            'user_id', 'department_id', 'organization_id'
+        ):
+            existing.update({('user_id', user_id), ('department_id', department_id), ('organization_id', organization_id)})
+
+        created_by_id = getattr(created_by, 'pk', created_by) or self.created_by_id
+        new_participants = []
+        for participant_type, field, pk in requested:
+            if (field, pk) in existing:
+                continue
+            existing.add((field, pk))
+            new_participants.append(MeetingParticipant(
+                meeting=self,
+                participant_type=participant_type,
+                is_required=is_required,
+                created_by_id=created_by_id,
+                **{field: pk},
+            ))
+
+        with transaction.atomic():
+            attending = effective_attendee_ids(self) if notify and new_participants else set()
+            created = MeetingParticipant.objects.bulk_create(new_participants)
+            record_participants([], [participant_state(participant) for participant in created])
+            invalidate()
+            invalidate_participants((p.user_id, p.department_id, p.organization_id) for p in created)
+            if notify:
+                notify_users(self, resolve_user_ids(
+                    (p.user_id, p.department_id, p.organization_id) for p in created
+                ) - attending)
+        return created
+
+    def effective_attendees(self):
+        """
+        Những người tham dự thực tế: cá nhân được mời và thành viên các Khoa/Phòng, Tổ chức được mời.
+        """
+        from .membership import effective_attendee_ids
+        return User.objects.filter(pk__in=effective_attendee_ids(self))
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(
@@ -219,25 +369,84 @@ class Meeting(models.Model):
         ordering = ['-date', '-time']
         verbose_name = 'Cuộc họp'
         verbose_name_plural = 'Cuộc họp'
+        indexes = [
+            # Phân trang theo con trỏ (date, time, id)
+            models.Index(fields=['-date', '-time', '-id'], name='meeting_date_time_id_idx'),
+            # Bộ máy chuyển trạng thái (statuses.advance_statuses) lọc theo trạng thái và ngày
+            models.Index(fields=['status', 'date'], name='meeting_status_date_idx'),
+        ]
     
-    def save(self, *args, **kwargs):
+    @staticmethod
+    def format_number(year, number):
+        return f"HOP-{year}-{number:04d}"
+
+    @classmethod
+    def assign_numbers(cls, meetings):
+        """
+        Cấp số cho các cuộc họp chưa có số bằng một lần giữ chỗ cả khối, dùng trước bulk_create.
+        """
+        pending = [meeting for meeting in meetings if not meeting.meeting_number]
+        if not pending:
+            return
+        current_year = timezone.now().year
+        for meeting, number in zip(pending, MeetingNumberSequence.reserve(current_year, len(pending))):
+            meeting.meeting_number = cls.format_number(current_year, number)
+
+    def save(self, *args, check_conflicts=True, **kwargs):
+        """
+        Lưu cuộc họp. Khi ngày, giờ, thời lượng, chủ trì, người chuẩn bị hoặc trạng thái thay đổi thì kiểm tra
+        trùng lịch và báo ValidationError; các form đã tự kiểm tra (kèm thành phần tham dự vừa gửi) truyền
+        check_conflicts=False.
+        """
+        if check_conflicts:
+            self.validate_schedule()
         if not self.meeting_number:
             current_year = timezone.now().year
-            last_meeting = Meeting.objects.filter(meeting_number__startswith=f"HOP-{current_year}-").order_by('-meeting_number').first()
-            
-            if last_meeting:
-                last_number = int(last_meeting.meeting_number.split('-')[-1])
-                new_number = last_number + 1
-            else:
-                new_number = 1
-            
-            self.meeting_number = f"HOP-{current_year}-{new_number:04d}"
+            new_number = MeetingNumberSequence.reserve(current_year)[0]
+            self.meeting_number = self.format_number(current_year, new_number)
         super().save(*args, **kwargs)
+
+    def validate_schedule(self):
+        from .conflicts import SCHEDULE_FIELDS, conflict_messages, find_conflicts
+        if self.time is None or self.status == self.CANCELLED:
+            return
+        if self.pk:
+            saved = Meeting.objects.filter(pk=self.pk).values_list(*SCHEDULE_FIELDS).first()
+            # Không đổi lịch thì không chặn việc sửa các thông tin khác
+            if saved == tuple(getattr(self, name) for name in SCHEDULE_FIELDS):
+                return
+        messages = conflict_messages(find_conflicts(self))
+        if messages:
+            raise ValidationError(messages)
         
     def __str__(self):
         return f"{self.meeting_number} - {self.title} - {self.date} {self.time if self.time else ''}"
 
+    @property
+    def starts_at(self):
+        # Cuộc họp không có giờ được tính từ đầu ngày
+        return timezone.make_aware(datetime.combine(self.date, self.time or dt_time.min))
+
+    @property
+    def ends_at(self):
+        return self.starts_at + timedelta(minutes=self.duration or 0)
+
 # Tệp đính kèm   
+#Nội dung tệp lưu một lần theo SHA-256, dùng chung cho mọi tệp đính kèm có cùng nội dung
+class FileBlob(models.Model):
+    sha256 = models.CharField("SHA-256", max_length=64, primary_key=True)
+    file = models.FileField(upload_to='blobs/', max_length=255, verbose_name='Tập tin')
+    size = models.PositiveBigIntegerField("Kích thước (byte)")
+    ref_count = models.PositiveIntegerField("Số tệp đính kèm sử dụng", default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Nội dung tệp'
+        verbose_name_plural = 'Nội dung tệp'
+
+    def __str__(self):
+        return self.sha256
+
 class MeetingFile(models.Model):
     meeting = models.ForeignKey(
         Meeting,
@@ -245,7 +454,15 @@ class MeetingFile(models.Model):
         related_name='files',
         verbose_name='Cuộc họp'
     )
-    file = models.FileField(upload_to='meeting_files/', verbose_name='Tập tin')
+    file = models.FileField(upload_to='meeting_files/', max_length=255, verbose_name='Tập tin')
+    # Tệp tải lên theo từng phần trỏ tới nội dung dùng chung; `file` khi đó là đường dẫn của blob
+    blob = models.ForeignKey(
+        FileBlob,
+        on_delete=models.PROTECT,
+        related_name='meeting_files',
+        verbose_name='Nội dung tệp',
+        blank=True, null=True,
+    )
     name = models.CharField(max_length=255, verbose_name='Tên file')
     uploaded_at = models.DateTimeField(auto_now_add=True)
     uploaded_by = models.ForeignKey(
@@ -262,6 +479,82 @@ class MeetingFile(models.Model):
     def __str__(self):
         return f"{self.name}"
 
+#Ảnh thu nhỏ và bản xem trước của tệp đính kèm, tạo bởi lệnh generate_previews
+class FilePreview(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Chờ tạo'),
+        ('processing', 'Đang tạo'),
+        ('ready', 'Đã tạo'),
+        ('unsupported', 'Không hỗ trợ'),
+        ('failed', 'Lỗi'),
+    ]
+
+    meeting_file = models.OneToOneField(
+        MeetingFile,
+        on_delete=models.CASCADE,
+        related_name='preview',
+        verbose_name='Tệp đính kèm'
+    )
+    # Ảnh được lưu trên đĩa theo mã băm nội dung nên các tệp giống nhau dùng chung một bản
+    sha256 = models.CharField("SHA-256", max_length=64, blank=True)
+    status = models.CharField("Trạng thái", max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField("Số lần thử", default=0)
+    claim_token = models.CharField(max_length=32, blank=True)
+    locked_until = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField("Lỗi gần nhất", blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Bản xem trước tệp'
+        verbose_name_plural = 'Bản xem trước tệp'
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='preview_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.meeting_file} ({self.get_status_display()})"
+
+#Phiên tải lên theo từng phần, có thể tiếp tục từ vị trí `received` khi bị gián đoạn
+class UploadSession(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    meeting = models.ForeignKey(
+        Meeting,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions',
+        verbose_name='Cuộc họp'
+    )
+    uploaded_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions',
+        verbose_name='Người tải lên'
+    )
+    name = models.CharField("Tên file", max_length=255)
+    size = models.PositiveBigIntegerField("Kích thước (byte)")
+    received = models.PositiveBigIntegerField("Đã nhận (byte)", default=0)
+    expected_sha256 = models.CharField("SHA-256 do máy khách gửi", max_length=64, blank=True)
+    meeting_file = models.ForeignKey(
+        MeetingFile,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Tệp đính kèm đã tạo',
+        blank=True, null=True,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Phiên tải lên'
+        verbose_name_plural = 'Phiên tải lên'
+
+    def __str__(self):
+        return f"{self.name} ({self.received}/{self.size})"
+
+    @property
+    def is_complete(self):
+        return self.meeting_file_id is not None
+
 # Biên bản cuộc họp
 class MeetingMinutes(models.Model):
     meeting = models.OneToOneField(
@@ -271,7 +564,10 @@ class MeetingMinutes(models.Model):
         verbose_name='Cuộc họp'
     )
     content = models.TextField("Nội dung biên bản")
+    # Số phiên bản hiện tại, tăng mỗi lần nội dung thay đổi (lịch sử lưu trong MinutesRevision)
+    version = models.PositiveIntegerField("Phiên bản", default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -286,6 +582,63 @@ class MeetingMinutes(models.Model):
     def __str__(self):
         return f"Biên bản {self.meeting.meeting_number} - {self.meeting.title}"
 
+    def save(self, *args, edited_by=None, **kwargs):
+        """
+        Lưu biên bản; `edited_by` là người sửa được ghi vào lịch sử (mặc định là thư ký với phiên bản đầu).
+        Nếu biên bản đã được lưu ở phiên bản khác kể từ lúc đọc thì báo VersionConflict.
+        """
+        from .minutes import VersionConflict, record_revision
+        with transaction.atomic():
+            previous = None
+            if self.pk:
+                # Khoá dòng để hai lần lưu đồng thời không cùng tạo một phiên bản
+                row = MeetingMinutes.objects.select_for_update().filter(pk=self.pk).values_list(
+                    'content', 'version',
+                ).first()
+                if row is not None:
+                    previous, current = row
+                    if current != self.version:
+                        raise VersionConflict(current)
+            changed = previous is None or previous != self.content
+            if changed:
+                self.version += 1
+            super().save(*args, **kwargs)
+            if changed:
+                user_id = edited_by.pk if edited_by is not None else None
+                if previous is None and user_id is None:
+                    user_id = self.created_by_id
+                record_revision(self, previous, user_id)
+
+#Lịch sử biên bản: bản đầy đủ định kỳ, còn lại là phần thay đổi so với phiên bản trước (nén zlib)
+class MinutesRevision(models.Model):
+    minutes = models.ForeignKey(
+        MeetingMinutes,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+        verbose_name='Biên bản'
+    )
+    version = models.PositiveIntegerField("Phiên bản")
+    is_snapshot = models.BooleanField("Bản đầy đủ", default=False)
+    data = models.BinaryField("Dữ liệu")
+    created_at = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='minutes_revisions',
+        verbose_name='Người sửa',
+        blank=True, null=True,
+    )
+
+    class Meta:
+        verbose_name = 'Phiên bản biên bản'
+        verbose_name_plural = 'Phiên bản biên bản'
+        constraints = [
+            models.UniqueConstraint(fields=['minutes', 'version'], name='unique_minutes_revision'),
+        ]
+
+    def __str__(self):
+        return f"{self.minutes} - phiên bản {self.version}"
+
 #Thông báo  
 class Notification(models.Model):
     TYPES_CHOICES = [
@@ -317,6 +670,113 @@ class Notification(models.Model):
         ordering = ['-sent_at']
         verbose_name = 'Thông báo'
         verbose_name_plural = 'Thông báo'
+        indexes = [
+            # Chỉ đánh chỉ mục các thông báo chưa đọc (đếm và liệt kê cho badge)
+            models.Index(fields=['user', '-sent_at'], condition=Q(is_read=False), name='notification_unread_idx'),
+        ]
     
     def __str__(self):
         return f"Thông báo cho {self.meeting.meeting_number} - {self.message[:50]}"
+
+#Hàng đợi gửi thông báo ra bên ngoài (transactional outbox)
+class NotificationOutbox(models.Model):
+    PROVIDER_CHOICES = [
+        ('zalo', 'Zalo'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Chờ gửi'),
+        ('sending', 'Đang gửi'),
+        ('sent', 'Đã gửi'),
+        ('failed', 'Gửi thất bại'),
+    ]
+
+    notification = models.ForeignKey(
+        Notification,
+        on_delete=models.CASCADE,
+        related_name='outbox_entries',
+        verbose_name='Thông báo'
+    )
+    provider = models.CharField("Kênh gửi", max_length=20, choices=PROVIDER_CHOICES, default='zalo')
+    recipient = models.CharField("Người nhận", max_length=100)
+    message = models.TextField("Nội dung")
+    idempotency_key = models.CharField(max_length=100, unique=True)
+    status = models.CharField("Trạng thái", max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField("Số lần thử", default=0)
+    next_attempt_at = models.DateTimeField("Lần thử tiếp theo", default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True, default='')
+    locked_until = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField("Lỗi gần nhất", blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = 'Hàng đợi thông báo'
+        verbose_name_plural = 'Hàng đợi thông báo'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+            models.Index(fields=['claim_token'], name='outbox_claim_token_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} -> {self.recipient} ({self.get_status_display()})"
+
+#Lịch nhắc cuộc họp, được duy trì khi cuộc họp thay đổi và gửi bởi lệnh run_reminder_scheduler
+class MeetingReminder(models.Model):
+    meeting = models.ForeignKey(
+        Meeting,
+        on_delete=models.CASCADE,
+        related_name='reminders',
+        verbose_name='Cuộc họp'
+    )
+    offset_minutes = models.PositiveIntegerField("Nhắc trước (phút)")
+    remind_at = models.DateTimeField("Thời điểm nhắc")
+    sent_at = models.DateTimeField("Đã nhắc lúc", blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Lịch nhắc cuộc họp'
+        verbose_name_plural = 'Lịch nhắc cuộc họp'
+        constraints = [
+            models.UniqueConstraint(fields=['meeting', 'offset_minutes'], name='unique_meeting_reminder_offset'),
+        ]
+        indexes = [
+            models.Index(fields=['remind_at'], condition=Q(sent_at__isnull=True), name='reminder_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"Nhắc {self.meeting_id} lúc {self.remind_at}"
+
+#Số liệu tham dự tổng hợp theo ngày và theo tháng cho từng người, Khoa/Phòng, Tổ chức
+class AttendanceRollup(models.Model):
+    PERIOD_CHOICES = [
+        ('day', 'Ngày'),
+        ('month', 'Tháng'),
+    ]
+    KIND_CHOICES = [
+        ('user', 'Cá nhân'),
+        ('department', 'Khoa/Phòng'),
+        ('organization', 'Tổ chức'),
+    ]
+
+    kind = models.CharField("Đối tượng", max_length=12, choices=KIND_CHOICES)
+    period = models.CharField("Chu kỳ", max_length=5, choices=PERIOD_CHOICES)
+    object_id = models.PositiveIntegerField("Mã đối tượng")
+    # Ngày đầu tháng với các dòng theo tháng
+    date = models.DateField("Ngày")
+    invited = models.IntegerField("Số lượt mời", default=0)
+    attended = models.IntegerField("Số lượt có mặt", default=0)
+    required = models.IntegerField("Số lượt bắt buộc", default=0)
+    required_attended = models.IntegerField("Số lượt bắt buộc có mặt", default=0)
+
+    class Meta:
+        verbose_name = 'Tổng hợp tham dự'
+        verbose_name_plural = 'Tổng hợp tham dự'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'period', 'object_id', 'date'], name='unique_attendance_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'period', 'date'], name='attendance_rollup_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.object_id} - {self.date} ({self.get_period_display()})"
@@ -0,0 +1,166 @@
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Notification, NotificationOutbox, UserProfile
+
+#Bộ đếm thông báo chưa đọc hết hạn sau khoảng này và được đếm lại từ CSDL (đối soát định kỳ).
+#Bộ đếm chỉ đúng khi cache dùng chung giữa các tiến trình và add/incr là nguyên tử (Redis, xem CACHES).
+UNREAD_COUNT_TIMEOUT = 10 * 60
+
+
+def meeting_message(meeting, type):
+    when = f"{meeting.date:%d/%m/%Y}" + (f" {meeting.time:%H:%M}" if meeting.time else '')
+    if type == 'meeting_created':
+        prefix = 'Bạn được mời tham dự cuộc họp'
+    elif type == 'meeting_reminder':
+        prefix = 'Nhắc nhở cuộc họp'
+    else:
+        prefix = 'Cập nhật cuộc họp'
+    return f"{prefix} {meeting.meeting_number} - {meeting.title} ({when})"
+
+
+def notify_users(meeting, user_ids, type='meeting_created', message=None):
+    """
+    Tạo thông báo cho nhiều người dùng và ghi các tin Zalo cần gửi vào outbox
+    trong cùng một giao dịch. Số truy vấn không phụ thuộc vào số người nhận.
+    """
+    return notify_many([(meeting, user_ids, message)], type)
+
+
+def notify_many(items, type):
+    """
+    Như notify_users nhưng cho nhiều cuộc họp cùng lúc: `items` là các bộ (meeting, user_ids, message).
+    """
+    batch = []
+    for meeting, user_ids, message in items:
+        message = message or meeting_message(meeting, type)
+        batch.extend(
+            Notification(user_id=user_id, meeting_id=meeting.pk, type=type, message=message)
+            for user_id in dict.fromkeys(user_ids)
+        )
+    if not batch:
+        return []
+    with transaction.atomic():
+        notifications = Notification.objects.bulk_create(batch)
+        zalo_ids = dict(
+            UserProfile.objects.filter(user_id__in={n.user_id for n in notifications}, zalo_notification=True)
+            .exclude(zalo_id__isnull=True).exclude(zalo_id='')
+            .values_list('user_id', 'zalo_id')
+        )
+        NotificationOutbox.objects.bulk_create([
+            NotificationOutbox(
+                notification=notification,
+                provider='zalo',
+                recipient=zalo_ids[notification.user_id],
+                message=notification.message,
+                idempotency_key=f"zalo:{notification.pk}",
+            )
+            for notification in notifications
+            if notification.user_id in zalo_ids
+        ])
+        adjust_unread_counts_on_commit(Counter(n.user_id for n in notifications))
+    return notifications
+
+
+def _unread_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def _missed_key(user_id):
+    return f"notifications:unread:missed:{user_id}"
+
+
+def unread_count(user):
+    """
+    Số thông báo chưa đọc của người dùng, đọc từ cache; chỉ đếm trong CSDL khi cache chưa có.
+    """
+    user_id = getattr(user, 'pk', user)
+    key, missed_key = _unread_key(user_id), _missed_key(user_id)
+    found = cache.get_many([key, missed_key])
+    count = found.get(key)
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.add(key, count, UNREAD_COUNT_TIMEOUT)
+        # Có thay đổi bị bỏ qua (bộ đếm chưa có) trong lúc đếm: số vừa lưu có thể thiếu, lần đọc sau đếm lại
+        if cache.get(missed_key) != found.get(missed_key):
+            cache.delete(key)
+    return count
+
+
+async def aunread_count(user):
+    """
+    Bản bất đồng bộ của unread_count (cache và ORM async).
+    """
+    user_id = getattr(user, 'pk', user)
+    key, missed_key = _unread_key(user_id), _missed_key(user_id)
+    found = await cache.aget_many([key, missed_key])
+    count = found.get(key)
+    if count is None:
+        count = await Notification.objects.filter(user_id=user_id, is_read=False).acount()
+        await cache.aadd(key, count, UNREAD_COUNT_TIMEOUT)
+        if await cache.aget(missed_key) != found.get(missed_key):
+            await cache.adelete(key)
+    return count
+
+
+def adjust_unread_counts(deltas):
+    """
+    Cộng dồn thay đổi {user_id: delta} vào các bộ đếm đang có trong cache.
+    Bộ đếm chưa có thì chỉ ghi dấu, lần đọc sau sẽ đếm lại.
+    """
+    missed = []
+    for user_id, delta in deltas.items():
+        if not delta:
+            continue
+        try:
+            if cache.incr(_unread_key(user_id), delta) < 0:
+                missed.append(user_id)
+        except ValueError:
+            missed.append(user_id)
+    if missed:
+        cache.delete_many([_unread_key(user_id) for user_id in missed])
+        # Ghi dấu để lần đếm đang diễn ra (nếu có) không lưu số thiếu các thay đổi này
+        marker = time.time_ns()
+        cache.set_many({_missed_key(user_id): marker for user_id in missed}, UNREAD_COUNT_TIMEOUT)
+
+
+def adjust_unread_counts_on_commit(deltas):
+    deltas = dict(deltas)
+    if deltas:
+        transaction.on_commit(lambda: adjust_unread_counts(deltas))
+
+
+def mark_read(user, ids=None):
+    """
+    Đánh dấu đã đọc tất cả (hoặc các `ids`) thông báo của người dùng bằng một lệnh UPDATE.
+    """
+    notifications = Notification.objects.filter(user=user, is_read=False)
+    if ids is not None:
+        notifications = notifications.filter(pk__in=ids)
+    updated = notifications.update(is_read=True)
+    adjust_unread_counts_on_commit({user.pk: -updated})
+    return updated
+
+
+async def amark_read(user, ids=None):
+    """
+    Bản bất đồng bộ của mark_read. View async chạy ở chế độ autocommit nên lệnh UPDATE đã commit
+    khi cập nhật bộ đếm.
+    """
+    notifications = Notification.objects.filter(user=user, is_read=False)
+    if ids is not None:
+        notifications = notifications.filter(pk__in=ids)
+    updated = await notifications.aupdate(is_read=True)
+    if updated:
+        key = _unread_key(user.pk)
+        try:
+            missed = await cache.aincr(key, -updated) < 0
+        except ValueError:
+            missed = True
+        if missed:
+            await cache.adelete(key)
+            await cache.aset(_missed_key(user.pk), time.time_ns(), UNREAD_COUNT_TIMEOUT)
+    return updated
@@ -0,0 +1,136 @@
+import base64
+from datetime import date as dt_date, time as dt_time
+
+from django.db.models import F, Q
+
+#Số cuộc họp trên mỗi trang
+PAGE_SIZE = 20
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(meeting):
+    """
+    Mã hoá vị trí (date, time, id) của một cuộc họp thành chuỗi an toàn cho URL.
+    """
+    time_part = meeting.time.isoformat() if meeting.time else ''
+    raw = f"{meeting.date.isoformat()}|{time_part}|{meeting.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        date_part, time_part, pk_part = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return (
+            dt_date.fromisoformat(date_part),
+            dt_time.fromisoformat(time_part) if time_part else None,
+            int(pk_part),
+        )
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor(token)
+
+
+# Thứ tự: ngày giảm dần, giờ giảm dần (cuộc họp không có giờ đứng cuối ngày), id giảm dần.
+# Khớp với index meeting_date_time_id_idx.
+ORDERING = (F('date').desc(), F('time').desc(nulls_last=True), F('id').desc())
+REVERSE_ORDERING = (F('date').asc(), F('time').asc(nulls_first=True), F('id').asc())
+
+
+def _after(date, time, pk):
+    """
+    Các cuộc họp đứng sau vị trí (date, time, pk) theo ORDERING.
+    """
+    if time is None:
+        same_day = Q(time__isnull=True, id__lt=pk)
+    else:
+        same_day = (
+            Q(time__lt=time)
+            | Q(time__isnull=True)
+            | Q(time=time, id__lt=pk)
+        )
+    # Cận date__lte đứng riêng để CSDL tìm thẳng vào index thay vì quét từ đầu (biểu thức OR không dùng được index)
+    return Q(date__lte=date) & (Q(date__lt=date) | (Q(date=date) & same_day))
+
+
+def _before(date, time, pk):
+    """
+    Các cuộc họp đứng trước vị trí (date, time, pk) theo ORDERING.
+    """
+    if time is None:
+        same_day = Q(time__isnull=False) | Q(time__isnull=True, id__gt=pk)
+    else:
+        same_day = Q(time__gt=time) | Q(time=time, id__gt=pk)
+    return Q(date__gte=date) & (Q(date__gt=date) | (Q(date=date) & same_day))
+
+
+class KeysetPage:
+    """
+    Một trang kết quả phân trang theo con trỏ (keyset) trên (date, time, id).
+    Chi phí của trang N bằng trang 1 vì không dùng OFFSET.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def _page_query(queryset, after=None, before=None, page_size=PAGE_SIZE):
+    """
+    Truy vấn lấy page_size + 1 cuộc họp sau con trỏ `after` hoặc trước con trỏ `before`.
+    """
+    if before:
+        return queryset.filter(_before(*decode_cursor(before))).order_by(*REVERSE_ORDERING)[:page_size + 1]
+    if after:
+        queryset = queryset.filter(_after(*decode_cursor(after)))
+    return queryset.order_by(*ORDERING)[:page_size + 1]
+
+
+def _make_page(rows, after=None, before=None, page_size=PAGE_SIZE):
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if before:
+        rows.reverse()
+        return KeysetPage(
+            rows,
+            next_cursor=encode_cursor(rows[-1]) if rows else before,
+            previous_cursor=encode_cursor(rows[0]) if rows and has_more else None,
+        )
+    return KeysetPage(
+        rows,
+        next_cursor=encode_cursor(rows[-1]) if rows and has_more else None,
+        previous_cursor=encode_cursor(rows[0]) if rows and after else None,
+    )
+
+
+def paginate_meetings(queryset, after=None, before=None, page_size=PAGE_SIZE):
+    """
+    Lấy một trang cuộc họp sau con trỏ `after` hoặc trước con trỏ `before`.
+    """
+    rows = list(_page_query(queryset, after, before, page_size))
+    return _make_page(rows, after, before, page_size)
+
+
+async def apaginate_meetings(queryset, after=None, before=None, page_size=PAGE_SIZE):
+    """
+    Bản bất đồng bộ của paginate_meetings (ORM async, dùng trong view async).
+    """
+    rows = [meeting async for meeting in _page_query(queryset, after, before, page_size)]
+    return _make_page(rows, after, before, page_size)
@@ -0,0 +1,234 @@
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import FilePreview
+
+logger = logging.getLogger(__name__)
+
+IMAGE = 'image'
+PDF = 'pdf'
+OFFICE = 'office'
+
+EXTENSIONS = {
+    IMAGE: {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tif', '.tiff'},
+    PDF: {'.pdf'},
+    OFFICE: {'.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.odt', '.ods', '.odp', '.rtf'},
+}
+
+THUMBNAIL = 'thumbnail'
+PREVIEW = 'preview'
+#Cạnh dài nhất (pixel) của từng loại ảnh
+SIZES = {THUMBNAIL: 320, PREVIEW: 1280}
+
+
+def file_kind(name):
+    ext = os.path.splitext(name)[1].lower()
+    for kind, extensions in EXTENSIONS.items():
+        if ext in extensions:
+            return kind
+    return None
+
+
+def supported(kind):
+    """
+    Máy chủ có đủ công cụ để tạo ảnh cho loại tệp này không (Pillow, pdftoppm, LibreOffice).
+    """
+    if kind == IMAGE:
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            return False
+        return True
+    if kind not in (PDF, OFFICE) or not shutil.which(settings.MEETING_PREVIEW_PDFTOPPM):
+        return False
+    return kind == PDF or bool(shutil.which(settings.MEETING_PREVIEW_SOFFICE))
+
+
+def cache_dir(sha256):
+    return os.path.join(settings.MEETING_PREVIEW_ROOT, sha256[:2], sha256)
+
+
+def image_path(sha256, variant):
+    return os.path.join(cache_dir(sha256), f"{variant}.jpg")
+
+
+def is_cached(sha256):
+    return all(os.path.exists(image_path(sha256, variant)) for variant in SIZES)
+
+
+def discard(sha256):
+    """
+    Xoá ảnh đã tạo khi không còn tệp đính kèm nào có cùng nội dung.
+    """
+    if sha256 and not FilePreview.objects.filter(sha256=sha256).exists():
+        shutil.rmtree(cache_dir(sha256), ignore_errors=True)
+
+
+def content_hash(meeting_file):
+    if meeting_file.blob_id:
+        return meeting_file.blob_id
+    # Tệp tải lên theo cách cũ: băm dần nội dung trên đĩa
+    hasher = hashlib.sha256()
+    with meeting_file.file.storage.open(meeting_file.file.name, 'rb') as file:
+        for chunk in file.chunks():
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+# Các hàm dưới đây chạy trong tiến trình con của ProcessPoolExecutor, không dùng ORM
+
+def _run(args, timeout):
+    subprocess.run(args, check=True, timeout=timeout, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+def _office_to_pdf(source, workdir, soffice, timeout):
+    # Mỗi lần chuyển đổi dùng hồ sơ LibreOffice riêng để các tiến trình chạy song song không tranh chấp
+    profile = os.path.join(workdir, 'profile')
+    _run([
+        soffice, '--headless', '--norestore', f'-env:UserInstallation=file://{profile}',
+        '--convert-to', 'pdf', '--outdir', workdir, source,
+    ], timeout)
+    return os.path.join(workdir, os.path.splitext(os.path.basename(source))[0] + '.pdf')
+
+
+def _pdf_first_page(source, target, size, pdftoppm, timeout):
+    prefix = os.path.splitext(target)[0]
+    _run([pdftoppm, '-jpeg', '-f', '1', '-l', '1', '-singlefile', '-scale-to', str(size), source, prefix], timeout)
+
+
+def _image_variants(source, workdir):
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        image.seek(0)
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        for variant, size in SIZES.items():
+            copy = image.copy()
+            copy.thumbnail((size, size))
+            copy.save(os.path.join(workdir, f"{variant}.jpg"), 'JPEG', quality=80, optimize=True)
+
+
+def render(source, kind, target_dir, tools, timeout):
+    """
+    Tạo thumbnail.jpg và preview.jpg (trang đầu với PDF, tài liệu văn phòng) vào `target_dir`.
+    Ảnh được tạo trong thư mục tạm rồi chuyển vào nên không ai đọc được ảnh ghi dở.
+    """
+    parent = os.path.dirname(target_dir)
+    os.makedirs(parent, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=parent) as workdir:
+        if kind == IMAGE:
+            _image_variants(source, workdir)
+        else:
+            if kind == OFFICE:
+                source = _office_to_pdf(source, workdir, tools['soffice'], timeout)
+            for variant, size in SIZES.items():
+                _pdf_first_page(source, os.path.join(workdir, f"{variant}.jpg"), size, tools['pdftoppm'], timeout)
+        os.makedirs(target_dir, exist_ok=True)
+        for variant in SIZES:
+            os.replace(os.path.join(workdir, f"{variant}.jpg"), os.path.join(target_dir, f"{variant}.jpg"))
+
+
+def _due():
+    return Q(status='pending') | Q(status='processing', locked_until__lt=timezone.now())
+
+
+def claim_batch(batch_size, lease):
+    """
+    Nhận một lô tệp cần tạo ảnh; mỗi tệp chỉ được một worker nhận nhờ claim_token.
+    """
+    ids = list(FilePreview.objects.filter(_due()).order_by('created_at').values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    FilePreview.objects.filter(_due(), pk__in=ids).update(
+        status='processing', claim_token=token, locked_until=timezone.now() + lease,
+    )
+    return list(
+        FilePreview.objects.select_related('meeting_file__blob').filter(claim_token=token, status='processing')
+    )
+
+
+class PreviewWorker:
+    """
+    Tạo ảnh xem trước trong một pool tiến trình. Request tải lên chỉ ghi một dòng FilePreview chờ xử lý.
+    """
+
+    def __init__(self, workers=2, batch_size=20, timeout=None, max_attempts=None):
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.batch_size = batch_size
+        self.timeout = timeout or settings.MEETING_PREVIEW_TIMEOUT
+        self.max_attempts = max_attempts or settings.MEETING_PREVIEW_MAX_ATTEMPTS
+        self.tools = {'soffice': settings.MEETING_PREVIEW_SOFFICE, 'pdftoppm': settings.MEETING_PREVIEW_PDFTOPPM}
+
+    def _prepare(self, preview):
+        """
+        Trả về (nguồn, loại) cần tạo ảnh, hoặc None khi đã xác định xong trạng thái.
+        """
+        meeting_file = preview.meeting_file
+        kind = file_kind(meeting_file.name)
+        if kind is None or not supported(kind):
+            preview.status = 'unsupported'
+            return None
+        preview.sha256 = content_hash(meeting_file)
+        if is_cached(preview.sha256):
+            preview.status = 'ready'
+            return None
+        return meeting_file.file.path, kind
+
+    def _failed(self, preview, error):
+        preview.attempts += 1
+        preview.last_error = str(error)[:1000]
+        preview.status = 'failed' if preview.attempts >= self.max_attempts else 'pending'
+
+    def process_once(self):
+        """
+        Xử lý một lô; trả về số tệp đã xử lý.
+        """
+        previews = claim_batch(self.batch_size, lease=timedelta(seconds=self.timeout * 3))
+        if not previews:
+            return 0
+        futures = []
+        for preview in previews:
+            try:
+                job = self._prepare(preview)
+            except (OSError, NotImplementedError) as e:
+                self._failed(preview, e)
+                continue
+            if job:
+                source, kind = job
+                futures.append((preview, self.pool.submit(render, source, kind, cache_dir(preview.sha256), self.tools, self.timeout)))
+
+        for preview, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                logger.warning('Không tạo được ảnh xem trước cho tệp %s: %s', preview.meeting_file_id, e)
+                self._failed(preview, e)
+            else:
+                preview.status = 'ready'
+                preview.last_error = ''
+
+        now = timezone.now()
+        for preview in previews:
+            preview.claim_token = ''
+            preview.locked_until = None
+            preview.updated_at = now
+        FilePreview.objects.bulk_update(
+            previews, ['status', 'sha256', 'attempts', 'last_error', 'claim_token', 'locked_until', 'updated_at'],
+        )
+        logger.info('Ảnh xem trước: đã xử lý %d tệp', len(previews))
+        return len(previews)
+
+    def close(self):
+        self.pool.shutdown(wait=True)
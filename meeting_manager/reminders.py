@@ -0,0 +1,174 @@
+import heapq
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .membership import effective_attendee_map
+from .models import Meeting, MeetingReminder
+from .notifications import notify_many
+
+logger = logging.getLogger(__name__)
+
+SCHEDULED = Meeting.SCHEDULED
+
+
+def reminder_offsets():
+    return sorted(set(settings.MEETING_REMINDER_OFFSETS), reverse=True)
+
+
+def schedule_reminders(meeting, now=None):
+    """
+    Đồng bộ các lịch nhắc của một cuộc họp với ngày, giờ và trạng thái hiện tại.
+    Lịch nhắc đã gửi chỉ được đặt lại khi thời điểm nhắc thay đổi.
+    """
+    now = now or timezone.now()
+    existing = {reminder.offset_minutes: reminder for reminder in meeting.reminders.all()}
+    if meeting.status != SCHEDULED:
+        MeetingReminder.objects.filter(meeting=meeting, sent_at__isnull=True).delete()
+        return
+
+    starts_at = meeting.starts_at
+    offsets = reminder_offsets()
+    new_reminders = []
+    changed = []
+    for offset in offsets:
+        remind_at = starts_at - timedelta(minutes=offset)
+        reminder = existing.get(offset)
+        if reminder is None:
+            if remind_at > now:
+                new_reminders.append(MeetingReminder(meeting=meeting, offset_minutes=offset, remind_at=remind_at))
+        elif reminder.remind_at != remind_at:
+            reminder.remind_at = remind_at
+            reminder.sent_at = None
+            reminder.updated_at = now
+            changed.append(reminder)
+
+    stale = [offset for offset in existing if offset not in offsets]
+    if stale:
+        MeetingReminder.objects.filter(meeting=meeting, offset_minutes__in=stale, sent_at__isnull=True).delete()
+    if new_reminders:
+        MeetingReminder.objects.bulk_create(new_reminders, ignore_conflicts=True)
+    if changed:
+        MeetingReminder.objects.bulk_update(changed, ['remind_at', 'sent_at', 'updated_at'])
+
+
+def schedule_new_reminders(meetings, now=None):
+    """
+    Tạo lịch nhắc cho các cuộc họp vừa được tạo bằng bulk_create (chưa có lịch nhắc nào) bằng một lệnh bulk_create.
+    """
+    now = now or timezone.now()
+    offsets = reminder_offsets()
+    new_reminders = []
+    for meeting in meetings:
+        if meeting.status != SCHEDULED:
+            continue
+        starts_at = meeting.starts_at
+        for offset in offsets:
+            remind_at = starts_at - timedelta(minutes=offset)
+            if remind_at > now:
+                new_reminders.append(MeetingReminder(meeting=meeting, offset_minutes=offset, remind_at=remind_at))
+    MeetingReminder.objects.bulk_create(new_reminders, ignore_conflicts=True)
+
+
+def fire_reminders(reminder_ids, now=None):
+    """
+    Gửi các lịch nhắc đến hạn. Việc đánh dấu đã gửi và tạo thông báo nằm trong cùng giao dịch
+    nên khởi động lại bộ lập lịch không gây nhắc trùng. Trả về số cuộc họp đã được nhắc.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        reminders = list(
+            MeetingReminder.objects.select_for_update()
+            .select_related('meeting')
+            .filter(pk__in=reminder_ids, sent_at__isnull=True, remind_at__lte=now, meeting__status=SCHEDULED)
+        )
+        if not reminders:
+            return 0
+        MeetingReminder.objects.filter(pk__in=[r.pk for r in reminders]).update(sent_at=now, updated_at=now)
+        # Cuộc họp đã bắt đầu thì không nhắc nữa
+        meetings = {r.meeting_id: r.meeting for r in reminders if r.meeting.starts_at > now}
+        if not meetings:
+            return 0
+        attendees = effective_attendee_map(meetings)
+        notify_many(
+            [
+                (
+                    meeting,
+                    attendees[meeting.pk] | {pk for pk in (meeting.host_id, meeting.preparation_id) if pk},
+                    None,
+                )
+                for meeting in meetings.values()
+            ],
+            'meeting_reminder',
+        )
+    return len(meetings)
+
+
+class ReminderScheduler:
+    """
+    Giữ các lịch nhắc sắp đến hạn trong một min-heap theo thời điểm nhắc.
+    Chỉ nạp các lịch nhắc trong khoảng `horizon` tới và các lịch nhắc vừa thay đổi,
+    không quét toàn bộ cuộc họp.
+    """
+
+    def __init__(self, horizon=timedelta(hours=6), sync_interval=timedelta(seconds=30), lookback=timedelta(minutes=1)):
+        self.horizon = horizon
+        self.sync_interval = sync_interval
+        # Bù cho các giao dịch commit chậm hơn thời điểm ghi updated_at
+        self.lookback = lookback
+        self.heap = []
+        self.scheduled = {}
+        self.window_end = None
+        self.synced_at = None
+
+    def sync(self, now=None):
+        """
+        Nạp các lịch nhắc mới vào khoảng nhìn trước hoặc đã thay đổi từ lần đồng bộ trước.
+        """
+        now = now or timezone.now()
+        window_end = now + self.horizon
+        pending = MeetingReminder.objects.filter(sent_at__isnull=True, remind_at__lte=window_end)
+        if self.synced_at is not None:
+            pending = pending.filter(
+                Q(updated_at__gte=self.synced_at - self.lookback) | Q(remind_at__gt=self.window_end)
+            )
+        # Ghi nhận trước khi truy vấn để không bỏ sót thay đổi xảy ra trong lúc truy vấn
+        self.synced_at = now
+        self.window_end = window_end
+        for pk, remind_at in pending.values_list('pk', 'remind_at').iterator():
+            if self.scheduled.get(pk) != remind_at:
+                self.scheduled[pk] = remind_at
+                heapq.heappush(self.heap, (remind_at, pk))
+
+    def pop_due(self, now=None):
+        now = now or timezone.now()
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            remind_at, pk = heapq.heappop(self.heap)
+            # Bỏ qua mục cũ khi lịch nhắc đã bị dời sang thời điểm khác
+            if self.scheduled.get(pk) == remind_at:
+                del self.scheduled[pk]
+                due.append(pk)
+        return due
+
+    def next_wakeup(self, now=None):
+        now = now or timezone.now()
+        wakeup = self.synced_at + self.sync_interval
+        if self.heap:
+            wakeup = min(wakeup, self.heap[0][0])
+        return max(0.0, (wakeup - now).total_seconds())
+
+    def tick(self, now=None):
+        now = now or timezone.now()
+        if self.synced_at is None or now >= self.synced_at + self.sync_interval:
+            self.sync(now)
+        due = self.pop_due(now)
+        if not due:
+            return 0
+        sent = fire_reminders(due, now)
+        logger.info('Đã gửi %d lịch nhắc', sent)
+        return sent
@@ -0,0 +1,339 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Max, Min, Q, Sum
+
+from . import membership
+from .agenda import month_bounds
+from .autocomplete import user_label
+from .models import AttendanceRollup, Department, Meeting, MeetingParticipant, Organization, UserAffiliation
+
+DAY = 'day'
+MONTH = 'month'
+USER = membership.USER
+DEPARTMENT = membership.DEPARTMENT
+ORGANIZATION = membership.ORGANIZATION
+KINDS = (USER, DEPARTMENT, ORGANIZATION)
+COUNTERS = ('invited', 'attended', 'required', 'required_attended')
+#Cuộc họp bị hủy không được tính vào tỷ lệ tham dự
+EXCLUDED_STATUSES = (Meeting.CANCELLED,)
+
+_NO_GROUPS = (frozenset(), frozenset())
+
+
+def _counters():
+    return [0] * len(COUNTERS)
+
+
+def _bump(deltas, kind, pk, day, values):
+    for key in ((kind, DAY, pk, day), (kind, MONTH, pk, day.replace(day=1))):
+        counters = deltas[key]
+        for index, value in enumerate(values):
+            counters[index] += value
+
+
+def _values(is_required, attended, sign):
+    return (sign, sign * attended, sign * is_required, sign * (is_required and attended))
+
+
+def _collect(deltas, rows, sign, groups):
+    """
+    Cộng các dòng (ngày, user_id, department_id, organization_id, bắt buộc, có mặt) vào `deltas`.
+    Cá nhân được tính cho chính họ và cho các Khoa/Phòng, Tổ chức họ đang công tác (tại thời điểm ghi,
+    không phải tại ngày họp; xem regroup_users).
+    """
+    for day, user_id, department_id, organization_id, is_required, attended in rows:
+        values = _values(is_required, attended, sign)
+        if user_id:
+            _bump(deltas, USER, user_id, day, values)
+            departments, organizations = groups.get(user_id, _NO_GROUPS)
+            for pk in departments:
+                _bump(deltas, DEPARTMENT, pk, day, values)
+            for pk in organizations:
+                _bump(deltas, ORGANIZATION, pk, day, values)
+        if department_id:
+            _bump(deltas, DEPARTMENT, department_id, day, values)
+        if organization_id:
+            _bump(deltas, ORGANIZATION, organization_id, day, values)
+
+
+#Các CSDL hỗ trợ INSERT ... ON CONFLICT ... DO UPDATE với bảng excluded
+UPSERT_VENDORS = ('sqlite', 'postgresql')
+
+
+def _apply(deltas):
+    """
+    Cộng dồn `deltas` vào bảng tổng hợp. SQLite/PostgreSQL dùng một lệnh INSERT ... ON CONFLICT DO UPDATE
+    cho cả lô; các CSDL khác khoá các dòng đã có, cộng trong Python rồi ghi bằng bulk_update/bulk_create.
+    """
+    deltas = {key: values for key, values in deltas.items() if any(values)}
+    if not deltas:
+        return
+    if connection.vendor not in UPSERT_VENDORS:
+        _apply_portable(deltas)
+        return
+    rows = [(kind, period, pk, day.isoformat(), *values) for (kind, period, pk, day), values in deltas.items()]
+    table = connection.ops.quote_name(AttendanceRollup._meta.db_table)
+    key = ', '.join(connection.ops.quote_name(name) for name in ('kind', 'period', 'object_id', 'date'))
+    counters = ', '.join(COUNTERS)
+    updates = ', '.join(f"{name} = {table}.{name} + excluded.{name}" for name in COUNTERS)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {table} ({key}, {counters}) VALUES ({', '.join(['%s'] * (4 + len(COUNTERS)))}) "
+            f"ON CONFLICT ({key}) DO UPDATE SET {updates}",
+            rows,
+        )
+
+
+def _apply_portable(deltas):
+    condition = Q()
+    for kind, period, pk, day in deltas:
+        condition |= Q(kind=kind, period=period, object_id=pk, date=day)
+    with transaction.atomic():
+        existing = {
+            (row.kind, row.period, row.object_id, row.date): row
+            for row in AttendanceRollup.objects.select_for_update().filter(condition)
+        }
+        created = []
+        for (kind, period, pk, day), values in deltas.items():
+            row = existing.get((kind, period, pk, day))
+            if row is None:
+                created.append(AttendanceRollup(
+                    kind=kind, period=period, object_id=pk, date=day, **dict(zip(COUNTERS, values)),
+                ))
+                continue
+            for name, value in zip(COUNTERS, values):
+                setattr(row, name, getattr(row, name) + value)
+        AttendanceRollup.objects.bulk_update(existing.values(), COUNTERS)
+        AttendanceRollup.objects.bulk_create(created)
+
+
+#Các trường của MeetingParticipant được tính vào bảng tổng hợp, theo thứ tự của participant_state
+PARTICIPANT_FIELDS = ('meeting_id', 'user_id', 'department_id', 'organization_id', 'is_required', 'attended')
+
+
+def participant_state(participant):
+    return tuple(getattr(participant, name) for name in PARTICIPANT_FIELDS)
+
+
+def stored_participant_state(pk):
+    """
+    participant_state của thành phần tham dự đọc lại từ CSDL, hoặc None nếu dòng không còn.
+    """
+    return MeetingParticipant.objects.filter(pk=pk).values_list(*PARTICIPANT_FIELDS).first()
+
+
+def record_participants(old_states, new_states):
+    """
+    Ghi thay đổi thành phần tham dự vào bảng tổng hợp: trừ các trạng thái cũ, cộng các trạng thái mới
+    (xem participant_state). Dùng cho các đường bulk_create/bulk_update không phát tín hiệu.
+    """
+    old_states = [state for state in old_states if state is not None]
+    new_states = [state for state in new_states if state is not None]
+    if not old_states and not new_states:
+        return
+    meetings = {
+        pk: date
+        for pk, date, status in Meeting.objects.filter(
+            pk__in={state[0] for state in old_states + new_states}
+        ).values_list('pk', 'date', 'status')
+        if status not in EXCLUDED_STATUSES
+    }
+    groups = membership.user_group_map(state[1] for state in old_states + new_states if state[1])
+    deltas = defaultdict(_counters)
+    for states, sign in ((old_states, -1), (new_states, 1)):
+        _collect(deltas, (
+            (meetings[meeting_id], *rest) for meeting_id, *rest in states if meeting_id in meetings
+        ), sign, groups)
+    _apply(deltas)
+
+
+def _counted_date(schedule):
+    date, status = schedule
+    return None if status in EXCLUDED_STATUSES else date
+
+
+def move_meetings(changes):
+    """
+    Cập nhật bảng tổng hợp khi ngày họp đổi hoặc cuộc họp bị hủy/khôi phục.
+    `changes` là các bộ (id cuộc họp, (ngày, trạng thái) cũ, (ngày, trạng thái) mới).
+    """
+    moves = {}
+    for pk, old, new in changes:
+        old_date, new_date = _counted_date(old), _counted_date(new)
+        if old_date != new_date:
+            moves[pk] = (old_date, new_date)
+    if not moves:
+        return
+    rows = list(MeetingParticipant.objects.filter(meeting_id__in=moves).values_list(
+        'meeting_id', 'user_id', 'department_id', 'organization_id', 'is_required', 'attended',
+    ))
+    groups = membership.user_group_map(row[1] for row in rows if row[1])
+    deltas = defaultdict(_counters)
+    for index, sign in ((0, -1), (1, 1)):
+        _collect(deltas, (
+            (moves[meeting_id][index], *rest) for meeting_id, *rest in rows if moves[meeting_id][index]
+        ), sign, groups)
+    _apply(deltas)
+
+
+def current_groups(user_ids=None):
+    """
+    {id người dùng: (frozenset id Khoa/Phòng, frozenset id Tổ chức)} đọc trực tiếp từ CSDL
+    (mọi người dùng có Ban/Ngành công tác khi không truyền `user_ids`).
+    """
+    rows = UserAffiliation.objects.filter(is_active=True)
+    if user_ids is None:
+        result = defaultdict(lambda: (set(), set()))
+    else:
+        result = {pk: (set(), set()) for pk in user_ids if pk is not None}
+        if not result:
+            return {}
+        rows = rows.filter(user_id__in=result)
+    for user_id, department_id, organization_id in rows.values_list('user_id', 'department_id', 'organization_id').iterator():
+        if department_id:
+            result[user_id][0].add(department_id)
+        if organization_id:
+            result[user_id][1].add(organization_id)
+    return {pk: (frozenset(departments), frozenset(organizations)) for pk, (departments, organizations) in result.items()}
+
+
+def regroup_users(before):
+    """
+    Chuyển số liệu tham dự của cá nhân sang các Khoa/Phòng, Tổ chức mới sau khi Ban/Ngành công tác thay đổi.
+    `before` là kết quả current_groups() đọc trước khi thay đổi.
+    Ban/Ngành công tác không lưu lịch sử nên số liệu được tính theo nơi công tác hiện tại: toàn bộ các
+    cuộc họp trước đây của người đó cũng chuyển sang đơn vị mới (giống như khi chạy rebuild()),
+    báo cáo các kỳ đã qua của đơn vị cũ và mới đều thay đổi.
+    """
+    after = current_groups(before)
+    changed = {pk: (groups, after[pk]) for pk, groups in before.items() if groups != after[pk]}
+    if not changed:
+        return
+    rows = MeetingParticipant.objects.filter(user_id__in=changed).exclude(
+        meeting__status__in=EXCLUDED_STATUSES,
+    ).values_list('user_id', 'meeting__date', 'is_required', 'attended')
+    deltas = defaultdict(_counters)
+    for user_id, day, is_required, attended in rows.iterator():
+        (old_departments, old_organizations), (new_departments, new_organizations) = changed[user_id]
+        for kind, old, new in (
+            (DEPARTMENT, old_departments, new_departments),
+            (ORGANIZATION, old_organizations, new_organizations),
+        ):
+            for pk in new - old:
+                _bump(deltas, kind, pk, day, _values(is_required, attended, 1))
+            for pk in old - new:
+                _bump(deltas, kind, pk, day, _values(is_required, attended, -1))
+    _apply(deltas)
+
+
+def _first_of_next_month(day):
+    return month_bounds(day)[1] + timedelta(days=1)
+
+
+def range_filter(date_from, date_to):
+    """
+    Điều kiện lọc khoảng ngày: các tháng trọn vẹn đọc từ dòng theo tháng, phần lẻ đầu và cuối đọc từ dòng theo ngày.
+    Khoảng một năm chỉ cần khoảng 12 dòng theo tháng cộng tối đa 60 dòng theo ngày cho mỗi đối tượng.
+    """
+    first_full = date_from if date_from.day == 1 else _first_of_next_month(date_from)
+    # Ngày đầu của phần lẻ cuối (tháng chứa date_to chưa trọn vẹn)
+    end_full = _first_of_next_month(date_to) if date_to == month_bounds(date_to)[1] else date_to.replace(day=1)
+    if first_full >= end_full:
+        return Q(period=DAY, date__gte=date_from, date__lte=date_to)
+    condition = Q(period=MONTH, date__gte=first_full, date__lt=end_full)
+    if date_from < first_full:
+        condition |= Q(period=DAY, date__gte=date_from, date__lt=first_full)
+    if end_full <= date_to:
+        condition |= Q(period=DAY, date__gte=end_full, date__lte=date_to)
+    return condition
+
+
+def totals(kind, date_from, date_to, object_ids=None):
+    """
+    {id đối tượng: {invited, attended, required, required_attended}} trong khoảng ngày (một truy vấn).
+    """
+    rows = AttendanceRollup.objects.filter(range_filter(date_from, date_to), kind=kind)
+    if object_ids is not None:
+        rows = rows.filter(object_id__in=object_ids)
+    rows = rows.order_by().values('object_id').annotate(**{f"total_{name}": Sum(name) for name in COUNTERS})
+    return {
+        row['object_id']: {name: row[f"total_{name}"] for name in COUNTERS}
+        for row in rows
+        if row['total_invited']
+    }
+
+
+def _names(kind, pks):
+    if kind == USER:
+        return {user.pk: user_label(user) for user in User.objects.filter(pk__in=pks)}
+    model = Department if kind == DEPARTMENT else Organization
+    return dict(model.objects.filter(pk__in=pks).values_list('pk', 'name'))
+
+
+def _rate(part, whole):
+    return round(100 * part / whole, 1) if whole else None
+
+
+def report(kind, date_from, date_to, object_ids=None):
+    """
+    Tỷ lệ tham dự (%) của từng đối tượng trong khoảng ngày, sắp theo tên.
+    """
+    data = totals(kind, date_from, date_to, object_ids)
+    names = _names(kind, data)
+    result = [
+        {
+            'id': pk,
+            'name': names.get(pk, str(pk)),
+            **counters,
+            'rate': _rate(counters['attended'], counters['invited']),
+            'required_rate': _rate(counters['required_attended'], counters['required']),
+        }
+        for pk, counters in data.items()
+    ]
+    result.sort(key=lambda row: row['name'])
+    return result
+
+
+def rebuild(date_from=None, date_to=None, batch_size=2000):
+    """
+    Tính lại bảng tổng hợp từ thành phần tham dự để sửa sai lệch, từng tháng một trong một giao dịch.
+    Không truyền khoảng ngày thì tính lại toàn bộ. Trả về số dòng đã ghi.
+    """
+    bounds = Meeting.objects.aggregate(first=Min('date'), last=Max('date'))
+    full = date_from is None and date_to is None
+    date_from = date_from or bounds['first']
+    date_to = date_to or bounds['last']
+    if full:
+        # Xoá các dòng nằm ngoài khoảng ngày còn cuộc họp
+        stale = AttendanceRollup.objects.all()
+        if date_from:
+            stale = stale.filter(Q(date__lt=date_from.replace(day=1)) | Q(date__gt=date_to))
+        stale.delete()
+    if not date_from or not date_to or date_from > date_to:
+        return 0
+
+    groups = current_groups()
+    total = 0
+    start = date_from.replace(day=1)
+    while start <= date_to:
+        end = month_bounds(start)[1]
+        deltas = defaultdict(_counters)
+        rows = MeetingParticipant.objects.filter(meeting__date__gte=start, meeting__date__lte=end).exclude(
+            meeting__status__in=EXCLUDED_STATUSES,
+        ).values_list('meeting__date', 'user_id', 'department_id', 'organization_id', 'is_required', 'attended')
+        with transaction.atomic():
+            _collect(deltas, rows.iterator(), 1, groups)
+            AttendanceRollup.objects.filter(date__gte=start, date__lte=end).delete()
+            created = AttendanceRollup.objects.bulk_create([
+                AttendanceRollup(
+                    kind=kind, period=period, object_id=pk, date=day, **dict(zip(COUNTERS, values)),
+                )
+                for (kind, period, pk, day), values in deltas.items()
+                if any(values)
+            ], batch_size=batch_size)
+        total += len(created)
+        start = end + timedelta(days=1)
+    return total
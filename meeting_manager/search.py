@@ -0,0 +1,182 @@
+import re
+import unicodedata
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+#Bảng FTS5 (SQLite) chứa chỉ mục tìm kiếm, rowid = id cuộc họp
+SEARCH_TABLE = 'meeting_manager_meetingsearch'
+SEARCH_COLUMNS = ('meeting_number', 'title', 'location', 'host', 'minutes')
+#Trọng số bm25 theo thứ tự cột: số cuộc họp > tiêu đề > người chủ trì > địa điểm, biên bản
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0, 2.0, 1.0)
+
+CREATE_TABLE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    f"{', '.join(SEARCH_COLUMNS)}, tokenize='unicode61 remove_diacritics 2')"
+)
+DROP_TABLE_SQL = f"DROP TABLE IF EXISTS {SEARCH_TABLE}"
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def normalize_text(value):
+    """
+    Chuẩn hoá chuỗi để so khớp không dấu: bỏ dấu tiếng Việt, đ -> d, chữ thường.
+    """
+    if not value:
+        return ''
+    value = value.replace('đ', 'd').replace('Đ', 'D')
+    value = unicodedata.normalize('NFD', value)
+    value = ''.join(c for c in value if unicodedata.category(c) != 'Mn')
+    return value.lower()
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(text):
+    """
+    Chuyển chuỗi người dùng nhập thành biểu thức MATCH của FTS5: mỗi từ là một tiền tố, nối bằng AND.
+    """
+    words = _WORD_RE.findall(normalize_text(text))
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _host_name(first_name, last_name, username):
+    full_name = f"{first_name or ''} {last_name or ''}".strip()
+    return f"{full_name} {username or ''}".strip()
+
+
+def _documents(meetings):
+    """
+    Sinh (id, các cột đã chuẩn hoá) cho từng cuộc họp từ queryset Meeting.
+    """
+    rows = meetings.values_list(
+        'pk', 'meeting_number', 'title', 'location',
+        'host__first_name', 'host__last_name', 'host__username',
+        'minutes__content',
+    )
+    for pk, number, title, location, first_name, last_name, username, minutes in rows.iterator():
+        yield (
+            pk,
+            normalize_text(number),
+            normalize_text(title),
+            normalize_text(location),
+            normalize_text(_host_name(first_name, last_name, username)),
+            normalize_text(minutes),
+        )
+
+
+def _write(documents, cursor):
+    documents = list(documents)
+    if not documents:
+        return 0
+    cursor.executemany(
+        f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s",
+        [(doc[0],) for doc in documents],
+    )
+    cursor.executemany(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_COLUMNS)}) VALUES (%s, %s, %s, %s, %s, %s)",
+        documents,
+    )
+    return len(documents)
+
+
+def index_meetings(meeting_ids):
+    """
+    Cập nhật lại chỉ mục cho các cuộc họp có id trong `meeting_ids`.
+    """
+    if not is_available():
+        return
+    from .models import Meeting
+
+    meeting_ids = list(meeting_ids)
+    if not meeting_ids:
+        return
+    with connection.cursor() as cursor:
+        _write(_documents(Meeting.objects.filter(pk__in=meeting_ids)), cursor)
+
+
+def remove_meetings(meeting_ids):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s",
+            [(pk,) for pk in meeting_ids],
+        )
+
+
+def rebuild_index(meetings, batch_size=2000):
+    """
+    Xoá và dựng lại toàn bộ chỉ mục từ queryset `meetings` trong một giao dịch: trong lúc dựng, tìm kiếm vẫn
+    thấy chỉ mục cũ, lỗi giữa chừng không để lại chỉ mục dở dang. Trả về số cuộc họp đã đánh chỉ mục.
+    """
+    total = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(CREATE_TABLE_SQL)
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        batch = []
+        for document in _documents(meetings.order_by('pk')):
+            batch.append(document)
+            if len(batch) >= batch_size:
+                total += _write(batch, cursor)
+                batch = []
+        total += _write(batch, cursor)
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+    return total
+
+
+def search_filter(text):
+    """
+    Điều kiện Q lọc các cuộc họp khớp với `text`.
+    Dùng chỉ mục FTS5 trên SQLite, các CSDL khác quay về icontains.
+    Chỉ lọc, không xếp hạng: danh sách cuộc họp giữ thứ tự ngày để phân trang theo con trỏ;
+    kết quả theo độ liên quan dùng search_meetings.
+    """
+    if not is_available():
+        return (
+            Q(meeting_number__icontains=text) |
+            Q(title__icontains=text) |
+            Q(location__icontains=text) |
+            Q(host__first_name__icontains=text) |
+            Q(host__last_name__icontains=text) |
+            Q(minutes__content__icontains=text)
+        )
+    match = build_match_query(text)
+    if not match:
+        return Q()
+    return Q(pk__in=RawSQL(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", (match,)))
+
+
+def ranked_meeting_ids(text, limit=50):
+    """
+    Danh sách id cuộc họp khớp với `text`, sắp xếp theo độ liên quan (bm25).
+    """
+    if not is_available():
+        from .models import Meeting
+        return list(Meeting.objects.filter(search_filter(text)).values_list('pk', flat=True)[:limit])
+    match = build_match_query(text)
+    if not match:
+        return []
+    weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s "
+            f"ORDER BY bm25({SEARCH_TABLE}, {weights}) LIMIT %s",
+            (match, limit),
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_meetings(text, limit=50):
+    """
+    Các cuộc họp khớp với `text`, theo thứ tự độ liên quan.
+    """
+    from .models import Meeting
+
+    ids = ranked_meeting_ids(text, limit)
+    meetings = Meeting.objects.select_related('host').in_bulk(ids)
+    return [meetings[pk] for pk in ids if pk in meetings]
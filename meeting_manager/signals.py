@@ -0,0 +1,214 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete, pre_save, pre_delete
+from django.dispatch import receiver
+
+from . import fragments, ical, membership, notifications, previews, reminders, rollups, search, uploads
+from .models import Department, FilePreview, Meeting, MeetingFile, MeetingMinutes, MeetingParticipant, Notification, Organization, UserAffiliation
+
+#Các trường tạo nên tên hiển thị của người dùng
+NAME_FIELDS = {'first_name', 'last_name', 'username'}
+
+# Đồng bộ chỉ mục tìm kiếm
+@receiver(post_save, sender=Meeting)
+def index_meeting(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_meetings([instance.pk])
+
+@receiver(post_delete, sender=Meeting)
+def unindex_meeting(sender, instance, **kwargs):
+    search.remove_meetings([instance.pk])
+
+@receiver(post_save, sender=MeetingMinutes)
+@receiver(post_delete, sender=MeetingMinutes)
+def index_meeting_minutes(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_meetings([instance.meeting_id])
+
+@receiver(post_save, sender=User)
+def index_hosted_meetings(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Tên người chủ trì nằm trong chỉ mục, cần cập nhật khi đổi tên (lần đăng nhập chỉ ghi last_login)
+    if not created and not raw and (update_fields is None or NAME_FIELDS & set(update_fields)):
+        search.index_meetings(Meeting.objects.filter(host=instance).values_list('pk', flat=True))
+
+# Làm mới chỉ mục thành viên Khoa/Phòng, Tổ chức
+@receiver(post_init, sender=UserAffiliation)
+def remember_affiliation(sender, instance, **kwargs):
+    # Đọc từ __dict__ để không nạp các trường bị hoãn (only/defer)
+    fields = instance.__dict__
+    instance._membership_original = (fields.get('user_id'), fields.get('department_id'), fields.get('organization_id'))
+
+@receiver(post_save, sender=UserAffiliation)
+@receiver(post_delete, sender=UserAffiliation)
+def invalidate_membership(sender, instance, **kwargs):
+    user_id, department_id, organization_id = instance._membership_original
+    membership.invalidate(membership.DEPARTMENT, [department_id, instance.department_id])
+    membership.invalidate(membership.ORGANIZATION, [organization_id, instance.organization_id])
+    membership.invalidate(membership.USER, [user_id, instance.user_id])
+    # Lịch .ics của người dùng gồm các cuộc họp mời Khoa/Phòng, Tổ chức của họ
+    ical.invalidate_feeds([user_id, instance.user_id])
+    instance._membership_original = (instance.user_id, instance.department_id, instance.organization_id)
+
+# Đặt lại lịch nhắc khi ngày, giờ hoặc trạng thái cuộc họp thay đổi
+@receiver(post_init, sender=Meeting)
+def remember_meeting_schedule(sender, instance, **kwargs):
+    fields = instance.__dict__
+    if all(name in fields for name in ('date', 'time', 'status')):
+        instance._schedule_original = (fields['date'], fields['time'], fields['status'])
+    else:
+        instance._schedule_original = None
+
+@receiver(post_save, sender=Meeting)
+def reschedule_reminders(sender, instance, created, raw=False, **kwargs):
+    schedule = (instance.date, instance.time, instance.status)
+    if not raw and (created or schedule != instance._schedule_original):
+        reminders.schedule_reminders(instance)
+    instance._schedule_original = schedule
+
+# Bộ đếm thông báo chưa đọc (các đường bulk_create tự cập nhật trong notifications.notify_many)
+@receiver(post_save, sender=Notification)
+def count_new_notification(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and not instance.is_read:
+        notifications.adjust_unread_counts_on_commit({instance.user_id: 1})
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        notifications.adjust_unread_counts_on_commit({instance.user_id: -1})
+
+# Số tham chiếu của nội dung tệp dùng chung
+@receiver(post_save, sender=MeetingFile)
+def acquire_file_blob(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.blob_id:
+        uploads.acquire_blob(instance.blob_id)
+
+@receiver(post_delete, sender=MeetingFile)
+def release_file_blob(sender, instance, **kwargs):
+    if instance.blob_id:
+        uploads.release_blob(instance.blob_id)
+
+# Ảnh xem trước được tạo nền bởi lệnh generate_previews, request tải lên chỉ xếp hàng
+@receiver(post_save, sender=MeetingFile)
+def enqueue_file_preview(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        FilePreview.objects.create(meeting_file=instance)
+
+@receiver(post_delete, sender=FilePreview)
+def discard_file_preview(sender, instance, **kwargs):
+    if instance.sha256:
+        transaction.on_commit(lambda: previews.discard(instance.sha256))
+
+# Bảng tổng hợp tham dự (các đường bulk_create/bulk_update tự cập nhật qua rollups.record_participants)
+@receiver(post_init, sender=MeetingParticipant)
+def remember_participant_state(sender, instance, **kwargs):
+    fields = instance.__dict__
+    names = rollups.PARTICIPANT_FIELDS
+    instance._rollup_original = tuple(fields[name] for name in names) if all(name in fields for name in names) else None
+
+@receiver(pre_save, sender=MeetingParticipant)
+def load_participant_state(sender, instance, raw=False, **kwargs):
+    # Đối tượng nạp bằng only/defer không có đủ trạng thái cũ: đọc lại dòng hiện có trước khi ghi đè
+    if not raw and instance._rollup_original is None and instance.pk and not instance._state.adding:
+        instance._rollup_original = rollups.stored_participant_state(instance.pk)
+
+@receiver(post_save, sender=MeetingParticipant)
+def rollup_participant(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    state = rollups.participant_state(instance)
+    if created or instance._rollup_original is None:
+        rollups.record_participants([], [state])
+    elif state != instance._rollup_original:
+        rollups.record_participants([instance._rollup_original], [state])
+    instance._rollup_original = state
+
+@receiver(post_delete, sender=MeetingParticipant)
+def unrollup_participant(sender, instance, **kwargs):
+    rollups.record_participants([rollups.participant_state(instance)], [])
+
+@receiver(post_init, sender=Meeting)
+def remember_meeting_rollup(sender, instance, **kwargs):
+    fields = instance.__dict__
+    instance._rollup_schedule = (fields['date'], fields['status']) if 'date' in fields and 'status' in fields else None
+
+@receiver(post_save, sender=Meeting)
+def move_meeting_rollup(sender, instance, created, raw=False, **kwargs):
+    schedule = (instance.date, instance.status)
+    if not created and not raw and instance._rollup_schedule is not None:
+        rollups.move_meetings([(instance.pk, instance._rollup_schedule, schedule)])
+    instance._rollup_schedule = schedule
+
+@receiver(pre_save, sender=UserAffiliation)
+@receiver(pre_delete, sender=UserAffiliation)
+def remember_affiliation_groups(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance._rollup_groups = rollups.current_groups({instance._membership_original[0], instance.user_id})
+
+@receiver(post_save, sender=UserAffiliation)
+@receiver(post_delete, sender=UserAffiliation)
+def regroup_affiliation_rollup(sender, instance, raw=False, **kwargs):
+    if not raw:
+        rollups.regroup_users(instance._rollup_groups)
+
+# Đoạn HTML danh sách và chi tiết cuộc họp trong cache (các đường bulk tự gọi fragments.invalidate)
+@receiver(post_save, sender=Meeting)
+@receiver(post_delete, sender=Meeting)
+@receiver(post_save, sender=MeetingParticipant)
+@receiver(post_delete, sender=MeetingParticipant)
+@receiver(post_save, sender=MeetingFile)
+@receiver(post_delete, sender=MeetingFile)
+@receiver(post_save, sender=MeetingMinutes)
+@receiver(post_delete, sender=MeetingMinutes)
+@receiver(post_save, sender=Department)
+@receiver(post_save, sender=Organization)
+def invalidate_meeting_fragments(sender, raw=False, **kwargs):
+    if not raw:
+        fragments.invalidate()
+
+@receiver(post_save, sender=User)
+def invalidate_user_fragments(sender, raw=False, update_fields=None, **kwargs):
+    # Tên người dùng hiển thị trong trang chi tiết; lần đăng nhập chỉ ghi last_login
+    if not raw and set(update_fields or ()) != {'last_login'}:
+        fragments.invalidate()
+
+# Phiên bản lịch .ics (các đường bulk tự gọi ical.invalidate_*)
+@receiver(post_init, sender=Meeting)
+def remember_meeting_feeds(sender, instance, **kwargs):
+    fields = instance.__dict__
+    instance._feed_users = (fields.get('host_id'), fields.get('preparation_id'))
+
+@receiver(post_save, sender=Meeting)
+def invalidate_meeting_feeds(sender, instance, raw=False, **kwargs):
+    if not raw:
+        ical.invalidate_meetings([instance.pk], instance._feed_users)
+    instance._feed_users = (instance.host_id, instance.preparation_id)
+
+@receiver(post_delete, sender=Meeting)
+def invalidate_deleted_meeting_feeds(sender, instance, **kwargs):
+    # Thành phần tham dự đã bị xoá trước (và tự đổi phiên bản lịch của họ)
+    ical.invalidate_feeds(instance._feed_users + (instance.host_id, instance.preparation_id))
+
+@receiver(post_init, sender=MeetingParticipant)
+def remember_participant_feeds(sender, instance, **kwargs):
+    fields = instance.__dict__
+    instance._feed_original = (fields.get('user_id'), fields.get('department_id'), fields.get('organization_id'))
+
+@receiver(post_save, sender=MeetingParticipant)
+@receiver(post_delete, sender=MeetingParticipant)
+def invalidate_participant_feeds(sender, instance, raw=False, **kwargs):
+    current = (instance.user_id, instance.department_id, instance.organization_id)
+    if not raw:
+        ical.invalidate_participants({instance._feed_original, current})
+    instance._feed_original = current
+
+@receiver(post_save, sender=Department)
+def invalidate_department_feed(sender, instance, raw=False, **kwargs):
+    # Tên Khoa/Phòng là tên lịch
+    if not raw:
+        ical.invalidate_feeds(departments=[instance.pk])
+
+@receiver(post_save, sender=User)
+def invalidate_user_feeds(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Tên người chủ trì nằm trong mọi sự kiện của họ: đổi phiên bản chung thay vì tính từng lịch
+    if not created and not raw and (update_fields is None or NAME_FIELDS & set(update_fields)):
+        ical.invalidate_all()
@@ -0,0 +1,80 @@
+// Ô chọn gợi ý cho AutocompleteSelect (meeting_manager/forms.py):
+// thêm ô gõ trước <select data-autocomplete-url> và tải lựa chọn từ máy chủ khi gõ.
+(function () {
+    'use strict';
+
+    var DELAY = 250;
+
+    function setOptions(select, results) {
+        var selected = select.value;
+        var keep = [];
+        Array.prototype.forEach.call(select.options, function (option) {
+            // Giữ lại lựa chọn trống và lựa chọn hiện tại
+            if (option.value === '' || option.value === selected) {
+                keep.push(option);
+            }
+        });
+        select.innerHTML = '';
+        keep.forEach(function (option) { select.appendChild(option); });
+        results.forEach(function (item) {
+            if (String(item.id) !== selected) {
+                select.appendChild(new Option(item.text, item.id));
+            }
+        });
+    }
+
+    function attach(select) {
+        if (select.dataset.autocompleteReady) {
+            return;
+        }
+        select.dataset.autocompleteReady = '1';
+
+        var input = document.createElement('input');
+        input.type = 'search';
+        input.className = 'form-control form-control-sm mb-1';
+        input.placeholder = 'Gõ để tìm...';
+        input.autocomplete = 'off';
+        select.parentNode.insertBefore(input, select);
+
+        var timer = null;
+        var controller = null;
+        function load() {
+            if (controller) {
+                controller.abort();
+            }
+            controller = new AbortController();
+            var url = select.dataset.autocompleteUrl + '?q=' + encodeURIComponent(input.value.trim());
+            fetch(url, {credentials: 'same-origin', signal: controller.signal})
+                .then(function (response) { return response.json(); })
+                .then(function (data) { setOptions(select, data.results || []); })
+                .catch(function () {});
+        }
+        input.addEventListener('input', function () {
+            clearTimeout(timer);
+            timer = setTimeout(load, DELAY);
+        });
+        input.addEventListener('focus', function () {
+            if (select.options.length <= 2) {
+                load();
+            }
+        }, {once: true});
+    }
+
+    function attachAll(root) {
+        Array.prototype.forEach.call(root.querySelectorAll('select[data-autocomplete-url]'), attach);
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        attachAll(document);
+        // Các dòng thêm mới của formset
+        new MutationObserver(function (mutations) {
+            mutations.forEach(function (mutation) {
+                Array.prototype.forEach.call(mutation.addedNodes, function (node) {
+                    if (node.nodeType === 1) {
+                        attachAll(node.parentNode || node);
+                    }
+                });
+            });
+        }).observe(document.body, {childList: true, subtree: true});
+    });
+})();
@@ -0,0 +1,29 @@
+// Badge thông báo cập nhật trực tiếp: nghe luồng SSE tại data-stream-url của phần tử [data-notification-badge].
+// EventSource tự kết nối lại và gửi Last-Event-ID nên không lỡ thông báo khi mất kết nối.
+(function () {
+    'use strict';
+
+    function attach(badge) {
+        var source = new EventSource(badge.dataset.streamUrl);
+
+        source.addEventListener('unread', function (event) {
+            var unread = JSON.parse(event.data).unread;
+            badge.textContent = unread > 0 ? unread : '';
+            badge.hidden = unread === 0;
+        });
+
+        source.addEventListener('notification', function (event) {
+            badge.dispatchEvent(new CustomEvent('meeting:notification', {
+                bubbles: true,
+                detail: JSON.parse(event.data),
+            }));
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        if (!window.EventSource) {
+            return;
+        }
+        Array.prototype.forEach.call(document.querySelectorAll('[data-notification-badge]'), attach);
+    });
+})();
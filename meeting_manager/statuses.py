@@ -0,0 +1,111 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, time as dt_time, timedelta
+
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from . import fragments, ical
+from .membership import effective_attendee_map
+from .models import Meeting, MeetingReminder
+from .notifications import meeting_message, notify_many
+
+logger = logging.getLogger(__name__)
+
+SCHEDULED = Meeting.SCHEDULED
+ONGOING = Meeting.ONGOING
+FINISHED = Meeting.FINISHED
+#Bộ máy chỉ chuyển trạng thái theo chiều tiến; cuộc họp bị hủy hoặc đã kết thúc không bị động tới
+ACTIVE = (SCHEDULED, ONGOING)
+
+#Chỉ thông báo các lần chuyển trạng thái xảy ra trong khoảng này (không báo dồn sau khi bộ lập lịch ngừng lâu)
+NOTIFY_WINDOW = timedelta(hours=1)
+
+
+def _bounds(date, time, duration):
+    start = datetime.combine(date, time or dt_time.min)
+    # Cuộc họp không có giờ kéo dài cả ngày
+    end = start + timedelta(minutes=duration or 0) if time else start + timedelta(days=1)
+    return start, end
+
+
+def target_status(date, time, duration, now):
+    """
+    Trạng thái theo ngày, giờ, thời lượng tại thời điểm `now` (giờ địa phương, không có múi giờ),
+    kèm thời điểm chuyển sang trạng thái đó.
+    """
+    start, end = _bounds(date, time, duration)
+    if now >= end:
+        return FINISHED, end
+    if now >= start:
+        return ONGOING, start
+    return SCHEDULED, None
+
+
+def advance_statuses(now=None, notify=True):
+    """
+    Chuyển trạng thái các cuộc họp đã bắt đầu hoặc đã kết thúc bằng vài lệnh UPDATE theo tập hợp (chỉ mục
+    meeting_status_date_idx), không lưu từng đối tượng. Thông báo `meeting_updated` được ghi theo lô.
+    Trả về số cuộc họp đã chuyển trạng thái.
+    """
+    now = now or timezone.now()
+    local_now = timezone.localtime(now).replace(tzinfo=None)
+    today = local_now.date()
+    with transaction.atomic():
+        # Các ngày từ hôm kia trở về trước chắc chắn đã kết thúc (thời lượng không quá một ngày): một lệnh UPDATE
+        # cho cả phần tồn đọng, chỉ đọc ngày sớm nhất (để dọn lịch nhắc theo khoảng ngày) và không thông báo
+        cutoff = today - timedelta(days=1)
+        stale = Meeting.objects.filter(status__in=ACTIVE, date__lt=cutoff, duration__lte=24 * 60)
+        first = stale.aggregate(first=Min('date'))['first']
+        backlog = stale.update(status=FINISHED, updated_at=now) if first else 0
+        changed = backlog
+
+        # Còn lại là các cuộc họp hôm qua, hôm nay và các cuộc họp kéo dài nhiều ngày
+        transitions = defaultdict(list)
+        recent = []
+        for pk, date, time, duration, status in Meeting.objects.filter(
+            status__in=ACTIVE, date__lte=today,
+        ).order_by().values_list('pk', 'date', 'time', 'duration', 'status').iterator():
+            target, since = target_status(date, time, duration, local_now)
+            if target == status or target == SCHEDULED:
+                continue
+            transitions[(status, target)].append(pk)
+            if since >= local_now - NOTIFY_WINDOW:
+                recent.append(pk)
+        for (status, target), pks in transitions.items():
+            # Điều kiện trạng thái cũ giữ nguyên thay đổi thủ công xảy ra giữa lúc đọc và lúc ghi
+            changed += Meeting.objects.filter(pk__in=pks, status=status).update(status=target, updated_at=now)
+
+        if not changed:
+            return 0
+        # UPDATE không phát tín hiệu: tự dọn lịch nhắc chưa gửi của đúng các cuộc họp vừa chuyển và làm mới cache trang.
+        # Bảng tổng hợp tham dự chỉ phụ thuộc vào trạng thái hủy nên không cần cập nhật.
+        pending = MeetingReminder.objects.filter(sent_at__isnull=True).exclude(meeting__status=SCHEDULED)
+        transitioned = [pk for pks in transitions.values() for pk in pks]
+        if transitioned:
+            pending.filter(meeting_id__in=transitioned).delete()
+        if backlog:
+            pending.filter(meeting__date__gte=first, meeting__date__lt=cutoff).delete()
+        fragments.invalidate()
+        if transitioned:
+            ical.invalidate_meetings(transitioned)
+        if backlog:
+            # Phần tồn đọng không được đọc ra nên không biết lịch nào chứa nó
+            ical.invalidate_all()
+        if notify and recent:
+            meetings = Meeting.objects.in_bulk(recent)
+            attendees = effective_attendee_map(meetings)
+            notify_many(
+                [
+                    (
+                        meeting,
+                        attendees[meeting.pk] | {pk for pk in (meeting.host_id, meeting.preparation_id) if pk},
+                        f"{meeting_message(meeting, 'meeting_updated')}: {meeting.status}",
+                    )
+                    for meeting in meetings.values()
+                ],
+                'meeting_updated',
+            )
+    logger.info('Đã chuyển trạng thái %d cuộc họp', changed)
+    return changed
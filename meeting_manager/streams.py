@@ -0,0 +1,174 @@
+import asyncio
+import contextvars
+import json
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import Notification
+from .notifications import aunread_count
+
+logger = logging.getLogger(__name__)
+
+#Các thông báo ghi trong khoảng này trở lại đây được đọc lại mỗi lần, để không lỡ các giao dịch commit chậm
+LOOKBACK = timedelta(seconds=60)
+#Số thông báo bị lỡ tối đa gửi lại khi trình duyệt kết nối lại (Last-Event-ID)
+MISSED_LIMIT = 100
+#Số thông báo chờ tối đa của một kết nối; kết nối chậm bị bỏ bớt, số chưa đọc vẫn đúng ở lần gửi sau
+QUEUE_SIZE = 100
+
+FIELDS = ('pk', 'user_id', 'meeting_id', 'type', 'message', 'sent_at')
+
+
+class Subscription:
+    """
+    Một kết nối SSE đang mở: chỉ giữ một hàng đợi asyncio, không chiếm luồng.
+    """
+
+    def __init__(self, user_id, since):
+        self.user_id = user_id
+        self.since = since
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def push(self, row):
+        try:
+            self.queue.put_nowait(row)
+        except asyncio.QueueFull:
+            logger.debug('Bỏ thông báo %s của kết nối chậm (người dùng %s)', row['pk'], self.user_id)
+
+
+class NotificationHub:
+    """
+    Phát thông báo mới tới các kết nối SSE của tiến trình. Một tác vụ duy nhất đọc CSDL sau mỗi
+    NOTIFICATION_STREAM_POLL_INTERVAL giây cho mọi kết nối, nên số truy vấn không phụ thuộc vào số kết nối.
+    Tác vụ tự dừng khi không còn kết nối nào.
+    """
+
+    def __init__(self):
+        self.subscriptions = defaultdict(set)
+        # Các thông báo đã phát trong khoảng LOOKBACK: {id: sent_at}
+        self.delivered = {}
+        self.task = None
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id, timezone.now())
+        self.subscriptions[user_id].add(subscription)
+        if self.task is None or self.task.done():
+            # Tác vụ đọc CSDL không thuộc về request đã mở nó
+            self.task = asyncio.get_running_loop().create_task(self._run(), context=contextvars.Context())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        group = self.subscriptions.get(subscription.user_id)
+        if group is not None:
+            group.discard(subscription)
+            if not group:
+                del self.subscriptions[subscription.user_id]
+
+    async def _run(self):
+        while self.subscriptions:
+            try:
+                await self.poll()
+            except Exception:
+                logger.exception('Không đọc được thông báo mới')
+            await asyncio.sleep(settings.NOTIFICATION_STREAM_POLL_INTERVAL)
+
+    async def poll(self, now=None):
+        """
+        Đọc các thông báo chưa đọc mới của những người đang kết nối (một truy vấn) và đưa vào hàng đợi của họ.
+        """
+        now = now or timezone.now()
+        cutoff = now - LOOKBACK
+        self.delivered = {pk: sent_at for pk, sent_at in self.delivered.items() if sent_at >= cutoff}
+        if not self.subscriptions:
+            return 0
+        rows = Notification.objects.filter(
+            user_id__in=list(self.subscriptions), is_read=False, sent_at__gte=cutoff,
+        ).order_by('pk').values(*FIELDS)
+        count = 0
+        async for row in rows:
+            if row['pk'] in self.delivered:
+                continue
+            self.delivered[row['pk']] = row['sent_at']
+            for subscription in self.subscriptions.get(row['user_id'], ()):
+                # Thông báo từ trước khi kết nối đã nằm trong số chưa đọc gửi lúc mở kết nối
+                if row['sent_at'] >= subscription.since:
+                    subscription.push(row)
+                    count += 1
+        return count
+
+
+hub = NotificationHub()
+
+
+def _event(name, data, event_id=None):
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {name}")
+    lines.append(f"data: {json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def _notification_event(row):
+    return _event('notification', {
+        'id': row['pk'],
+        'meeting_id': row['meeting_id'],
+        'type': row['type'],
+        'message': row['message'],
+        'sent_at': row['sent_at'],
+    }, row['pk'])
+
+
+def _retry():
+    return f"retry: {settings.NOTIFICATION_STREAM_RETRY_MS}\n\n"
+
+
+async def _missed(user_id, last_event_id):
+    rows = Notification.objects.filter(user_id=user_id, pk__gt=last_event_id).order_by('pk').values(*FIELDS)
+    return [row async for row in rows[:MISSED_LIMIT]]
+
+
+async def snapshot(user_id, last_event_id=None):
+    """
+    Nội dung SSE một lần (thông báo bị lỡ và số chưa đọc) cho máy chủ WSGI, không giữ kết nối;
+    trình duyệt tự kết nối lại sau `retry` mili giây.
+    """
+    missed = await _missed(user_id, last_event_id) if last_event_id is not None else []
+    return ''.join([
+        _retry(),
+        *(_notification_event(row) for row in missed),
+        _event('unread', {'unread': await aunread_count(user_id)}),
+    ])
+
+
+async def event_stream(user_id, last_event_id=None):
+    """
+    Luồng SSE của một người dùng: gửi lại các thông báo bị lỡ, sau đó đẩy thông báo mới và số chưa đọc.
+    Gửi dòng chú thích định kỳ để proxy không đóng kết nối rỗi.
+    """
+    subscription = hub.subscribe(user_id)
+    try:
+        yield _retry()
+        sent = set()
+        if last_event_id is not None:
+            for row in await _missed(user_id, last_event_id):
+                sent.add(row['pk'])
+                yield _notification_event(row)
+        yield _event('unread', {'unread': await aunread_count(user_id)})
+        while True:
+            try:
+                rows = [await asyncio.wait_for(subscription.queue.get(), settings.NOTIFICATION_STREAM_HEARTBEAT)]
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            while not subscription.queue.empty():
+                rows.append(subscription.queue.get_nowait())
+            for row in rows:
+                if row['pk'] not in sent:
+                    yield _notification_event(row)
+            yield _event('unread', {'unread': await aunread_count(user_id)})
+    finally:
+        hub.unsubscribe(subscription)
@@ -1,3 +1,1198 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import shutil
+import tempfile
+import time as time_module
+import zipfile
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from importlib.util import find_spec
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed, ValidationError
+from django.core.management import CommandError, call_command
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.utils import timezone
+
+from . import (
+    autocomplete, benchmarks, dispatcher, exports, fragments, ical, imports, instrumentation, membership, minutes, notifications, pagination, reminders,
+    previews, rollups, search, statuses, streams, uploads,
+)
+from .agenda import agenda_range, group_by_day
+from .conflicts import find_conflicts, find_schedule_conflicts
+from .forms import MeetingWithParticipantsForm
+from .models import (
+    AttendanceRollup, Department, FileBlob, FilePreview, Meeting, MeetingFile, MeetingMinutes, MeetingParticipant, MeetingReminder,
+    Notification, NotificationOutbox, UserAffiliation,
+)
+
+TEMP_MEDIA = tempfile.mkdtemp()
+TEMP_UPLOADS = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(TEMP_MEDIA, ignore_errors=True)
+    shutil.rmtree(TEMP_UPLOADS, ignore_errors=True)
+
+
+def make_user(username, **kwargs):
+    return User.objects.create_user(username=username, password='matkhau', **kwargs)
+
+
+def make_meeting(host, **kwargs):
+    kwargs.setdefault('title', 'Họp giao ban')
+    kwargs.setdefault('date', date(2030, 1, 7))
+    kwargs.setdefault('time', time(8, 0))
+    kwargs.setdefault('created_by', host)
+    return Meeting.objects.create(host=host, **kwargs)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA, MEETING_FILE_OFFLOAD='')
+class MeetingFileDownloadTests(TestCase):
+    def setUp(self):
+        self.host = make_user('chutri')
+        self.meeting = make_meeting(self.host)
+        self.client.force_login(self.host)
+
+    def attach(self, name, content=b'noi dung'):
+        meeting_file = MeetingFile(meeting=self.meeting, name=name, uploaded_by=self.host)
+        meeting_file.file.save(name, ContentFile(content), save=False)
+        meeting_file.save()
+        return meeting_file
+
+    def download(self, meeting_file, **params):
+        return self.client.get(reverse('meeting_file_download', args=[meeting_file.pk]), params)
+
+    def test_inline_allowed_for_pdf(self):
+        response = self.download(self.attach('bien-ban.pdf'), inline='1')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response['Content-Disposition'].startswith('inline'))
+
+    def test_inline_refused_for_script_types(self):
+        for name in ('trang.html', 'hinh.svg', 'du-lieu.xml', 'khong-ro'):
+            with self.subTest(name=name):
+                response = self.download(self.attach(name, b'<script>alert(1)</script>'), inline='1')
+                self.assertTrue(response['Content-Disposition'].startswith('attachment'))
+
+    def test_security_headers(self):
+        response = self.download(self.attach('bang.xlsx'))
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+        self.assertEqual(response['Content-Security-Policy'], 'sandbox')
+        self.assertEqual(b''.join(response.streaming_content), b'noi dung')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA, MEETING_UPLOAD_TEMP_DIR=TEMP_UPLOADS)
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        self.host = make_user('chutri')
+        self.meeting = make_meeting(self.host)
+
+    def upload(self, content, name='tai-lieu.pdf'):
+        session = uploads.start_upload(self.meeting, self.host, name, len(content))
+        return uploads.append_chunk(session, 0, io.BytesIO(content), len(content))
+
+    def test_start_requires_edit_permission(self):
+        outsider = make_user('nguoingoai')
+        self.client.force_login(outsider)
+        url = reverse('upload_start', args=[self.meeting.pk])
+        response = self.client.post(url, {'name': 'a.pdf', 'size': 3})
+        self.assertEqual(response.status_code, 403)
+        self.client.force_login(self.host)
+        response = self.client.post(url, {'name': 'a.pdf', 'size': 3})
+        self.assertEqual(response.status_code, 201)
+
+    def test_same_content_shares_one_blob(self):
+        first = self.upload(b'cung noi dung')
+        second = self.upload(b'cung noi dung', name='ban-sao.pdf')
+        sha256 = hashlib.sha256(b'cung noi dung').hexdigest()
+        self.assertEqual(first.meeting_file.blob_id, sha256)
+        self.assertEqual(second.meeting_file.file.name, first.meeting_file.file.name)
+        blob = FileBlob.objects.get(pk=sha256)
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(blob.file.name, uploads.blob_name(sha256))
+
+    def test_leftover_blob_file_is_replaced(self):
+        sha256 = hashlib.sha256(b'noi dung').hexdigest()
+        storage = FileBlob._meta.get_field('file').storage
+        storage.save(uploads.blob_name(sha256), io.BytesIO(b'phan con sot'))
+        session = self.upload(b'noi dung')
+        self.assertEqual(session.meeting_file.file.name, uploads.blob_name(sha256))
+        with storage.open(uploads.blob_name(sha256)) as stored:
+            self.assertEqual(stored.read(), b'noi dung')
+
+    def test_abandoned_hashers_are_evicted(self):
+        session = uploads.start_upload(self.meeting, self.host, 'do-dang.pdf', 10)
+        uploads.append_chunk(session, 0, io.BytesIO(b'12345'), 5)
+        self.assertIn(session.pk, uploads._hashers)
+        other = uploads.start_upload(self.meeting, self.host, 'khac.pdf', 10)
+        later = uploads.time.monotonic() + 25 * 3600
+        with mock.patch.object(uploads.time, 'monotonic', return_value=later):
+            uploads.append_chunk(other, 0, io.BytesIO(b'12345'), 5)
+        self.assertNotIn(session.pk, uploads._hashers)
+        self.assertIn(other.pk, uploads._hashers)
+
+
+class MinutesSaveTests(TestCase):
+    def setUp(self):
+        self.host = make_user('chutri')
+        self.secretary = make_user('thuky')
+        self.meeting = make_meeting(self.host)
+        self.minutes = MeetingMinutes.objects.create(meeting=self.meeting, content='Dòng 1\n', created_by=self.secretary)
+
+    def test_stale_save_raises_conflict(self):
+        stale = MeetingMinutes.objects.get(pk=self.minutes.pk)
+        self.minutes.content = 'Dòng 1\nDòng 2\n'
+        self.minutes.save(edited_by=self.host)
+        stale.content = 'Nội dung khác\n'
+        with self.assertRaises(minutes.VersionConflict) as caught:
+            stale.save()
+        self.assertEqual(caught.exception.version, 2)
+        self.assertEqual(MeetingMinutes.objects.get(pk=self.minutes.pk).content, 'Dòng 1\nDòng 2\n')
+
+    def test_revisions_record_acting_user(self):
+        self.minutes.content = 'Dòng 1\nDòng 2\n'
+        self.minutes.save(edited_by=self.host)
+        revisions = dict(self.minutes.revisions.values_list('version', 'created_by_id'))
+        self.assertEqual(revisions, {1: self.secretary.pk, 2: self.host.pk})
+        minutes.apply_patch(self.meeting, 2, [[0, 0, 'Mở đầu\n']], self.secretary)
+        self.assertEqual(self.minutes.revisions.get(version=3).created_by_id, self.secretary.pk)
+
+
+class MembershipCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        membership._local.clear()
+        self.department = Department.objects.create(name='Khoa Nội')
+        self.user = make_user('bacsi')
+
+    def test_version_changes_only_after_commit(self):
+        self.assertEqual(membership.department_members([self.department.pk])[self.department.pk], frozenset())
+        with self.captureOnCommitCallbacks(execute=True):
+            UserAffiliation.objects.create(user=self.user, department=self.department)
+            # Chưa commit: request khác vẫn thấy tập cũ, không lưu tập mới dưới phiên bản cũ
+            self.assertEqual(membership.department_members([self.department.pk])[self.department.pk], frozenset())
+        self.assertEqual(
+            membership.department_members([self.department.pk])[self.department.pk], frozenset({self.user.pk}),
+        )
+
+
+class IcalFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        membership._local.clear()
+        self.host = make_user('chutri')
+        self.member = make_user('thanhvien')
+        self.department = Department.objects.create(name='Khoa Nội')
+        with self.captureOnCommitCallbacks(execute=True):
+            UserAffiliation.objects.create(user=self.member, department=self.department)
+            self.meeting = make_meeting(self.host, date=timezone.localdate() + timedelta(days=1))
+        self.url = ical.feed_url(ical.USER, self.member.pk)
+
+    def age_versions(self, seconds=5):
+        # Phiên bản cũ hơn giây hiện tại để lịch có Last-Modified
+        older = time_module.time_ns() - seconds * 10 ** 9
+        cache.set_many({ical.GENERATION_KEY: older, ical._version_key(ical.USER, self.member.pk): older}, None)
+
+    def test_not_modified_without_queries(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_department_invitation_changes_feed(self):
+        response = self.client.get(self.url)
+        self.assertNotIn(b'UID:meeting-', response.content)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.meeting.add_participants(departments=[self.department], notify=False)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'UID:meeting-{self.meeting.pk}@meetly'.encode(), response.content)
+
+    def test_deletion_is_not_hidden_by_if_modified_since(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.meeting.add_participants(users=[self.member], notify=False)
+        self.age_versions()
+        response = self.client.get(self.url)
+        last_modified = response['Last-Modified']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.meeting.delete()
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(b'UID:meeting-', response.content)
+
+
+class HostedMeetingIndexTests(TestCase):
+    def setUp(self):
+        self.host = make_user('chutri')
+        self.meeting = make_meeting(self.host)
+
+    def test_login_does_not_reindex(self):
+        with mock.patch.object(search, 'index_meetings') as index_meetings:
+            self.host.save(update_fields=['last_login'])
+        index_meetings.assert_not_called()
+
+    def test_rename_reindexes_hosted_meetings(self):
+        with mock.patch.object(search, 'index_meetings') as index_meetings:
+            self.host.first_name = 'Đặng'
+            self.host.save(update_fields=['first_name'])
+        self.assertEqual(list(index_meetings.call_args.args[0]), [self.meeting.pk])
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.host = make_user('chutri', first_name='Đức')
+        self.consult = make_meeting(self.host, title='Hội chẩn ca bệnh khó')
+        self.training = make_meeting(self.host, title='Đào tạo điều dưỡng', time=time(14, 0))
+
+    def matches(self, text):
+        return set(Meeting.objects.filter(search.search_filter(text)).values_list('pk', flat=True))
+
+    def test_accents_and_d_are_folded(self):
+        self.assertEqual(self.matches('hoi chan'), {self.consult.pk})
+        self.assertEqual(self.matches('HỘI CHẨN'), {self.consult.pk})
+        self.assertEqual(self.matches('dao tao dieu'), {self.training.pk})
+        self.assertEqual(self.matches('duc'), {self.consult.pk, self.training.pk})
+        self.assertEqual(self.matches('hoi dao'), set())
+
+    def test_ranked_by_weighted_columns(self):
+        make_meeting(self.host, title='Giao ban', location='Phòng hội chẩn', time=time(16, 0))
+        self.assertEqual(search.search_meetings('hoi chan')[0], self.consult)
+
+    def test_rebuild_is_atomic(self):
+        with mock.patch.object(search, '_write', side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            search.rebuild_index(Meeting.objects.all())
+        self.assertEqual(self.matches('hoi chan'), {self.consult.pk})
+        self.assertEqual(search.rebuild_index(Meeting.objects.all()), 2)
+        self.assertEqual(self.matches('hoi chan'), {self.consult.pk})
+
+
+class AgendaTests(TestCase):
+    def setUp(self):
+        self.host = make_user('chutri')
+        self.first = make_meeting(self.host, date=date(2030, 1, 7), time=time(14, 0))
+        self.all_day = make_meeting(self.host, date=date(2030, 1, 7), time=None)
+        self.second = make_meeting(self.host, date=date(2030, 1, 8))
+        self.third = make_meeting(self.host, date=date(2030, 1, 9))
+
+    def test_meetings_of_all_days_in_one_query(self):
+        with self.assertNumQueries(2):
+            sections = group_by_day(Meeting.objects.select_related('host'))
+            days = [(section.date, section.count, [meeting.pk for meeting in section.meetings]) for section in sections]
+        self.assertEqual(days, [
+            (date(2030, 1, 7), 2, [self.all_day.pk, self.first.pk]),
+            (date(2030, 1, 8), 1, [self.second.pk]),
+            (date(2030, 1, 9), 1, [self.third.pk]),
+        ])
+
+    def test_skipped_and_repeated_days(self):
+        sections = group_by_day(Meeting.objects.all())
+        self.assertEqual([meeting.pk for meeting in sections[1].meetings], [self.second.pk])
+        self.assertEqual([meeting.pk for meeting in sections[0].meetings], [self.all_day.pk, self.first.pk])
+        self.assertEqual([meeting.pk for meeting in sections[2].meetings], [self.third.pk])
+
+    def test_range_always_bounded(self):
+        today = date(2030, 1, 9)
+        self.assertEqual(agenda_range(None, None, today), (date(2030, 1, 7), date(2030, 1, 13)))
+        self.assertEqual(agenda_range(None, None, today, by_month=True), (date(2030, 1, 1), date(2030, 1, 31)))
+        self.assertEqual(agenda_range(date(2030, 1, 8), None, today), (date(2030, 1, 8), date(2030, 1, 13)))
+        self.assertEqual(
+            agenda_range(date(2030, 1, 8), None, today, by_month=True), (date(2030, 1, 8), date(2030, 1, 31)),
+        )
+        self.assertEqual(agenda_range(None, date(2030, 1, 8), today), (date(2030, 1, 7), date(2030, 1, 8)))
+        self.assertEqual(agenda_range(date(2030, 1, 8), date(2031, 1, 1), today), (date(2030, 1, 8), date(2030, 2, 7)))
+
+    def test_view_with_only_start_date(self):
+        make_meeting(self.host, title='Họp năm sau', date=date(2031, 1, 7))
+        response = self.client.get(reverse('meeting_agenda'), {'date_from': '2030-01-08'})
+        self.assertEqual((response.context['date_from'], response.context['date_to']), (date(2030, 1, 8), date(2030, 1, 13)))
+        self.assertEqual([section.date for section in response.context['day_sections']], [date(2030, 1, 8), date(2030, 1, 9)])
+
+
+class ZaloStubHandler(BaseHTTPRequestHandler):
+    """
+    Máy chủ Zalo giả lập: trả lời theo người nhận ('ok', 'ban' -> HTTP 503, 'sai' -> mã lỗi Zalo).
+    """
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        recipient = body['recipient']['user_id']
+        self.server.received.append((recipient, self.headers['X-Idempotency-Key'], self.headers['access_token']))
+        if recipient == 'ban':
+            self.send_response(503)
+            self.end_headers()
+            return
+        payload = {'error': -201, 'message': 'user_id is invalid'} if recipient == 'sai' else {'error': 0}
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DispatcherTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), ZaloStubHandler)
+        cls.server.received = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.received.clear()
+        self.host = make_user('chutri')
+        self.notification = Notification.objects.create(
+            user=self.host, meeting=make_meeting(self.host), type='meeting_created', message='Mời họp',
+        )
+        client = dispatcher.ZaloClient(api_url=f'http://127.0.0.1:{self.server.server_port}/', access_token='khoa', timeout=5)
+        self.dispatcher = dispatcher.Dispatcher(
+            clients={'zalo': client}, rate_limits={'zalo': 1000}, workers=2, max_attempts=2,
+        )
+        self.addCleanup(self.dispatcher.close)
+
+    def entry(self, recipient):
+        return NotificationOutbox.objects.create(
+            notification=self.notification, recipient=recipient, message='Mời họp', idempotency_key=f'zalo:{recipient}',
+        )
+
+    def test_send(self):
+        entry = self.entry('ok')
+        self.assertEqual(self.dispatcher.dispatch_once(), 1)
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'sent')
+        self.assertEqual(entry.claim_token, '')
+        self.assertEqual(self.server.received, [('ok', 'zalo:ok', 'khoa')])
+
+    def test_retry_with_backoff_then_dead_letter(self):
+        entry = self.entry('ban')
+        before = timezone.now()
+        self.dispatcher.dispatch_once()
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts, entry.last_error), ('pending', 1, 'HTTP 503'))
+        self.assertGreaterEqual(entry.next_attempt_at, before + dispatcher.backoff_delay(1))
+        # Chưa tới lần thử tiếp theo
+        self.assertEqual(self.dispatcher.dispatch_once(), 0)
+
+        NotificationOutbox.objects.filter(pk=entry.pk).update(next_attempt_at=timezone.now())
+        self.dispatcher.dispatch_once()
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts), ('failed', 2))
+        self.assertEqual(len(self.server.received), 2)
+
+    def test_rejected_recipient_is_not_retried(self):
+        entry = self.entry('sai')
+        self.dispatcher.dispatch_once()
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts), ('failed', 1))
+        self.assertIn('-201', entry.last_error)
+
+    def test_reclaimed_batch_is_not_overwritten(self):
+        sent, failed = self.entry('ok'), self.entry('ban')
+        entries = dispatcher.claim_batch(10)
+        # Hết hạn giữ: worker khác đã nhận lại lô
+        NotificationOutbox.objects.update(claim_token='khac')
+        with mock.patch.object(dispatcher, 'claim_batch', return_value=entries):
+            self.dispatcher.dispatch_once()
+        for entry in (sent, failed):
+            entry.refresh_from_db()
+            self.assertEqual((entry.status, entry.claim_token, entry.attempts), ('sending', 'khac', 0))
+
+
+class ScheduleConflictTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        membership._local.clear()
+        self.host = make_user('chutri')
+        self.other_host = make_user('chutrikhac')
+
+    def test_sweep_reports_every_overlapping_pair(self):
+        a = Meeting(title='A', date=date(2030, 1, 7), time=time(8, 0), duration=240, host=self.host)
+        b = Meeting(title='B', date=date(2030, 1, 7), time=time(9, 0), duration=60, host=self.host)
+        c = Meeting(title='C', date=date(2030, 1, 7), time=time(9, 30), duration=15, host=self.host)
+        pairs = {(first.title, second.title) for _, first, second in find_schedule_conflicts([(c, ()), (b, ()), (a, ())])}
+        self.assertEqual(pairs, {('A', 'B'), ('A', 'C'), ('B', 'C')})
+
+    def test_save_rejects_overlap(self):
+        make_meeting(self.host, time=time(8, 0), duration=120)
+        with self.assertRaises(ValidationError):
+            make_meeting(self.host, time=time(9, 0))
+        make_meeting(self.host, time=time(9, 0), status=Meeting.CANCELLED)
+        make_meeting(self.other_host, time=time(9, 0))
+
+    def test_unrelated_meetings_are_ignored(self):
+        other = make_meeting(self.other_host, time=time(8, 0), duration=120)
+        meeting = Meeting(title='Họp', date=other.date, time=time(9, 0), host=self.host)
+        self.assertEqual(find_conflicts(meeting), [])
+        member = make_user('thanhvien')
+        department = Department.objects.create(name='Khoa Nội')
+        UserAffiliation.objects.create(user=member, department=department)
+        other.add_participants(departments=[department], notify=False)
+        self.assertEqual(find_conflicts(meeting, {member.pk}), [(member.pk, other)])
+
+    def test_editing_other_fields_keeps_existing_overlap(self):
+        first = make_meeting(self.host, time=time(8, 0), duration=120)
+        second = make_meeting(self.host, time=time(11, 0))
+        Meeting.objects.filter(pk=second.pk).update(time=time(9, 0))
+        second.refresh_from_db()
+        second.title = 'Đổi tiêu đề'
+        second.save()
+        second.time = time(8, 30)
+        with self.assertRaises(ValidationError):
+            second.save()
+        self.assertEqual(Meeting.objects.get(pk=first.pk).time, time(8, 0))
+
+
+class UnreadCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user('nguoinhan')
+        self.meeting = make_meeting(self.user)
+
+    def notify(self):
+        Notification.objects.create(user=self.user, meeting=self.meeting, type='meeting_created', message='Mời họp')
+
+    def test_counter_follows_changes(self):
+        self.assertEqual(notifications.unread_count(self.user), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notify()
+            self.notify()
+        self.assertEqual(notifications.unread_count(self.user), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            notifications.mark_read(self.user)
+        self.assertEqual(notifications.unread_count(self.user), 0)
+
+    def test_change_missed_while_counting_forces_recount(self):
+        add = cache.add
+
+        def add_after_change(*args, **kwargs):
+            # Thông báo mới commit sau lúc đếm, trước khi bộ đếm được lưu
+            self.notify()
+            notifications.adjust_unread_counts({self.user.pk: 1})
+            return add(*args, **kwargs)
+
+        with mock.patch.object(cache, 'add', add_after_change):
+            self.assertEqual(notifications.unread_count(self.user), 0)
+        self.assertEqual(notifications.unread_count(self.user), 1)
+
+
+class BenchmarkTests(TestCase):
+    def test_regressions_compare_queries_exactly_and_scale_timings(self):
+        baseline = {benchmarks.CALIBRATION: {'median_ms': 50.0}, 'view': {'median_ms': 10.0, 'queries': 3}}
+        factor = benchmarks.scale(baseline, 100.0)
+        self.assertEqual(factor, 2.0)
+        self.assertEqual(benchmarks.regressions({'view': {'median_ms': 25.0, 'queries': 3}}, baseline, 0.5, factor), [])
+        problems = benchmarks.regressions({'view': {'median_ms': 31.0, 'queries': 2}}, baseline, 0.5, factor)
+        self.assertEqual(len(problems), 2)
+
+    def test_generator_refuses_same_prefix(self):
+        options = {
+            'departments': 1, 'organizations': 1, 'users': 2, 'meetings': 2, 'participants': 2,
+            'prefix': 'thu', 'skip_index': True, 'stdout': io.StringIO(),
+        }
+        call_command('generate_synthetic_data', **options)
+        with self.assertRaises(CommandError):
+            call_command('generate_synthetic_data', **options)
+        call_command('generate_synthetic_data', **{**options, 'prefix': 'thu2'})
+
+
+class AddParticipantsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        membership._local.clear()
+        self.host = make_user('chutri')
+        self.member = make_user('thanhvien')
+        self.department = Department.objects.create(name='Khoa Nội')
+        UserAffiliation.objects.create(user=self.member, department=self.department)
+        self.meeting = make_meeting(self.host)
+
+    def notified(self):
+        return list(Notification.objects.filter(meeting=self.meeting).values_list('user_id', flat=True))
+
+    def test_member_invited_again_individually_is_notified_once(self):
+        self.meeting.add_participants(departments=[self.department])
+        self.meeting.add_participants(users=[self.member])
+        self.assertEqual(self.notified(), [self.member.pk])
+        self.assertEqual(self.meeting.meeting_participants.count(), 2)
+
+    def test_single_add_skips_people_already_attending(self):
+        self.meeting.add_participants(departments=[self.department])
+        self.meeting.add_participant(self.member)
+        self.assertEqual(self.notified(), [self.member.pk])
+
+    def test_department_after_individual_does_not_notify_again(self):
+        other = make_user('nguoikhac')
+        UserAffiliation.objects.create(user=other, department=self.department)
+        self.meeting.add_participants(users=[self.member])
+        self.meeting.add_participants(departments=[self.department])
+        self.assertEqual(sorted(self.notified()), sorted([self.member.pk, other.pk]))
+
+
+class AttendanceRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        membership._local.clear()
+        self.host = make_user('chutri')
+        self.member = make_user('thanhvien')
+        self.old = Department.objects.create(name='Khoa Nội')
+        self.new = Department.objects.create(name='Khoa Ngoại')
+        self.affiliation = UserAffiliation.objects.create(user=self.member, department=self.old)
+        self.meeting = make_meeting(self.host)
+        self.meeting.add_participants(users=[self.member])
+
+    def department_totals(self):
+        day = self.meeting.date
+        return rollups.totals(rollups.DEPARTMENT, day, day)
+
+    def snapshot(self):
+        return sorted(AttendanceRollup.objects.filter(invited__gt=0).values_list(
+            'kind', 'period', 'object_id', 'date', *rollups.COUNTERS,
+        ))
+
+    def test_affiliation_change_moves_past_meetings(self):
+        self.assertEqual(set(self.department_totals()), {self.old.pk})
+        self.affiliation.department = self.new
+        self.affiliation.save()
+        # Số liệu tính theo nơi công tác hiện tại, kể cả các cuộc họp trước đây
+        self.assertEqual(set(self.department_totals()), {self.new.pk})
+        before = self.snapshot()
+        rollups.rebuild()
+        self.assertEqual(self.snapshot(), before)
+
+    def test_deferred_participant_edit_is_counted(self):
+        participant = self.meeting.meeting_participants.only('pk', 'attended').get()
+        participant.attended = True
+        participant.save()
+        counters = self.department_totals()[self.old.pk]
+        self.assertEqual(counters, {'invited': 1, 'attended': 1, 'required': 1, 'required_attended': 1})
+        before = self.snapshot()
+        rollups.rebuild()
+        self.assertEqual(self.snapshot(), before)
+
+    def test_portable_upsert_matches_on_conflict(self):
+        other = make_meeting(self.host, title='Họp chuyên môn', time=time(14, 0))
+        with mock.patch.object(connection, 'vendor', 'other'):
+            other.add_participants(users=[self.member])
+            participant = self.meeting.meeting_participants.get()
+            participant.attended = True
+            participant.save()
+        counters = self.department_totals()[self.old.pk]
+        self.assertEqual(counters, {'invited': 2, 'attended': 1, 'required': 2, 'required_attended': 1})
+        before = self.snapshot()
+        rollups.rebuild()
+        self.assertEqual(self.snapshot(), before)
+
+
+class ImportMeetingsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        membership._local.clear()
+        self.admin = make_user('quantri')
+        self.host = make_user('chutri')
+        self.member = make_user('thanhvien')
+        self.department = Department.objects.create(name='Khoa Nội')
+        UserAffiliation.objects.create(user=self.member, department=self.department)
+
+    def import_csv(self, text, **kwargs):
+        rows = imports.read_rows(io.BytesIO(text.encode('utf-8-sig')), 'lich.csv')
+        return imports.import_meetings(rows, self.admin, **kwargs)
+
+    def test_csv_with_vietnamese_headers(self):
+        report = self.import_csv(
+            'Tiêu đề;Ngày;Giờ;Chủ trì;Loại;Thành phần\n'
+            'Họp giao ban;07/01/2030;08:00;chutri;Khoa/Phòng;khoa noi\n'
+            ';;;;Cá nhân;thanhvien\n'
+            '\n'
+            'Họp chuyên môn;2030-01-08;14:00;CHUTRI;;\n'
+        )
+        self.assertEqual(report.errors, [])
+        self.assertEqual((report.rows, report.meetings, report.participants), (3, 2, 2))
+        meeting = Meeting.objects.get(title='Họp giao ban')
+        self.assertEqual((meeting.date, meeting.time, meeting.host), (date(2030, 1, 7), time(8, 0), self.host))
+        self.assertEqual(meeting.meeting_participants.count(), 2)
+        self.assertTrue(meeting.meeting_number)
+        self.assertEqual(
+            list(Notification.objects.filter(meeting=meeting).values_list('user_id', flat=True)), [self.member.pk],
+        )
+
+    @skipUnless(find_spec('openpyxl'), 'Cần openpyxl để đọc tệp .xlsx')
+    def test_xlsx(self):
+        from openpyxl import Workbook
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['Tiêu đề', 'Ngày', 'Giờ', 'Chủ trì', 'Thành phần', 'Bắt buộc'])
+        sheet.append(['Họp giao ban', datetime(2030, 1, 7), time(9, 30), 'chutri', 'thanhvien', 'không'])
+        file = io.BytesIO()
+        workbook.save(file)
+        file.seek(0)
+        report = imports.import_meetings(imports.read_rows(file, 'lich.xlsx'), self.admin)
+        self.assertEqual(report.errors, [])
+        meeting = Meeting.objects.get()
+        self.assertEqual((meeting.date, meeting.time), (date(2030, 1, 7), time(9, 30)))
+        self.assertFalse(meeting.meeting_participants.get().is_required)
+
+    def test_missing_required_column(self):
+        with self.assertRaises(imports.ImportFileError):
+            self.import_csv('Tiêu đề,Ngày\nHọp giao ban,07/01/2030\n')
+
+    def test_errors_reported_per_row(self):
+        report = self.import_csv(
+            'Tiêu đề,Ngày,Giờ,Chủ trì,Loại,Thành phần\n'
+            ',,,,Cá nhân,thanhvien\n'
+            'Họp giao ban,07/01/2030,08:00,khongco,,\n'
+            'Họp chuyên môn,08/01/2030,08:00,chutri,,\n'
+            ',,,,Nhóm lạ,thanhvien\n'
+            'Họp tổng kết,09/01/2030,08:00,chutri,,thanhvien\n'
+            ',,,,,thanhvien\n'
+        )
+        rows = sorted({row for row, _ in report.errors})
+        self.assertEqual(rows, [2, 3, 4, 5, 6, 7])
+        self.assertIn((3, 'Chủ trì: Không tìm thấy "khongco".'), report.errors)
+        self.assertIn((7, 'Thành phần tham dự bị trùng trong cùng cuộc họp.'), report.errors)
+        self.assertEqual(report.meetings, 0)
+        self.assertFalse(Meeting.objects.exists())
+
+    def test_conflicting_meetings_rejected(self):
+        existing = make_meeting(self.host)
+        report = self.import_csv(
+            'Tiêu đề,Ngày,Giờ,Chủ trì,Thành phần\n'
+            'Trùng cuộc họp đã có,07/01/2030,08:30,chutri,thanhvien\n'
+            'Không trùng,07/01/2030,10:00,quantri,thanhvien\n'
+            'Trùng trong tệp,07/01/2030,10:30,chutri,thanhvien\n'
+        )
+        self.assertEqual(report.meetings, 1)
+        self.assertEqual(sorted({row for row, _ in report.errors}), [2, 4])
+        self.assertTrue(any(existing.meeting_number in message for row, message in report.errors if row == 2))
+        self.assertIn((4, 'Trùng lịch: thanhvien đã có cuộc họp ở dòng 3 - Không trùng lúc 10:00.'), report.errors)
+        self.assertEqual(
+            set(Meeting.objects.values_list('title', flat=True)), {existing.title, 'Không trùng'},
+        )
+
+    def test_dry_run_rolls_back(self):
+        report = self.import_csv(
+            'Tiêu đề,Ngày,Giờ,Chủ trì,Thành phần\n'
+            'Họp giao ban,07/01/2030,08:00,chutri,thanhvien\n',
+            dry_run=True,
+        )
+        self.assertEqual((report.meetings, report.participants), (1, 1))
+        self.assertFalse(Meeting.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.host = make_user('chutri')
+        # Cùng ngày có giờ trùng nhau và cuộc họp không có giờ, để thứ tự phải dùng tới id
+        schedule = [
+            (date(2030, 1, 8), time(9, 0)), (date(2030, 1, 7), time(8, 0)), (date(2030, 1, 7), time(8, 0)),
+            (date(2030, 1, 7), None), (date(2030, 1, 7), time(14, 0)), (date(2030, 1, 7), None),
+            (date(2030, 1, 6), None),
+        ]
+        Meeting.objects.bulk_create([
+            Meeting(title=f'Họp {index}', date=day, time=start, host=self.host, created_by=self.host)
+            for index, (day, start) in enumerate(schedule)
+        ])
+        self.ordered = list(Meeting.objects.order_by(*pagination.ORDERING).values_list('pk', flat=True))
+
+    def pks(self, page):
+        return [meeting.pk for meeting in page]
+
+    def test_next_and_previous_round_trip(self):
+        pages = [pagination.paginate_meetings(Meeting.objects.all(), page_size=2)]
+        while pages[-1].has_next:
+            pages.append(pagination.paginate_meetings(Meeting.objects.all(), after=pages[-1].next_cursor, page_size=2))
+        self.assertEqual([pk for page in pages for pk in self.pks(page)], self.ordered)
+        self.assertFalse(pages[0].has_previous)
+
+        # Quay lại từ trang cuối bằng con trỏ `before` đi qua đúng các trang đã xem
+        page = pages[-1]
+        for expected in reversed(pages[:-1]):
+            page = pagination.paginate_meetings(Meeting.objects.all(), before=page.previous_cursor, page_size=2)
+            self.assertEqual(self.pks(page), self.pks(expected))
+        self.assertFalse(page.has_previous)
+
+    def test_cursor_on_meeting_without_time(self):
+        untimed = Meeting.objects.filter(date=date(2030, 1, 7), time__isnull=True).order_by('-pk').first()
+        cursor = pagination.encode_cursor(untimed)
+        self.assertEqual(pagination.decode_cursor(cursor), (untimed.date, None, untimed.pk))
+        index = self.ordered.index(untimed.pk)
+        after = pagination.paginate_meetings(Meeting.objects.all(), after=cursor, page_size=10)
+        self.assertEqual(self.pks(after), self.ordered[index + 1:])
+        before = pagination.paginate_meetings(Meeting.objects.all(), before=cursor, page_size=10)
+        self.assertEqual(self.pks(before), self.ordered[:index])
+
+    def test_deep_page_seeks_by_date(self):
+        cursor = pagination.encode_cursor(Meeting.objects.get(pk=self.ordered[3]))
+        sql = str(pagination._page_query(Meeting.objects.all(), after=cursor).query)
+        self.assertIn('"date" <=', sql)
+
+    def test_invalid_cursor(self):
+        for token in ('khong-hop-le', 'YWJj', ''):
+            with self.subTest(token=token), self.assertRaises(pagination.InvalidCursor):
+                pagination.decode_cursor(token)
+        self.client.force_login(self.host)
+        response = self.client.get(reverse('meeting_list'), {'after': 'khong-hop-le'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Họp 0')
+
+    def test_filters_kept_in_next_query(self):
+        Meeting.objects.bulk_create([
+            Meeting(title=f'Họp thêm {index}', date=date(2030, 1, 5), host=self.host, created_by=self.host)
+            for index in range(pagination.PAGE_SIZE)
+        ])
+        self.client.force_login(self.host)
+        response = self.client.get(reverse('meeting_list'), {'title': 'Họp', 'date_to': '2030-01-07'})
+        last = Meeting.objects.filter(date__lte=date(2030, 1, 7)).order_by(*pagination.ORDERING)[pagination.PAGE_SIZE - 1]
+        next_query = urlencode([
+            ('date_to', '2030-01-07'), ('title', 'Họp'), ('after', pagination.encode_cursor(last)),
+        ])
+        self.assertContains(response, f'href="?{next_query}"'.replace('&', '&amp;'))
+
+
+def local(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+class StatusEngineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        membership._local.clear()
+        self.host = make_user('chutri')
+        self.meeting = make_meeting(self.host, duration=60)
+
+    def status(self, meeting):
+        return Meeting.objects.values_list('status', flat=True).get(pk=meeting.pk)
+
+    def test_scheduled_ongoing_finished(self):
+        self.assertEqual(statuses.advance_statuses(local(2030, 1, 7, 7, 59)), 0)
+        self.assertEqual(self.status(self.meeting), Meeting.SCHEDULED)
+        self.assertEqual(statuses.advance_statuses(local(2030, 1, 7, 8, 0)), 1)
+        self.assertEqual(self.status(self.meeting), Meeting.ONGOING)
+        self.assertEqual(statuses.advance_statuses(local(2030, 1, 7, 9, 0)), 1)
+        self.assertEqual(self.status(self.meeting), Meeting.FINISHED)
+        self.assertEqual(statuses.advance_statuses(local(2030, 1, 7, 10, 0)), 0)
+
+    def test_untimed_meeting_lasts_all_day(self):
+        all_day = make_meeting(self.host, date=date(2030, 1, 8), time=None)
+        statuses.advance_statuses(local(2030, 1, 8, 0, 0))
+        self.assertEqual(self.status(all_day), Meeting.ONGOING)
+        statuses.advance_statuses(local(2030, 1, 8, 23, 59))
+        self.assertEqual(self.status(all_day), Meeting.ONGOING)
+        statuses.advance_statuses(local(2030, 1, 9, 0, 0))
+        self.assertEqual(self.status(all_day), Meeting.FINISHED)
+
+    def test_backlog_finished_in_one_update(self):
+        old = make_meeting(self.host, date=date(2029, 12, 1))
+        cancelled = make_meeting(self.host, date=date(2029, 12, 2), status=Meeting.CANCELLED)
+        later = make_meeting(self.host, date=date(2030, 2, 1))
+        upcoming = later.reminders.filter(sent_at__isnull=True).count()
+        MeetingReminder.objects.create(meeting=old, offset_minutes=5, remind_at=local(2029, 12, 1, 7, 55))
+        with self.captureOnCommitCallbacks(execute=True):
+            changed = statuses.advance_statuses(local(2030, 1, 10, 12, 0))
+        self.assertEqual(changed, 2)
+        self.assertEqual(self.status(old), Meeting.FINISHED)
+        self.assertEqual(self.status(cancelled), Meeting.CANCELLED)
+        self.assertEqual(self.status(later), Meeting.SCHEDULED)
+        self.assertFalse(old.reminders.filter(sent_at__isnull=True).exists())
+        self.assertEqual(later.reminders.filter(sent_at__isnull=True).count(), upcoming)
+        # Phần tồn đọng không được thông báo
+        self.assertFalse(Notification.objects.exists())
+
+    def test_only_recent_transitions_are_notified(self):
+        early = make_meeting(make_user('chutri2'), time=time(6, 0), duration=240)
+        with self.captureOnCommitCallbacks(execute=True):
+            statuses.advance_statuses(local(2030, 1, 7, 8, 10))
+        self.assertEqual(self.status(early), Meeting.ONGOING)
+        self.assertEqual(
+            list(Notification.objects.values_list('meeting_id', 'user_id', 'type')),
+            [(self.meeting.pk, self.host.pk, 'meeting_updated')],
+        )
+        statuses.advance_statuses(local(2030, 1, 7, 8, 20), notify=False)
+        self.assertEqual(Notification.objects.count(), 1)
+
+
+def form_data(form):
+    """
+    Dữ liệu POST như trình duyệt gửi lại một form (kèm formset thành phần tham dự) chưa sửa gì.
+    """
+    formset = form.participant_formset
+    fields = [*form, *formset.management_form, *(field for subform in formset.forms for field in subform)]
+    return {field.html_name: field.value() for field in fields if field.value() not in (None, False, '')}
+
+
+class SaveParticipantsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        membership._local.clear()
+        self.host = make_user('chutri')
+        self.users = [make_user(f'thanhvien{index}') for index in range(5)]
+        self.meeting = make_meeting(self.host)
+        self.meeting.add_participants(users=self.users[:4], notify=False)
+        self.participants = list(self.meeting.meeting_participants.order_by('pk'))
+
+    def participant_writes(self, data):
+        form = MeetingWithParticipantsForm(data, instance=Meeting.objects.get(pk=self.meeting.pk))
+        self.assertTrue(form.is_valid(), form.errors)
+        table = MeetingParticipant._meta.db_table
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            form.save()
+        writes = [
+            query['sql'].split()[0] for query in queries.captured_queries
+            if table in query['sql'].split(' WHERE ')[0] and not query['sql'].startswith('SELECT')
+        ]
+        return sorted(writes)
+
+    def test_unchanged_formset_writes_nothing(self):
+        data = form_data(MeetingWithParticipantsForm(instance=self.meeting))
+        self.assertEqual(self.participant_writes(data), [])
+
+    def test_one_statement_per_kind_of_change(self):
+        feed = ical.feed_state(ical.USER, self.users[4].pk)
+        data = form_data(MeetingWithParticipantsForm(instance=self.meeting))
+        prefix = MeetingWithParticipantsForm(instance=self.meeting).participant_formset.prefix
+        del data[f'{prefix}-0-is_required']
+        data[f'{prefix}-1-DELETE'] = 'on'
+        data[f'{prefix}-4-participant_type'] = 'individual'
+        data[f'{prefix}-4-user'] = self.users[4].pk
+        self.assertEqual(self.participant_writes(data), ['DELETE', 'INSERT', 'UPDATE'])
+
+        self.assertFalse(MeetingParticipant.objects.get(pk=self.participants[0].pk).is_required)
+        self.assertFalse(MeetingParticipant.objects.filter(pk=self.participants[1].pk).exists())
+        day = self.meeting.date
+        totals = rollups.totals(rollups.USER, day, day)
+        self.assertEqual(set(totals), {self.users[0].pk, self.users[2].pk, self.users[3].pk, self.users[4].pk})
+        self.assertEqual(totals[self.users[0].pk]['required'], 0)
+        self.assertNotEqual(ical.feed_state(ical.USER, self.users[4].pk), feed)
+
+
+@override_settings(MEETING_REMINDER_OFFSETS=[24 * 60, 30])
+class ReminderSchedulerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        membership._local.clear()
+        self.host = make_user('chutri')
+        self.member = make_user('thanhvien')
+        self.meeting = make_meeting(self.host)
+        self.meeting.add_participants(users=[self.member], notify=False)
+
+    def reminder_times(self):
+        return dict(self.meeting.reminders.values_list('offset_minutes', 'remind_at'))
+
+    def test_reminders_follow_reschedule(self):
+        self.assertEqual(self.reminder_times(), {1440: local(2030, 1, 6, 8, 0), 30: local(2030, 1, 7, 7, 30)})
+        self.meeting.reminders.filter(offset_minutes=1440).update(sent_at=local(2030, 1, 6, 8, 0))
+        self.meeting.time = time(14, 0)
+        self.meeting.save()
+        self.assertEqual(self.reminder_times(), {1440: local(2030, 1, 6, 14, 0), 30: local(2030, 1, 7, 13, 30)})
+        # Lịch nhắc đã gửi được đặt lại khi thời điểm nhắc đổi
+        self.assertFalse(self.meeting.reminders.filter(sent_at__isnull=False).exists())
+
+    def clock(self, *args):
+        # updated_at (auto_now) và bộ lập lịch dùng cùng một đồng hồ
+        return mock.patch('django.utils.timezone.now', return_value=local(*args))
+
+    def test_due_reminder_sent_once(self):
+        self.meeting.reminders.filter(offset_minutes=1440).delete()
+        scheduler = reminders.ReminderScheduler()
+        with self.clock(2030, 1, 7, 7, 0):
+            self.assertEqual(scheduler.tick(), 0)
+        with self.clock(2030, 1, 7, 7, 30):
+            self.assertEqual(scheduler.tick(), 1)
+        with self.clock(2030, 1, 7, 7, 31):
+            self.assertEqual(scheduler.tick(), 0)
+            # Bộ lập lịch khởi động lại cũng không nhắc lần nữa
+            self.assertEqual(reminders.ReminderScheduler().tick(), 0)
+        reminder = self.meeting.reminders.get()
+        self.assertEqual(reminder.sent_at, local(2030, 1, 7, 7, 30))
+        self.assertEqual(reminders.fire_reminders([reminder.pk], local(2030, 1, 7, 7, 33)), 0)
+        self.assertEqual(
+            sorted(Notification.objects.filter(type='meeting_reminder').values_list('user_id', flat=True)),
+            [self.host.pk, self.member.pk],
+        )
+
+    def test_moved_reminder_fires_at_new_time(self):
+        self.meeting.reminders.filter(offset_minutes=1440).delete()
+        scheduler = reminders.ReminderScheduler()
+        with self.clock(2030, 1, 7, 7, 0):
+            scheduler.tick()
+        with self.clock(2030, 1, 7, 7, 10):
+            self.meeting.time = time(9, 0)
+            self.meeting.save()
+        with self.clock(2030, 1, 7, 7, 30):
+            self.assertEqual(scheduler.tick(), 0)
+        with self.clock(2030, 1, 7, 8, 30):
+            self.assertEqual(scheduler.tick(), 1)
+        self.assertEqual(self.meeting.reminders.get().sent_at, local(2030, 1, 7, 8, 30))
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        instrumentation.stats.reset()
+        self.addCleanup(instrumentation.stats.reset)
+        self.host = make_user('chutri')
+
+    def view(self, request):
+        # Một truy vấn danh sách rồi một truy vấn cho mỗi dòng: mẫu N+1 điển hình
+        for pk in User.objects.values_list('pk', flat=True):
+            User.objects.filter(pk=pk).exists()
+        return HttpResponse('ok')
+
+    @override_settings(REQUEST_INSTRUMENTATION=False)
+    def test_disabled_middleware_is_removed(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            instrumentation.QueryInstrumentationMiddleware(self.view)
+
+    def test_fingerprint_hides_values(self):
+        self.assertEqual(
+            instrumentation.fingerprint("SELECT * FROM t WHERE id = 15 AND name = 'O''Neil' AND pk IN (%s, %s, %s)"),
+            "SELECT * FROM t WHERE id = ? AND name = ? AND pk IN (...)",
+        )
+
+    @override_settings(REQUEST_INSTRUMENTATION=True, REQUEST_INSTRUMENTATION_N_PLUS_ONE_THRESHOLD=3)
+    def test_counts_queries_and_flags_repeats(self):
+        for index in range(3):
+            make_user(f'thanhvien{index}')
+        middleware = instrumentation.QueryInstrumentationMiddleware(self.view)
+        with self.assertLogs('meeting_manager.instrumentation', 'WARNING') as logs:
+            response = middleware(RequestFactory().get('/meeting_manager/'))
+        self.assertEqual(response['X-DB-Queries'], '5')
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('4x SELECT', logs.output[0])
+        summary = instrumentation.stats.summary()['/meeting_manager/']
+        self.assertEqual((summary['requests'], summary['queries']['max'], summary['n_plus_one_requests']), (1, 5, 1))
+
+    @override_settings(REQUEST_INSTRUMENTATION=True)
+    def test_quiet_request_not_flagged(self):
+        middleware = instrumentation.QueryInstrumentationMiddleware(lambda request: HttpResponse('ok'))
+        response = middleware(RequestFactory().get('/meeting_manager/'))
+        self.assertEqual(response['X-DB-Queries'], '0')
+        self.assertEqual(instrumentation.stats.summary()['/meeting_manager/']['n_plus_one_requests'], 0)
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        self.user = make_user('nvduc', first_name='Nguyễn Văn', last_name='Đức')
+        self.department = Department.objects.create(name='Khoa Điều trị tích cực')
+
+    def user_ids(self, text):
+        return [row['id'] for row in autocomplete.users(text)]
+
+    def test_accent_insensitive_prefix(self):
+        for text in ('nguyen v', 'NGUYỄN VĂN Đ', '  nguyen   van ', 'duc', 'Đứ'):
+            with self.subTest(text=text):
+                self.assertEqual(self.user_ids(text), [self.user.pk])
+        # Chỉ khớp phần đầu của họ tên hoặc tên
+        self.assertEqual(self.user_ids('van'), [])
+        self.assertEqual(autocomplete.departments('khoa dieu'), [{'id': self.department.pk, 'text': self.department.name}])
+        self.assertEqual(autocomplete.departments('dieu'), [])
+
+    def test_inactive_users_hidden(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.user_ids('nguyen'), [])
+
+    def test_rename_refreshes_search_name(self):
+        self.user.last_name = 'Đạt'
+        self.user.save()
+        self.assertEqual(self.user_ids('dat'), [self.user.pk])
+        self.assertEqual(self.user_ids('duc'), [])
+        self.department.name = 'Khoa Hồi sức'
+        self.department.save()
+        self.assertEqual(Department.objects.get(pk=self.department.pk).search_name, 'khoa hoi suc')
+        self.assertEqual(autocomplete.departments('khoa dieu'), [])
+        self.assertEqual([row['id'] for row in autocomplete.departments('khoa hoi')], [self.department.pk])
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA, MEETING_PREVIEW_ROOT=TEMP_MEDIA, MEETING_PREVIEW_PDFTOPPM='khong-co-pdftoppm')
+class PreviewWorkerTests(TestCase):
+    def setUp(self):
+        self.host = make_user('chutri')
+        self.meeting = make_meeting(self.host)
+
+    def attach(self, name):
+        meeting_file = MeetingFile(meeting=self.meeting, name=name, uploaded_by=self.host)
+        meeting_file.file.save(name, ContentFile(b'noi dung'), save=False)
+        meeting_file.save()
+        return meeting_file
+
+    def process(self):
+        worker = previews.PreviewWorker(workers=1)
+        try:
+            return worker.process_once()
+        finally:
+            worker.close()
+
+    def test_upload_only_enqueues(self):
+        meeting_file = self.attach('bien-ban.pdf')
+        preview = FilePreview.objects.get(meeting_file=meeting_file)
+        self.assertEqual((preview.status, preview.sha256, preview.attempts), ('pending', '', 0))
+
+    def test_unsupported_files_are_settled_without_rendering(self):
+        # Loại tệp không có ảnh xem trước, và PDF khi máy chủ không có pdftoppm
+        files = [self.attach('ghi-chu.txt'), self.attach('bien-ban.pdf')]
+        with mock.patch.object(previews, 'render') as render:
+            self.assertEqual(self.process(), 2)
+        render.assert_not_called()
+        for preview in FilePreview.objects.filter(meeting_file__in=files):
+            self.assertEqual((preview.status, preview.claim_token, preview.locked_until), ('unsupported', '', None))
+        # Đã xác định xong thì không được nhận lại
+        self.assertEqual(self.process(), 0)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA, MEETING_FILE_OFFLOAD='')
+class ExportZipTests(TestCase):
+    def setUp(self):
+        self.host = make_user('chutri')
+        self.meeting = make_meeting(self.host, title='Họp giao ban: tuần 2/1')
+        self.other = make_meeting(self.host, title='Họp chuyên môn', time=time(14, 0))
+        MeetingMinutes.objects.create(meeting=self.meeting, content='Biên bản họp\n', created_by=self.host)
+        self.contents = {'ghi-chu.txt': 'Ghi chú '.encode() * 50000, 'bien-ban.pdf': b'%PDF-1.4 noi dung'}
+        for name, content in self.contents.items():
+            meeting_file = MeetingFile(meeting=self.meeting, name=name, uploaded_by=self.host)
+            meeting_file.file.save(name, ContentFile(content), save=False)
+            meeting_file.save()
+
+    def test_streamed_archive_round_trips(self):
+        chunks = list(exports.stream_zip(exports.export_queryset(Meeting.objects.all()).iterator(chunk_size=1)))
+        self.assertGreater(len(chunks), 1)
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+            self.assertIsNone(archive.testzip())
+            names = archive.namelist()
+            folder = names[0].split('/')[0]
+            self.assertEqual(folder, f'{self.meeting.meeting_number} - Họp giao ban_ tuần 2_1')
+            for name, content in self.contents.items():
+                self.assertEqual(archive.read(f'{folder}/tep_dinh_kem/{name}'), content)
+            # Tệp đã nén sẵn được lưu nguyên, tệp văn bản được nén
+            self.assertEqual(archive.getinfo(f'{folder}/tep_dinh_kem/bien-ban.pdf').compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(archive.getinfo(f'{folder}/tep_dinh_kem/ghi-chu.txt').compress_type, zipfile.ZIP_DEFLATED)
+            self.assertEqual(archive.read(f'{folder}/bien_ban.txt').decode(), 'Biên bản họp\n')
+            data = json.loads(archive.read(f'{folder}/du_lieu.json'))
+            self.assertEqual(data['minutes_version'], 1)
+
+            manifest = json.loads(archive.read('manifest.json'))
+            self.assertEqual([item['id'] for item in manifest['meetings']], [self.meeting.pk, self.other.pk])
+            sums = archive.read('SHA256SUMS').decode().splitlines()
+            self.assertEqual(len(sums), len(manifest['files']))
+            for line in sums:
+                digest, path = line.split('  ', 1)
+                self.assertEqual(hashlib.sha256(archive.read(path)).hexdigest(), digest)
+
+
+class FragmentCacheTests(TransactionTestCase):
+    # Các lần lưu phải commit thật: trong TestCase lần đổi phiên bản đầu tiên không bao giờ chạy và che các lần sau
+    def setUp(self):
+        cache.clear()
+        membership._local.clear()
+        self.host = make_user('chutri')
+        self.meeting = make_meeting(self.host)
+        self.client.force_login(self.host)
+        self.url = reverse('meeting_detail', args=[self.meeting.pk])
+
+    def test_meeting_save_bumps_version_once_after_commit(self):
+        version = fragments.version()
+        with transaction.atomic():
+            self.meeting.title = 'Họp giao ban tuần'
+            self.meeting.save()
+            self.meeting.save()
+            self.assertEqual(sum(1 for _, func, _ in connection.run_on_commit if func is fragments._bump), 1)
+            # Chưa commit thì request khác vẫn thấy phiên bản cũ
+            self.assertEqual(fragments.version(), version)
+        self.assertNotEqual(fragments.version(), version)
+
+    def test_not_modified_only_while_unchanged(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.meeting.title = 'Họp giao ban tuần'
+        self.meeting.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Họp giao ban tuần')
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_list_etag_follows_version(self):
+        url = reverse('meeting_list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        make_meeting(self.host, title='Họp chuyên môn', time=time(14, 0))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Họp chuyên môn')
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        membership._local.clear()
+        self.host = make_user('chutri')
+        self.meeting = make_meeting(self.host)
+        Notification.objects.bulk_create([
+            Notification(user=self.host, meeting=self.meeting, type='meeting_created', message=f'Thông báo {index}')
+            for index in range(2)
+        ])
+
+    async def test_meeting_list(self):
+        await self.async_client.aforce_login(self.host)
+        response = await self.async_client.get(reverse('meeting_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.meeting.title)
+        response = await self.async_client.get(reverse('meeting_list'), headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_unread_count_and_mark_read(self):
+        await self.async_client.aforce_login(self.host)
+        response = await self.async_client.get(reverse('notification_unread_count'))
+        self.assertEqual(response.json(), {'unread': 2})
+        response = await self.async_client.post(reverse('notification_mark_read'))
+        self.assertEqual(response.json(), {'updated': 2, 'unread': 0})
+
+    async def test_login_required(self):
+        response = await self.async_client.get(reverse('notification_unread_count'))
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(NOTIFICATION_STREAM_HEARTBEAT=5)
+    async def test_stream_pushes_new_notification(self):
+        # Tác vụ đọc nền không chạy: lần đọc CSDL được gọi trực tiếp bằng hub.poll()
+        idle = asyncio.get_running_loop().create_future()
+        with mock.patch.object(streams.hub, 'task', idle), \
+                mock.patch.object(streams.hub, 'subscriptions', defaultdict(set)):
+            await self.async_client.aforce_login(self.host)
+            response = await self.async_client.get(reverse('notification_stream'))
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            events = aiter(response.streaming_content)
+            self.assertTrue((await anext(events)).startswith(b'retry: '))
+            self.assertIn(b'event: unread\ndata: {"unread": 2}', await anext(events))
+
+            notification = await Notification.objects.acreate(
+                user=self.host, meeting=self.meeting, type='meeting_updated', message='Đổi giờ họp',
+            )
+            self.assertEqual(await streams.hub.poll(), 1)
+            event = (await anext(events)).decode()
+            self.assertTrue(event.startswith(f'id: {notification.pk}\nevent: notification\n'))
+            self.assertIn('"message": "Đổi giờ họp"', event)
+            self.assertIn('event: unread', (await anext(events)).decode())
+            await events.aclose()
+        idle.cancel()
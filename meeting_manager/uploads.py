@@ -0,0 +1,226 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import FileBlob, MeetingFile, UploadSession
+
+#Số byte đọc từ request hoặc từ đĩa mỗi lần, bộ nhớ dùng không phụ thuộc kích thước tệp
+CHUNK_SIZE = 64 * 1024
+
+# Trạng thái băm của các phiên đang tải trong tiến trình: id phiên -> (số byte đã băm, hashlib, lần dùng cuối)
+# Phiên bị bỏ dở được loại khỏi đây sau MEETING_UPLOAD_SESSION_TTL_HOURS giờ, kể cả khi lệnh
+# purge_upload_sessions chạy ở tiến trình khác
+_hashers = {}
+_hashers_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    """
+    Lỗi tải lên. `offset` là vị trí máy khách cần gửi tiếp (nếu có).
+    """
+
+    def __init__(self, message, offset=None):
+        super().__init__(message)
+        self.offset = offset
+
+
+class _PartFile(File):
+    # FileSystemStorage chuyển (rename) tệp có temporary_file_path thay vì sao chép lại nội dung
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def temp_path(session_id):
+    return os.path.join(settings.MEETING_UPLOAD_TEMP_DIR, f"{session_id}.part")
+
+
+def blob_name(sha256):
+    return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def start_upload(meeting, user, name, size, sha256=''):
+    """
+    Tạo phiên tải lên cho tệp `name` có `size` byte. Tệp rỗng được hoàn tất ngay.
+    """
+    if size < 0 or size > settings.MEETING_UPLOAD_MAX_SIZE:
+        raise UploadError('Kích thước tệp không hợp lệ hoặc vượt quá giới hạn cho phép.')
+    session = UploadSession.objects.create(
+        meeting=meeting, uploaded_by=user, name=name, size=size, expected_sha256=sha256.lower(),
+    )
+    os.makedirs(settings.MEETING_UPLOAD_TEMP_DIR, exist_ok=True)
+    open(temp_path(session.pk), 'wb').close()
+    if size == 0:
+        _complete(session, hashlib.sha256())
+    return session
+
+
+def _remember(session, hasher):
+    now = time.monotonic()
+    ttl = settings.MEETING_UPLOAD_SESSION_TTL_HOURS * 3600
+    with _hashers_lock:
+        for pk in [pk for pk, entry in _hashers.items() if now - entry[2] > ttl]:
+            del _hashers[pk]
+        _hashers[session.pk] = (session.received, hasher, now)
+
+
+def _hasher(session):
+    with _hashers_lock:
+        entry = _hashers.pop(session.pk, None)
+    if entry and entry[0] == session.received:
+        return entry[1]
+    # Các phần trước do tiến trình khác nhận (hoặc tiến trình vừa khởi động lại): băm lại phần đã có trên đĩa
+    hasher = hashlib.sha256()
+    remaining = session.received
+    with open(temp_path(session.pk), 'rb') as part:
+        while remaining:
+            data = part.read(min(CHUNK_SIZE, remaining))
+            if not data:
+                break
+            hasher.update(data)
+            remaining -= len(data)
+    return hasher
+
+
+def append_chunk(session, offset, stream, length):
+    """
+    Ghi `length` byte đọc dần từ `stream` vào phiên tải lên, bắt đầu tại `offset`.
+    Dữ liệu được băm ngay khi ghi; phần đã nhận được giữ lại cả khi kết nối bị ngắt giữa chừng.
+    Trả về phiên đã cập nhật (kèm tệp đính kèm khi đã nhận đủ).
+    """
+    if session.is_complete:
+        raise UploadError('Phiên tải lên đã hoàn tất.', session.received)
+    if offset != session.received:
+        raise UploadError('Vị trí gửi không khớp với dữ liệu đã nhận.', session.received)
+    if length < 0 or offset + length > session.size:
+        raise UploadError('Dữ liệu gửi lên vượt quá kích thước tệp đã khai báo.', session.received)
+
+    hasher = _hasher(session)
+    written = 0
+    with open(temp_path(session.pk), 'r+b') as part:
+        part.seek(offset)
+        part.truncate()
+        while written < length:
+            data = stream.read(min(CHUNK_SIZE, length - written))
+            if not data:
+                break
+            part.write(data)
+            hasher.update(data)
+            written += len(data)
+
+    received = offset + written
+    # Điều kiện received=offset chặn hai request cùng ghi một vị trí
+    updated = UploadSession.objects.filter(pk=session.pk, received=offset).update(
+        received=received, updated_at=timezone.now(),
+    )
+    if not updated:
+        session.refresh_from_db()
+        raise UploadError('Phiên tải lên đang được ghi bởi một request khác.', session.received)
+    session.received = received
+    if written < length:
+        _remember(session, hasher)
+        raise UploadError('Kết nối bị ngắt trước khi nhận đủ dữ liệu.', received)
+    if received == session.size:
+        _complete(session, hasher)
+    else:
+        _remember(session, hasher)
+    return session
+
+
+def _complete(session, hasher):
+    path = temp_path(session.pk)
+    sha256 = hasher.hexdigest()
+    if session.expected_sha256 and session.expected_sha256 != sha256:
+        abort_upload(session)
+        raise UploadError('Mã SHA-256 của tệp không khớp, vui lòng tải lại.')
+
+    storage = FileBlob._meta.get_field('file').storage
+    stored = None
+    try:
+        with transaction.atomic():
+            # Ghi dòng blob trước khi chuyển tệp: request đồng thời có cùng nội dung phải chờ dòng này
+            # (khoá chính) rồi dùng lại blob, thay vì cùng ghi tệp
+            blob, created = _get_or_create_blob(sha256, session.size)
+            if created:
+                # Tệp cùng tên chỉ có thể là phần còn sót của một lần ghi bị hủy (cùng nội dung)
+                if storage.exists(blob.file.name):
+                    storage.delete(blob.file.name)
+                with open(path, 'rb') as part:
+                    stored = storage.save(blob.file.name, _PartFile(part))
+                if stored != blob.file.name:
+                    blob.file.name = stored
+                    blob.save(update_fields=['file'])
+            meeting_file = MeetingFile.objects.create(
+                meeting_id=session.meeting_id,
+                blob=blob,
+                file=blob.file.name,
+                name=session.name,
+                uploaded_by_id=session.uploaded_by_id,
+            )
+            session.meeting_file = meeting_file
+            session.save(update_fields=['meeting_file', 'updated_at'])
+    except Exception:
+        # Giao dịch bị hủy: không để lại tệp blob không có dòng tương ứng
+        if stored:
+            storage.delete(stored)
+        raise
+    # Nội dung đã có sẵn (hoặc storage đã sao chép thay vì chuyển tệp)
+    if os.path.exists(path):
+        os.remove(path)
+    return meeting_file
+
+
+def _get_or_create_blob(sha256, size):
+    try:
+        with transaction.atomic():
+            return FileBlob.objects.get_or_create(sha256=sha256, defaults={'size': size, 'file': blob_name(sha256)})
+    except IntegrityError:
+        # Request khác vừa ghi cùng blob
+        return FileBlob.objects.get(pk=sha256), False
+
+
+def abort_upload(session):
+    with _hashers_lock:
+        _hashers.pop(session.pk, None)
+    if os.path.exists(temp_path(session.pk)):
+        os.remove(temp_path(session.pk))
+    session.delete()
+
+
+def acquire_blob(sha256):
+    FileBlob.objects.filter(pk=sha256).update(ref_count=F('ref_count') + 1)
+
+
+def release_blob(sha256):
+    """
+    Giảm số tham chiếu của blob; xoá blob và tệp trên đĩa khi không còn tệp đính kèm nào dùng.
+    """
+    FileBlob.objects.filter(pk=sha256, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+    for blob in FileBlob.objects.filter(pk=sha256, ref_count=0):
+        if MeetingFile.objects.filter(blob=blob).exists():
+            continue
+        storage, name = blob.file.storage, blob.file.name
+        blob.delete()
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+def purge_sessions(now=None):
+    """
+    Xoá các phiên tải lên không còn hoạt động quá MEETING_UPLOAD_SESSION_TTL_HOURS giờ. Trả về số phiên đã xoá.
+    """
+    now = now or timezone.now()
+    stale = UploadSession.objects.filter(
+        updated_at__lt=now - timedelta(hours=settings.MEETING_UPLOAD_SESSION_TTL_HOURS),
+    )
+    count = 0
+    for session in stale.iterator():
+        abort_upload(session)
+        count += 1
+    return count
@@ -3,4 +3,30 @@ from . import views
 
 urlpatterns = [
     path('',views.meeting_list, name='meeting_list'),
+    path('<int:pk>/',views.meeting_detail, name='meeting_detail'),
+    path('agenda/',views.meeting_agenda, name='meeting_agenda'),
+    path('notifications/unread-count/',views.notification_unread_count, name='notification_unread_count'),
+    path('notifications/mark-read/',views.notification_mark_read, name='notification_mark_read'),
+    path('notifications/stream/',views.notification_stream, name='notification_stream'),
+    path('autocomplete/users/',views.autocomplete_users, name='autocomplete_users'),
+    path('autocomplete/departments/',views.autocomplete_departments, name='autocomplete_departments'),
+    path('autocomplete/organizations/',views.autocomplete_organizations, name='autocomplete_organizations'),
+    path('<int:pk>/uploads/',views.upload_start, name='upload_start'),
+    path('uploads/<uuid:session_id>/',views.upload_session, name='upload_session'),
+    path('<int:pk>/export.zip',views.meeting_export, name='meeting_export'),
+    path('import/',views.meeting_import, name='meeting_import'),
+    path('export.zip',views.meetings_export, name='meetings_export'),
+    path('<int:pk>/minutes/',views.minutes_detail, name='minutes_detail'),
+    path('<int:pk>/minutes/autosave/',views.minutes_autosave, name='minutes_autosave'),
+    path('<int:pk>/minutes/versions/',views.minutes_versions, name='minutes_versions'),
+    path('<int:pk>/minutes/versions/<int:version>/',views.minutes_version, name='minutes_version'),
+    path('files/<int:pk>/download/',views.meeting_file_download, name='meeting_file_download'),
+    path('files/<int:pk>/thumbnail/',views.meeting_file_preview, {'variant': 'thumbnail'}, name='meeting_file_thumbnail'),
+    path('files/<int:pk>/preview/',views.meeting_file_preview, {'variant': 'preview'}, name='meeting_file_preview'),
+    path('reports/attendance/',views.attendance_report, name='attendance_report'),
+    path('reports/attendance.json',views.attendance_report_data, name='attendance_report_data'),
+    path('calendar/',views.ical_feed_links, name='ical_feed_links'),
+    path('calendar/user/<str:token>.ics',views.ical_user_feed, name='ical_user_feed'),
+    path('calendar/department/<str:token>.ics',views.ical_department_feed, name='ical_department_feed'),
+    path('instrumentation/',views.instrumentation_stats, name='instrumentation_stats'),
 ]
@@ -1,47 +1,616 @@
-from django.shortcuts import render,redirect,get_list_or_404
-from django.http import HttpResponse, JsonResponse
+import json
+
+from django.shortcuts import render,redirect,get_list_or_404,get_object_or_404
+from django.template.loader import render_to_string
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse, Http404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, urlencode
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
-from .models import Department, Organization, UserAffiliation, Meeting
-from .forms import MeetingFilterForm
-from django.db.models import Q
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.http import require_GET, require_POST, require_http_methods
+from .models import Department, Organization, UserAffiliation, Meeting, MeetingParticipant, MeetingFile, MeetingMinutes, MinutesRevision, UploadSession
+from .forms import AttendanceReportForm, MeetingFilterForm, MeetingImportForm
+from .pagination import apaginate_meetings, InvalidCursor
+from .search import search_filter
+from .notifications import aunread_count, amark_read
+from . import autocomplete
+from . import ical
+from . import uploads
+from . import downloads
+from . import previews
+from . import minutes as minutes_history
+from . import exports
+from . import fragments
+from . import streams
+from . import rollups
+from . import imports
+from .membership import effective_attendee_ids
+from . import instrumentation
+from .agenda import agenda_range, group_by_day
+from django.utils import timezone
+from django.db.models import Exists, OuterRef
+
+def _filter_meetings(filter_form, meetings):
+    """
+    Áp dụng các điều kiện của MeetingFilterForm lên queryset cuộc họp.
+    """
+    if not filter_form.is_valid():
+        return meetings
+
+    start_date = filter_form.cleaned_data.get('date_from')
+    end_date = filter_form.cleaned_data.get('date_to')
+    department = filter_form.cleaned_data.get('department')
+    organization = filter_form.cleaned_data.get('organization')
+    status = filter_form.cleaned_data.get('status')
+    title = filter_form.cleaned_data.get('title')
+    search = filter_form.cleaned_data.get('search')
+
+    if start_date:
+        meetings = meetings.filter(date__gte=start_date)
+    if end_date:
+        meetings = meetings.filter(date__lte=end_date)
+    if department:
+        meetings = meetings.filter(Exists(
+            MeetingParticipant.objects.filter(meeting=OuterRef('pk'), department=department)
+        ))
+    if organization:
+        meetings = meetings.filter(Exists(
+            MeetingParticipant.objects.filter(meeting=OuterRef('pk'), organization=organization)
+        ))
+    if status:
+        meetings = meetings.filter(status=status)
+    if title:
+        meetings = meetings.filter(title__icontains=title)
+    if search:
+        meetings = meetings.filter(search_filter(search))
+    return meetings
+
+def _filter_params(filter_form):
+    """
+    Các bộ lọc đã chuẩn hoá (bỏ trường trống, sắp theo tên) của MeetingFilterForm, dùng cho khoá cache
+    và liên kết phân trang. Form không hợp lệ được bỏ qua như trong _filter_meetings.
+    """
+    if not filter_form.is_valid():
+        return ()
+    return tuple(sorted(
+        (name, str(value))
+        for name, value in filter_form.cleaned_data.items()
+        if value not in (None, '')
+    ))
+
+def _cursor_query(params, **cursor):
+    """
+    Chuỗi query giữ nguyên các bộ lọc hiện tại, thay con trỏ phân trang.
+    """
+    return urlencode([*params, *cursor.items()])
+
+async def _render_meeting_list(filter_form, params, after, before):
+    meetings = _filter_meetings(filter_form, Meeting.objects.all())
+
+    try:
+        page = await apaginate_meetings(meetings, after=after, before=before)
+    except InvalidCursor:
+        page = await apaginate_meetings(meetings)
+
+    context = {
+        'meetings':page,
+        'next_cursor':page.next_cursor,
+        'previous_cursor':page.previous_cursor,
+        'next_query':_cursor_query(params, after=page.next_cursor) if page.has_next else None,
+        'previous_query':_cursor_query(params, before=page.previous_cursor) if page.has_previous else None,
+    }
+    return render_to_string('meeting_manager/meeting_list_fragment.html', context)
 
-def meeting_list(request):
+async def meeting_list(request):
     """
-    Hiển thị danh sách các cuộc họp.
+    Hiển thị danh sách các cuộc họp (view async, ORM async).
+    Đoạn danh sách được cache theo bộ lọc và phiên bản dữ liệu; trình duyệt kiểm tra lại bằng ETag.
     """
     filter_form = MeetingFilterForm(request.GET)
-    meetings = Meeting.objects.all()
-    
-    if filter_form.is_valid():
-        start_date = filter_form.cleaned_data.get('start_date')
-        end_date = filter_form.cleaned_data.get('end_date')
-        department = filter_form.cleaned_data.get('department')
-        organization = filter_form.cleaned_data.get('organization')
-        status = filter_form.cleaned_data.get('status')
-        search = filter_form.cleaned_data.get('search')
-        
-        if start_date:
-            meetings = meetings.filter(date__gte=start_date)
-        if end_date:
-            meetings = meetings.filter(date__lte=end_date)
-        if department:
-            meetings = meetings.filter(departments=department)
-        if organization:
-            meetings = meetings.filter(organizations=organization)
-        if status:
-            meetings = meetings.filter(status=status)
-        if search:
-            meetings = meetings.filter(
-                Q(meeting_number__iconstains=search) |
-                Q(title__icontains=search) |
-                Q(host__icontain=search)
-            )
-            
-    #Group các cuộc họp theo ngày
-    meetings = meetings.order_by('-date','-time')
+    params = _filter_params(filter_form)
+    after, before = request.GET.get('after'), request.GET.get('before')
+    key, etag = await fragments.afragment_state('meeting_list', params, after, before)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        context = {
+            'filter_form':filter_form,
+            'meeting_items':await fragments.acached_fragment(
+                key, lambda: _render_meeting_list(filter_form, params, after, before),
+            ),
+        }
+        # Trang khung không dùng context processor (chúng đọc request.user đồng bộ)
+        response = HttpResponse(render_to_string('meeting_manager/meeting_list.html', context))
+    response['ETag'] = etag
+    patch_cache_control(response, no_cache=True)
+    return response
+
+def meeting_agenda(request):
+    """
+    Lịch họp theo tuần/tháng, các cuộc họp được nhóm theo ngày.
+    """
+    filter_form = MeetingFilterForm(request.GET)
+    meetings = _filter_meetings(filter_form, Meeting.objects.select_related('host'))
+
+    # Mặc định hiển thị tuần hiện tại (hoặc tháng hiện tại với ?range=month); khoảng ngày luôn có hai đầu
+    date_from = filter_form.cleaned_data.get('date_from') if filter_form.is_valid() else None
+    date_to = filter_form.cleaned_data.get('date_to') if filter_form.is_valid() else None
+    date_from, date_to = agenda_range(
+        date_from, date_to, timezone.localdate(), by_month=request.GET.get('range') == 'month',
+    )
+    meetings = meetings.filter(date__gte=date_from, date__lte=date_to)
+
     context = {
-        'meetings':meetings,
+        'day_sections':group_by_day(meetings),
         'filter_form':filter_form,
+        'date_from':date_from,
+        'date_to':date_to,
     }
-    
-    return render(request, 'meeting_manager/meeting_list.html',context)
+
+    return render(request, 'meeting_manager/meeting_agenda.html',context)
+
+@login_required
+@require_GET
+async def notification_unread_count(request):
+    """
+    Số thông báo chưa đọc của người dùng hiện tại (cho badge).
+    """
+    return JsonResponse({'unread': await aunread_count(await request.auser())})
+
+@login_required
+@require_POST
+async def notification_mark_read(request):
+    """
+    Đánh dấu đã đọc các thông báo có id trong `ids`, hoặc tất cả nếu không truyền `ids`.
+    """
+    ids = request.POST.getlist('ids')
+    try:
+        ids = [int(pk) for pk in ids] if ids else None
+    except ValueError:
+        return JsonResponse({'error': 'Danh sách thông báo không hợp lệ.'}, status=400)
+    user = await request.auser()
+    updated = await amark_read(user, ids)
+    return JsonResponse({'updated': updated, 'unread': await aunread_count(user)})
+
+@login_required
+@require_GET
+async def notification_stream(request):
+    """
+    Luồng Server-Sent Events đẩy thông báo mới và số chưa đọc cho badge.
+    Qua ASGI kết nối được giữ mở; qua WSGI chỉ trả các thông báo bị lỡ rồi trình duyệt tự kết nối lại.
+    """
+    user = await request.auser()
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID') or request.GET['last_event_id'])
+    except (KeyError, ValueError):
+        last_event_id = None
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(
+            streams.event_stream(user.pk, last_event_id), content_type='text/event-stream',
+        )
+    else:
+        response = HttpResponse(await streams.snapshot(user.pk, last_event_id), content_type='text/event-stream')
+    # nginx không gom dữ liệu của luồng
+    response['X-Accel-Buffering'] = 'no'
+    patch_cache_control(response, no_cache=True)
+    return response
+
+def _autocomplete_response(request, lookup):
+    return JsonResponse({'results': lookup(request.GET.get('q', ''))})
+
+@login_required
+@require_GET
+def autocomplete_users(request):
+    """
+    Gợi ý người dùng theo tiền tố họ tên hoặc tên (tham số `q`, không phân biệt dấu).
+    """
+    return _autocomplete_response(request, autocomplete.users)
+
+@login_required
+@require_GET
+def autocomplete_departments(request):
+    """
+    Gợi ý Khoa/Phòng theo tiền tố tên (tham số `q`, không phân biệt dấu).
+    """
+    return _autocomplete_response(request, autocomplete.departments)
+
+@login_required
+@require_GET
+def autocomplete_organizations(request):
+    """
+    Gợi ý Tổ chức theo tiền tố tên (tham số `q`, không phân biệt dấu).
+    """
+    return _autocomplete_response(request, autocomplete.organizations)
+
+def _can_edit_meeting(user, meeting):
+    return user.is_staff or user.pk in (meeting.host_id, meeting.preparation_id, meeting.created_by_id)
+
+def _upload_state(session, status=200):
+    return JsonResponse({
+        'id': str(session.pk),
+        'name': session.name,
+        'size': session.size,
+        'offset': session.received,
+        'complete': session.is_complete,
+        'file': session.meeting_file_id,
+    }, status=status)
+
+def _upload_error(error, status=400):
+    return JsonResponse({'error': str(error), 'offset': error.offset}, status=status)
+
+@login_required
+@require_POST
+def upload_start(request, pk):
+    """
+    Bắt đầu tải tệp đính kèm theo từng phần: `name`, `size` (byte) và tuỳ chọn `sha256` để kiểm tra.
+    """
+    meeting = get_object_or_404(Meeting, pk=pk)
+    if not _can_edit_meeting(request.user, meeting):
+        return JsonResponse({'error': 'Bạn không có quyền tải tệp lên cuộc họp này.'}, status=403)
+    name = request.POST.get('name', '').strip()
+    sha256 = request.POST.get('sha256', '').strip()
+    try:
+        size = int(request.POST.get('size', ''))
+    except ValueError:
+        return JsonResponse({'error': 'Kích thước tệp không hợp lệ.'}, status=400)
+    if not name or len(name) > 255:
+        return JsonResponse({'error': 'Tên tệp không hợp lệ.'}, status=400)
+    try:
+        session = uploads.start_upload(meeting, request.user, name, size, sha256)
+    except uploads.UploadError as e:
+        return _upload_error(e)
+    return _upload_state(session, status=201)
+
+@login_required
+@require_http_methods(['GET', 'PUT', 'DELETE'])
+def upload_session(request, session_id):
+    """
+    GET: vị trí cần gửi tiếp. PUT: gửi một phần, thân request là dữ liệu thô, header `Upload-Offset`
+    là vị trí bắt đầu. DELETE: huỷ phiên tải lên.
+    """
+    session = get_object_or_404(UploadSession, pk=session_id, uploaded_by=request.user)
+    if request.method == 'DELETE':
+        if not session.is_complete:
+            uploads.abort_upload(session)
+        return HttpResponse(status=204)
+    if request.method == 'PUT':
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.META.get('CONTENT_LENGTH') or '')
+        except ValueError:
+            return JsonResponse({'error': 'Thiếu header Upload-Offset hoặc Content-Length.'}, status=400)
+        try:
+            # Đọc thẳng từ luồng request theo từng khối, không nạp cả phần dữ liệu vào bộ nhớ
+            session = uploads.append_chunk(session, offset, request, length)
+        except uploads.UploadError as e:
+            return _upload_error(e, status=409 if e.offset is not None else 400)
+    return _upload_state(session)
+
+def _can_view_meeting(user, meeting):
+    if user.is_staff or user.pk in (meeting.host_id, meeting.preparation_id, meeting.created_by_id):
+        return True
+    return user.pk in effective_attendee_ids(meeting)
+
+@login_required
+@require_GET
+def meeting_file_download(request, pk):
+    """
+    Tải tệp đính kèm (hỗ trợ Range, ETag) cho người chủ trì, chuẩn bị, tạo cuộc họp và người được mời.
+    Thêm `?inline=1` để mở trực tiếp trên trình duyệt (chỉ PDF, ảnh, video, âm thanh; tệp khác luôn được tải về).
+    """
+    meeting_file = get_object_or_404(MeetingFile.objects.select_related('meeting', 'blob'), pk=pk)
+    if meeting_file.uploaded_by_id != request.user.pk and not _can_view_meeting(request.user, meeting_file.meeting):
+        raise Http404
+    try:
+        return downloads.file_response(request, meeting_file, as_attachment=request.GET.get('inline') != '1')
+    except FileNotFoundError:
+        raise Http404
+
+#Ảnh xem trước không đổi theo nội dung tệp nên được cache lâu ở trình duyệt
+PREVIEW_MAX_AGE = 365 * 24 * 3600
+
+@login_required
+@require_GET
+def meeting_file_preview(request, pk, variant):
+    """
+    Ảnh thu nhỏ hoặc bản xem trước của tệp đính kèm; 404 khi ảnh chưa được tạo.
+    """
+    meeting_file = get_object_or_404(
+        MeetingFile.objects.select_related('meeting', 'preview'), pk=pk, preview__status='ready',
+    )
+    if meeting_file.uploaded_by_id != request.user.pk and not _can_view_meeting(request.user, meeting_file.meeting):
+        raise Http404
+    sha256 = meeting_file.preview.sha256
+    etag = f'"{sha256[:32]}-{variant}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        try:
+            response = FileResponse(open(previews.image_path(sha256, variant), 'rb'), content_type='image/jpeg')
+        except FileNotFoundError:
+            raise Http404
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=PREVIEW_MAX_AGE, immutable=True)
+    return response
+
+def _render_meeting_detail(meeting):
+    participants = meeting.meeting_participants.select_related('user', 'department', 'organization').order_by('pk')
+    context = {
+        'meeting':meeting,
+        'participants':participants,
+        'files':meeting.files.order_by('uploaded_at', 'pk'),
+        'minutes':MeetingMinutes.objects.filter(meeting=meeting).only('version', 'updated_at').first(),
+    }
+    return render_to_string('meeting_manager/meeting_detail_fragment.html', context)
+
+@login_required
+@require_GET
+def meeting_detail(request, pk):
+    """
+    Thông tin cuộc họp, thành phần tham dự, tệp đính kèm và biên bản.
+    Đoạn chi tiết được cache theo phiên bản dữ liệu, dùng chung cho mọi người được xem.
+    """
+    meeting = get_object_or_404(Meeting.objects.select_related('host', 'preparation'), pk=pk)
+    if not _can_view_meeting(request.user, meeting):
+        raise Http404
+    key, etag = fragments.fragment_state('meeting_detail', meeting.pk)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        context = {
+            'meeting':meeting,
+            'detail':fragments.cached_fragment(key, lambda: _render_meeting_detail(meeting)),
+        }
+        response = render(request, 'meeting_manager/meeting_detail.html', context)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+def _can_edit_minutes(user, meeting, minutes):
+    if user.is_staff or user.pk in (meeting.host_id, meeting.preparation_id):
+        return True
+    return minutes is not None and minutes.created_by_id == user.pk
+
+def _meeting_minutes(request, pk):
+    meeting = get_object_or_404(Meeting, pk=pk)
+    if not _can_view_meeting(request.user, meeting):
+        raise Http404
+    return meeting, MeetingMinutes.objects.filter(meeting=meeting).first()
+
+@login_required
+@require_GET
+def minutes_detail(request, pk):
+    """
+    Nội dung và phiên bản hiện tại của biên bản (phiên bản 0 khi chưa có biên bản).
+    """
+    meeting, minutes = _meeting_minutes(request, pk)
+    return JsonResponse({
+        'version': minutes.version if minutes else 0,
+        'content': minutes.content if minutes else '',
+        'can_edit': _can_edit_minutes(request.user, meeting, minutes),
+    })
+
+@login_required
+@require_POST
+def minutes_autosave(request, pk):
+    """
+    Lưu tự động biên bản bằng bản vá JSON {"base_version": n, "ops": [[đầu, cuối, nội dung mới], ...]}.
+    Trả 409 kèm phiên bản hiện tại nếu biên bản đã được người khác lưu.
+    """
+    meeting, minutes = _meeting_minutes(request, pk)
+    if not _can_edit_minutes(request.user, meeting, minutes):
+        return JsonResponse({'error': 'Bạn không có quyền sửa biên bản này.'}, status=403)
+    try:
+        payload = json.loads(request.body)
+        base_version = int(payload['base_version'])
+        ops = payload['ops']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Dữ liệu lưu tự động không hợp lệ.'}, status=400)
+    try:
+        minutes = minutes_history.apply_patch(meeting, base_version, ops, request.user)
+    except minutes_history.PatchError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except minutes_history.VersionConflict as e:
+        return JsonResponse({'error': str(e), 'version': e.version}, status=409)
+    return JsonResponse({'version': minutes.version, 'length': len(minutes.content)})
+
+@login_required
+@require_GET
+def minutes_versions(request, pk):
+    """
+    Danh sách các phiên bản của biên bản, mới nhất trước.
+    """
+    meeting, minutes = _meeting_minutes(request, pk)
+    if minutes is None:
+        raise Http404
+    revisions = minutes.revisions.select_related('created_by').order_by('-version').only(
+        'version', 'is_snapshot', 'created_at', 'created_by__username', 'created_by__first_name', 'created_by__last_name',
+    )
+    return JsonResponse({'versions': [
+        {
+            'version': revision.version,
+            'created_at': revision.created_at.isoformat(),
+            'created_by': (revision.created_by.get_full_name() or revision.created_by.username) if revision.created_by else None,
+        }
+        for revision in revisions
+    ]})
+
+@login_required
+@require_GET
+def minutes_version(request, pk, version):
+    """
+    Nội dung biên bản ở một phiên bản cũ.
+    """
+    meeting, minutes = _meeting_minutes(request, pk)
+    if minutes is None:
+        raise Http404
+    try:
+        content = minutes_history.text_at(minutes, version)
+    except MinutesRevision.DoesNotExist:
+        raise Http404
+    return JsonResponse({'version': version, 'content': content})
+
+#Số cuộc họp nạp (kèm thành phần tham dự, tệp đính kèm) mỗi lần khi xuất ZIP
+EXPORT_CHUNK_SIZE = 50
+
+def _zip_response(meetings, filename):
+    response = StreamingHttpResponse(
+        exports.stream_zip(exports.export_queryset(meetings).iterator(chunk_size=EXPORT_CHUNK_SIZE)),
+        content_type='application/zip',
+    )
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    patch_cache_control(response, private=True, no_store=True)
+    return response
+
+@login_required
+@require_GET
+def meeting_export(request, pk):
+    """
+    Tải hồ sơ một cuộc họp (thông tin, thành phần tham dự, biên bản, tệp đính kèm) dạng ZIP.
+    """
+    meeting = get_object_or_404(Meeting, pk=pk)
+    if not _can_view_meeting(request.user, meeting):
+        raise Http404
+    return _zip_response(Meeting.objects.filter(pk=meeting.pk), f"ho-so-{meeting.meeting_number or meeting.pk}.zip")
+
+@staff_member_required
+@require_GET
+def meetings_export(request):
+    """
+    Tải hồ sơ các cuộc họp theo bộ lọc của danh sách (vd. cả tháng: ?date_from=...&date_to=...) dạng ZIP.
+    """
+    filter_form = MeetingFilterForm(request.GET)
+    if not filter_form.is_valid() or not (filter_form.cleaned_data.get('date_from') and filter_form.cleaned_data.get('date_to')):
+        return JsonResponse({'error': 'Vui lòng chọn khoảng ngày cần xuất (date_from, date_to).'}, status=400)
+    meetings = _filter_meetings(filter_form, Meeting.objects.all())
+    date_from, date_to = filter_form.cleaned_data['date_from'], filter_form.cleaned_data['date_to']
+    return _zip_response(meetings, f"ho-so-cuoc-hop-{date_from:%Y%m%d}-{date_to:%Y%m%d}.zip")
+
+@staff_member_required
+@require_http_methods(['GET', 'POST'])
+def meeting_import(request):
+    """
+    Nhập hàng loạt cuộc họp và thành phần tham dự từ tệp CSV/XLSX, hiển thị lỗi theo từng dòng.
+    """
+    form = MeetingImportForm(request.POST or None, request.FILES or None)
+    report = None
+    if request.method == 'POST' and form.is_valid():
+        upload = form.cleaned_data['file']
+        try:
+            report = imports.import_meetings(
+                imports.read_rows(upload, upload.name),
+                request.user,
+                notify=form.cleaned_data['notify'],
+                dry_run=form.cleaned_data['dry_run'],
+            )
+        except imports.ImportFileError as e:
+            form.add_error('file', str(e))
+    return render(request, 'meeting_manager/meeting_import.html', {
+        'form': form,
+        'report': report,
+        'columns': imports.COLUMNS,
+    })
+
+def _attendance_report(request):
+    """
+    (form, các dòng báo cáo) đọc từ bảng tổng hợp; lọc thêm theo ?id=... nếu có.
+    """
+    form = AttendanceReportForm(request.GET)
+    if not form.is_valid():
+        return form, None
+    ids = [int(value) for value in request.GET.getlist('id') if value.isdigit()] or None
+    data = form.cleaned_data
+    return form, rollups.report(data['kind'], data['date_from'], data['date_to'], ids)
+
+@staff_member_required
+@require_GET
+def attendance_report(request):
+    """
+    Báo cáo tỷ lệ tham dự theo Khoa/Phòng, Tổ chức hoặc cá nhân trong một khoảng ngày.
+    """
+    form, rows = _attendance_report(request)
+    return render(request, 'meeting_manager/attendance_report.html', {'form': form, 'rows': rows})
+
+@staff_member_required
+@require_GET
+def attendance_report_data(request):
+    """
+    Dữ liệu báo cáo tỷ lệ tham dự dạng JSON.
+    """
+    form, rows = _attendance_report(request)
+    if rows is None:
+        return JsonResponse({'errors': form.errors}, status=400)
+    data = form.cleaned_data
+    return JsonResponse({
+        'kind': data['kind'],
+        'date_from': data['date_from'].isoformat(),
+        'date_to': data['date_to'].isoformat(),
+        'results': rows,
+    })
+
+def _ical_response(request, kind, token):
+    pk = ical.parse_token(kind, token)
+    if pk is None:
+        raise Http404
+
+    etag, last_modified = ical.feed_state(kind, pk)
+    last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+    # Lịch không đổi: trả 304 mà không truy vấn CSDL
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified_ts)
+    if response is None:
+        if kind == ical.USER:
+            user = get_object_or_404(User, pk=pk)
+            name = f"Lịch họp - {user.get_full_name() or user.username}"
+        else:
+            name = f"Lịch họp - {get_object_or_404(Department, pk=pk).name}"
+        response = HttpResponse(
+            ical.cached_feed(kind, pk, etag, ical.feed_meetings(kind, pk), name),
+            content_type='text/calendar; charset=utf-8',
+        )
+    response['ETag'] = etag
+    if last_modified_ts:
+        response['Last-Modified'] = http_date(last_modified_ts)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+def ical_user_feed(request, token):
+    """
+    Lịch họp .ics của một người dùng, truy cập bằng đường dẫn có chữ ký.
+    """
+    return _ical_response(request, ical.USER, token)
+
+def ical_department_feed(request, token):
+    """
+    Lịch họp .ics của một Khoa/Phòng, truy cập bằng đường dẫn có chữ ký.
+    """
+    return _ical_response(request, ical.DEPARTMENT, token)
+
+@login_required
+def ical_feed_links(request):
+    """
+    Đường dẫn đăng ký lịch của người dùng hiện tại và các Khoa/Phòng của họ.
+    """
+    departments = Department.objects.filter(
+        affiliations__user=request.user, affiliations__is_active=True
+    ).distinct()
+    return JsonResponse({
+        'user': request.build_absolute_uri(ical.feed_url(ical.USER, request.user.pk)),
+        'departments': [
+            {'id': department.pk, 'name': department.name,
+             'url': request.build_absolute_uri(ical.feed_url(ical.DEPARTMENT, department.pk))}
+            for department in departments
+        ],
+    })
+
+@staff_member_required
+def instrumentation_stats(request):
+    """
+    Phân vị thời gian xử lý, số truy vấn và thời gian CSDL theo view trong tiến trình hiện tại.
+    Gửi POST để xoá số liệu đã thu thập.
+    """
+    if request.method == 'POST':
+        instrumentation.stats.reset()
+    return JsonResponse({
+        'enabled': settings.REQUEST_INSTRUMENTATION,
+        'views': instrumentation.stats.summary(),
+    })
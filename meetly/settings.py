@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,6 +49,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'meeting_manager.instrumentation.QueryInstrumentationMiddleware',
 ]
 
 ROOT_URLCONF = 'meetly.urls'
@@ -64,6 +66,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'meeting_manager.context_processors.notifications',
             ],
         },
     },
@@ -83,6 +86,32 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Phiên bản đoạn HTML, tập thành viên, phiên bản lịch .ics và bộ đếm thông báo cần một cache dùng chung giữa
+# các tiến trình với add/incr nguyên tử: đặt MEETLY_REDIS_URL (cần gói redis). Không có Redis thì dùng cache
+# trong bộ nhớ, chỉ đúng khi chạy một tiến trình (máy phát triển); kiểm tra meeting_manager.W001 sẽ cảnh báo.
+
+REDIS_URL = os.environ.get('MEETLY_REDIS_URL', '')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {
+                'MAX_ENTRIES': 10000,
+            },
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -119,7 +148,80 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded files
+
+MEDIA_URL = 'media/'
+
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Notifications
+# Các tin Zalo được ghi vào outbox và gửi bởi lệnh `manage.py dispatch_notifications`
+
+ZALO_API_URL = os.environ.get('ZALO_API_URL', 'https://openapi.zalo.me/v3.0/oa/message/cs')
+
+ZALO_ACCESS_TOKEN = os.environ.get('ZALO_ACCESS_TOKEN', '')
+
+# Số tin tối đa mỗi giây cho từng kênh gửi
+NOTIFICATION_RATE_LIMITS = {
+    'zalo': 10,
+}
+
+NOTIFICATION_MAX_ATTEMPTS = 5
+
+# Luồng thông báo trực tiếp (Server-Sent Events, /meeting_manager/notifications/stream/)
+# Chạy qua ASGI (meetly.asgi) để giữ kết nối mở; mỗi tiến trình chỉ có một tác vụ đọc thông báo mới sau mỗi khoảng này (giây)
+NOTIFICATION_STREAM_POLL_INTERVAL = 2
+
+# Gửi dòng chú thích khi kết nối rỗi quá khoảng này (giây) để proxy không đóng kết nối
+NOTIFICATION_STREAM_HEARTBEAT = 25
+
+# Trình duyệt kết nối lại sau khoảng này (mili giây); qua WSGI đây là chu kỳ hỏi lại
+NOTIFICATION_STREAM_RETRY_MS = 10000
+
+# Các mốc nhắc trước giờ họp (phút), gửi bởi lệnh `manage.py run_reminder_scheduler`
+MEETING_REMINDER_OFFSETS = [24 * 60, 30]
+
+# Đo số truy vấn và thời gian xử lý của từng request (bật bằng MEETLY_INSTRUMENTATION=1)
+# Xem thống kê tại /meeting_manager/instrumentation/ (chỉ dành cho nhân viên quản trị)
+REQUEST_INSTRUMENTATION = os.environ.get('MEETLY_INSTRUMENTATION') == '1'
+
+# Một câu SQL lặp lại từ chừng này lần trong một request được coi là nghi vấn N+1
+REQUEST_INSTRUMENTATION_N_PLUS_ONE_THRESHOLD = 5
+
+# Tải tệp đính kèm theo từng phần
+# Các phần đang tải dở được ghi vào thư mục này, nằm ngoài MEDIA_ROOT để không bị truy cập trực tiếp
+MEETING_UPLOAD_TEMP_DIR = BASE_DIR / 'upload_sessions'
+
+MEETING_UPLOAD_MAX_SIZE = 4 * 1024 ** 3
+
+# Phiên tải lên không có dữ liệu mới sau khoảng này bị xoá bởi lệnh `manage.py purge_upload_sessions`
+MEETING_UPLOAD_SESSION_TTL_HOURS = 24
+
+# Tải tệp đính kèm: '' để Django tự gửi (FileResponse, hỗ trợ Range),
+# 'x-accel-redirect' (nginx) hoặc 'x-sendfile' (Apache mod_xsendfile) để web server gửi tệp sau khi kiểm tra quyền
+MEETING_FILE_OFFLOAD = os.environ.get('MEETLY_FILE_OFFLOAD', '')
+
+# Location `internal` của nginx trỏ tới MEDIA_ROOT, dùng với 'x-accel-redirect'
+MEETING_FILE_ACCEL_PREFIX = '/protected-media/'
+
+# Ảnh thu nhỏ và bản xem trước tệp đính kèm, tạo bởi lệnh `manage.py generate_previews`
+# Ảnh được lưu theo mã SHA-256 của nội dung tệp trong thư mục này
+MEETING_PREVIEW_ROOT = BASE_DIR / 'previews'
+
+# Thời gian tối đa (giây) cho một lần chuyển đổi tài liệu
+MEETING_PREVIEW_TIMEOUT = 120
+
+MEETING_PREVIEW_MAX_ATTEMPTS = 3
+
+# Chương trình chuyển đổi: LibreOffice (tài liệu văn phòng -> PDF) và poppler (PDF -> ảnh)
+MEETING_PREVIEW_SOFFICE = os.environ.get('MEETLY_SOFFICE', 'soffice')
+
+MEETING_PREVIEW_PDFTOPPM = os.environ.get('MEETLY_PDFTOPPM', 'pdftoppm')
+
+# Lịch sử biên bản: cứ chừng này phiên bản thì lưu một bản đầy đủ, còn lại chỉ lưu phần thay đổi
+MINUTES_SNAPSHOT_INTERVAL = 20